@@ -1,96 +1,79 @@
 import json
-import re
 import os
+import sys
+import time
 from http.server import BaseHTTPRequestHandler
 import urllib.parse
 
-# Since we can't use joblib/scikit-learn directly in Vercel serverless functions
-# We'll implement a lightweight sentiment analysis for now
-# In production, you might want to use cloud ML services or simpler models
+# Shared modules live at the project root, one level above api/
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
 
-def preprocess_text(text):
-    """Clean and preprocess text data"""
-    # Remove HTML tags
-    text = re.sub(r'<.*?>', '', str(text))
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    # Remove punctuation and special characters
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Convert to lowercase
-    text = text.lower()
-    return text
+from text_preprocessing import preprocess_text
+from metrics import CONTENT_TYPE, LENGTH_BUCKETS, MetricsRegistry
+from sentiment_lexicon import EMOTIONS, analyze_sentiment_simple, word_analysis
+
+# joblib/scikit-learn can't ship in Vercel serverless functions, so the
+# trained SVM is scored from the exported artifact with the NumPy-only
+# runtime. Without NumPy or an artifact, the rule-based analyser in
+# sentiment_lexicon.py is used instead.
+# NumPy is declared in api/requirements.txt and the artifact is bundled via
+# vercel.json's includeFiles, so the fallback means a broken deploy.
+try:
+    from numpy_runtime import NumpyModel
+    NUMPY_IMPORT_ERROR = None
+except ImportError as e:
+    NumpyModel = None
+    NUMPY_IMPORT_ERROR = e
+
+# Prometheus metrics, served on GET /api/predict?metrics
+metrics_registry = MetricsRegistry()
+STAGE_SECONDS = metrics_registry.histogram(
+    'sentify_stage_seconds', 'Time spent in each stage of a prediction', labelnames=('stage',))
+REQUEST_SECONDS = metrics_registry.histogram(
+    'sentify_request_seconds', 'Time spent handling a request', labelnames=('route',))
+INPUT_LENGTH = metrics_registry.histogram(
+    'sentify_input_length_chars', 'Length of submitted texts in characters', buckets=LENGTH_BUCKETS)
+IN_FLIGHT = metrics_registry.gauge('sentify_in_flight_requests', 'Prediction requests being handled')
+MODEL_LOAD_SECONDS = metrics_registry.gauge(
+    'sentify_model_load_seconds', 'Time taken to load the model')
+
+PARSE_STAGE = STAGE_SECONDS.labels('parse')
+PREPROCESS_STAGE = STAGE_SECONDS.labels('preprocess')
+ANALYZE_STAGE = STAGE_SECONDS.labels('analyze')
+ENCODE_STAGE = STAGE_SECONDS.labels('encode')
+PREDICT_REQUEST = REQUEST_SECONDS.labels('/api/predict')
+
+def load_model():
+    """The exported SVM (MODEL_ARTIFACT or the project's artifact), or None to use the lexicon"""
+    if NumpyModel is None:
+        print(f"WARNING: serving the keyword lexicon, not the SVM: "
+              f"NumPy runtime unavailable ({NUMPY_IMPORT_ERROR})", file=sys.stderr)
+        return None
+    path = os.environ.get('MODEL_ARTIFACT', os.path.join(PROJECT_ROOT, 'sentiment_model.artifact'))
+    try:
+        return NumpyModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"WARNING: serving the keyword lexicon, not the SVM: "
+              f"could not load the model artifact at {path} ({e!r})", file=sys.stderr)
+        return None
+
+_started = time.perf_counter()
+SVM_MODEL = load_model()
+MODEL_NAME = 'svm' if SVM_MODEL is not None else 'lexicon'
+MODEL_LOAD_SECONDS.set(time.perf_counter() - _started)
+
+def analyze_sentiment_model(text):
+    """Trained SVM prediction; confidence is the winning class's one-vs-rest score, as in app.py"""
+    sentiments, confidences = SVM_MODEL.predict([text])
+    sentiment = str(sentiments[0]).capitalize()
+    confidence = float(confidences[0])
 
-def analyze_sentiment_simple(text):
-    """Simple rule-based sentiment analysis"""
-    # Enhanced word lists for better accuracy
-    positive_words = [
-        'good', 'great', 'excellent', 'amazing', 'wonderful', 'love', 'fantastic', 
-        'awesome', 'happy', 'perfect', 'beautiful', 'brilliant', 'outstanding', 
-        'superb', 'marvelous', 'delighted', 'thrilled', 'excited', 'pleased', 
-        'satisfied', 'joy', 'cheerful', 'optimistic', 'grateful', 'blessed',
-        'incredible', 'magnificent', 'spectacular', 'phenomenal', 'exceptional',
-        'best', 'better', 'positive', 'nice', 'lovely'
-    ]
-    
-    negative_words = [
-        'bad', 'terrible', 'awful', 'hate', 'horrible', 'disappointed', 'worst', 
-        'sad', 'angry', 'frustrated', 'disgusting', 'annoying', 'boring', 
-        'stupid', 'ugly', 'nasty', 'rude', 'mean', 'cruel', 'harsh', 'bitter',
-        'depressed', 'miserable', 'unhappy', 'upset', 'worried', 'concerned',
-        'terrible', 'dreadful', 'appalling', 'shocking', 'outrageous',
-        'worse', 'negative', 'poor', 'lacking'
-    ]
-    
-    neutral_indicators = [
-        'okay', 'fine', 'alright', 'normal', 'average', 'standard', 'typical',
-        'usual', 'regular', 'moderate', 'fair', 'adequate', 'acceptable'
-    ]
-    
-    words = text.lower().split()
-    
-    positive_score = sum(1 for word in words if any(pos in word for pos in positive_words))
-    negative_score = sum(1 for word in words if any(neg in word for neg in negative_words))
-    neutral_score = sum(1 for word in words if any(neu in word for neu in neutral_indicators))
-    
-    total_words = len(words)
-    total_sentiment_words = positive_score + negative_score + neutral_score
-    
-    # Calculate confidence based on sentiment word density
-    if total_words > 0:
-        sentiment_density = total_sentiment_words / total_words
-        base_confidence = min(0.6 + (sentiment_density * 0.3), 0.95)
-    else:
-        base_confidence = 0.5
-    
-    # Determine sentiment
-    if positive_score > negative_score and positive_score > neutral_score:
-        sentiment = 'Positive'
-        confidence = base_confidence + (positive_score - max(negative_score, neutral_score)) * 0.05
-        emotions = ['joy', 'satisfaction', 'optimism', 'happiness']
-    elif negative_score > positive_score and negative_score > neutral_score:
-        sentiment = 'Negative'
-        confidence = base_confidence + (negative_score - max(positive_score, neutral_score)) * 0.05
-        emotions = ['disappointment', 'frustration', 'concern', 'dissatisfaction']
-    else:
-        sentiment = 'Neutral'
-        confidence = base_confidence
-        emotions = ['calm', 'balanced', 'informative', 'objective']
-    
-    # Ensure confidence is within bounds
-    confidence = min(max(confidence, 0.5), 0.98)
-    
     return {
         'sentiment': sentiment,
-        'confidence': round(confidence, 3),
-        'emotions': emotions[:3],  # Return top 3 emotions
-        'word_analysis': {
-            'positive_words': positive_score,
-            'negative_words': negative_score,
-            'neutral_words': neutral_score,
-            'total_words': total_words
-        }
+        'confidence': confidence,
+        'emotions': EMOTIONS.get(sentiment, EMOTIONS['Neutral'])[:3],
+        'word_analysis': word_analysis(text)
     }
 
 class handler(BaseHTTPRequestHandler):
@@ -102,6 +85,8 @@ class handler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def do_POST(self):
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
         try:
             # Read the request body
             content_length = int(self.headers.get('Content-Length', 0))
@@ -109,6 +94,8 @@ class handler(BaseHTTPRequestHandler):
             
             # Parse JSON data
             data = json.loads(post_data.decode('utf-8'))
+            parsed = time.perf_counter()
+            PARSE_STAGE.observe(parsed - started)
             
             if 'text' not in data:
                 self.send_error_response({'error': 'No text provided'}, 400)
@@ -120,9 +107,18 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response({'error': 'Empty text provided'}, 400)
                 return
             
+            INPUT_LENGTH.observe(len(text))
+            
             # Preprocess and analyze
             clean_text = preprocess_text(text)
-            result = analyze_sentiment_simple(clean_text)
+            cleaned = time.perf_counter()
+            if SVM_MODEL is not None:
+                result = analyze_sentiment_model(clean_text)
+            else:
+                result = analyze_sentiment_simple(clean_text)
+            analyzed = time.perf_counter()
+            PREPROCESS_STAGE.observe(cleaned - parsed)
+            ANALYZE_STAGE.observe(analyzed - cleaned)
             
             # Send successful response
             self.send_response(200)
@@ -136,17 +132,28 @@ class handler(BaseHTTPRequestHandler):
                 'confidence': result['confidence'],
                 'emotions': result['emotions'],
                 'word_analysis': result['word_analysis'],
+                'model': MODEL_NAME,
                 'success': True
             }
             
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            body = json.dumps(response).encode('utf-8')
+            ENCODE_STAGE.observe(time.perf_counter() - analyzed)
+            self.wfile.write(body)
             
         except json.JSONDecodeError:
             self.send_error_response({'error': 'Invalid JSON data'}, 400)
         except Exception as e:
             self.send_error_response({'error': str(e)}, 500)
+        finally:
+            IN_FLIGHT.dec()
+            PREDICT_REQUEST.observe(time.perf_counter() - started)
     
     def do_GET(self):
+        query = urllib.parse.urlparse(self.path).query
+        if 'metrics' in urllib.parse.parse_qs(query, keep_blank_values=True):
+            self.send_metrics()
+            return
+        
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -157,11 +164,20 @@ class handler(BaseHTTPRequestHandler):
             'endpoint': '/api/predict',
             'method': 'POST',
             'body': {'text': 'Your text to analyze'},
+            'model': MODEL_NAME,
             'status': 'active'
         }
         
         self.wfile.write(json.dumps(response).encode('utf-8'))
     
+    def send_metrics(self):
+        body = metrics_registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+    
     def send_error_response(self, error_data, status_code):
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
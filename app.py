@@ -1,49 +1,161 @@
+import hashlib
+import json
+import os
+import time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import joblib
-import re
+from dedup import DEFAULT_THRESHOLD, group_duplicates
+from inference_engine import load_engine
+from line_stream import OVERLONG, LineReader, StreamingRequestHandler
+from metrics import CONTENT_TYPE, LENGTH_BUCKETS, MetricsRegistry
+from prediction_cache import PredictionCache
+from text_preprocessing import preprocess_text
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load the trained model and vectorizer once when the app starts
-model = None
-vectorizer = None
-label_encoder = None
+# Load the trained model once when the app starts. The compiled artifact
+# (see model_artifact.py) is used when present, otherwise the joblib pickles.
+engine = None
+
+# 'svm' scores every text with the model; 'cascade' answers confident
+# lexicon matches directly and sends only the rest to the model (see cascade.py)
+PREDICTION_MODE = os.environ.get('PREDICTION_MODE', 'svm')
+# The cascade module and its thresholds, loaded in cascade mode only
+cascade = None
+cascade_thresholds = None
+
+# Upper bound on the number of texts accepted by /predict/batch
+MAX_BATCH_SIZE = 1000
+
+# /predict/stream: texts scored together, longest a line waits for a batch
+# to fill, lines buffered before the sender is throttled, and line length cap
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 64))
+STREAM_MAX_WAIT = float(os.environ.get('STREAM_MAX_WAIT_MS', 20)) / 1000.0
+STREAM_BUFFER_LINES = int(os.environ.get('STREAM_BUFFER_LINES', 256))
+MAX_LINE_BYTES = int(os.environ.get('STREAM_MAX_LINE_BYTES', 16384))
+# serve.py turns this off for single-threaded workers, where one open stream
+# would keep the worker from answering anything else
+STREAMS_ENABLED = True
+
+# Results keyed on cleaned text + model version; size 0 disables the cache
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 0)) or None
+)
+
+# Prometheus metrics served on /metrics
+metrics_registry = MetricsRegistry()
+STAGE_SECONDS = metrics_registry.histogram(
+    'sentify_stage_seconds', 'Time spent in each stage of a prediction', labelnames=('stage',))
+REQUEST_SECONDS = metrics_registry.histogram(
+    'sentify_request_seconds', 'Time spent handling a request', labelnames=('route',))
+INPUT_LENGTH = metrics_registry.histogram(
+    'sentify_input_length_chars', 'Length of submitted texts in characters', buckets=LENGTH_BUCKETS)
+IN_FLIGHT = metrics_registry.gauge('sentify_in_flight_requests', 'Prediction requests being handled')
+MODEL_LOAD_SECONDS = metrics_registry.gauge('sentify_model_load_seconds', 'Time taken to load the model')
+OPEN_STREAMS = metrics_registry.gauge('sentify_open_streams', 'Open /predict/stream connections')
+STREAM_LINES = metrics_registry.counter('sentify_stream_lines_total', 'Lines received on /predict/stream')
+CASCADE_TEXTS = metrics_registry.counter(
+    'sentify_cascade_texts_total', 'Texts scored in cascade mode by the path that answered', labelnames=('path',))
+
+# Series are resolved once so a request only pays for the observation
+PARSE_STAGE = STAGE_SECONDS.labels('parse')
+PREPROCESS_STAGE = STAGE_SECONDS.labels('preprocess')
+CACHE_STAGE = STAGE_SECONDS.labels('cache')
+VECTORIZE_STAGE = STAGE_SECONDS.labels('vectorize')
+CLASSIFY_STAGE = STAGE_SECONDS.labels('classify')
+ENCODE_STAGE = STAGE_SECONDS.labels('encode')
+PREDICT_REQUEST = REQUEST_SECONDS.labels('/predict')
+BATCH_REQUEST = REQUEST_SECONDS.labels('/predict/batch')
+LEXICON_PATH = CASCADE_TEXTS.labels('lexicon')
+SVM_PATH = CASCADE_TEXTS.labels('svm')
 
 def load_models():
     """Load the trained models"""
-    global model, vectorizer, label_encoder
+    global engine, cascade, cascade_thresholds
     try:
-        model = joblib.load('svm_sentiment_model.pkl')
-        vectorizer = joblib.load('tfidf_vectorizer.pkl')
-        label_encoder = joblib.load('label_encoder.pkl')
+        started = time.perf_counter()
+        engine = load_engine()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
+        model_version = engine.model_id
+        if PREDICTION_MODE == 'cascade':
+            import cascade
+            cascade_thresholds = cascade.load_thresholds(
+                os.environ.get('CASCADE_THRESHOLDS', cascade.DEFAULT_THRESHOLDS_PATH))
+            if cascade_thresholds.get('model_id') != engine.model_id \
+                    or 'confidence_maps' not in cascade_thresholds:
+                # Missing, calibrated for another model, or from before confidence maps: escalate everything
+                print("Cascade thresholds missing or out of date; run cascade.py")
+                cascade_thresholds = dict(cascade.NEVER)
+            # Cascade results depend on the thresholds and maps too
+            calibration = json.dumps(cascade_thresholds, sort_keys=True).encode('utf-8')
+            model_version += ':cascade:' + hashlib.sha256(calibration).hexdigest()[:16]
+        # A different model invalidates every cached result
+        prediction_cache.set_model_version(model_version)
         print("Models loaded successfully!")
         return True
     except Exception as e:
         print(f"Error loading models: {e}")
         return False
 
-def preprocess_text(text):
-    """Clean and preprocess text data"""
-    # Remove HTML tags
-    text = re.sub(r'<.*?>', '', str(text))
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    # Remove punctuation and special characters
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Convert to lowercase
-    text = text.lower()
-    return text
+def score_clean_texts(clean_texts):
+    """Return (sentiment, confidence, path) per cleaned text, scoring cache misses in one pass
+
+    path is the cascade path that answered ('lexicon' or 'svm'), or None
+    outside cascade mode.
+    """
+    started = time.perf_counter()
+    results = [prediction_cache.get(clean_text) for clean_text in clean_texts]
+    
+    # Duplicates within the request are scored once
+    misses = list(dict.fromkeys(
+        clean_text for clean_text, result in zip(clean_texts, results) if result is None
+    ))
+    CACHE_STAGE.observe(time.perf_counter() - started)
+    if misses:
+        started = time.perf_counter()
+        if cascade_thresholds is not None:
+            # Lexicon first; the uncertain texts are vectorised and scored as one batch
+            sentiments, confidences, cheap = cascade.cascade_predict(engine, misses, cascade_thresholds)
+            CLASSIFY_STAGE.observe(time.perf_counter() - started)
+            paths = ['lexicon' if lexicon else 'svm' for lexicon in cheap]
+            served = int(cheap.sum())
+            LEXICON_PATH.inc(served)
+            SVM_PATH.inc(len(misses) - served)
+        else:
+            X = engine.vectorizer.transform(misses)
+            vectorized = time.perf_counter()
+            sentiments, confidences = engine.predict_matrix(X)
+            paths = [None] * len(misses)
+            VECTORIZE_STAGE.observe(vectorized - started)
+            CLASSIFY_STAGE.observe(time.perf_counter() - vectorized)
+        scored = {}
+        for clean_text, sentiment, confidence, path in zip(misses, sentiments, confidences, paths):
+            scored[clean_text] = (str(sentiment), float(confidence), path)
+            prediction_cache.put(clean_text, scored[clean_text])
+        results = [result or scored[clean_text] for clean_text, result in zip(clean_texts, results)]
+    
+    return results
+
+def score_fields(score):
+    """Response fields for one score_clean_texts result"""
+    sentiment, confidence, path = score
+    fields = {'sentiment': sentiment, 'confidence': confidence}
+    if path is not None:
+        fields['answered_by'] = path
+    return fields
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """API endpoint to predict sentiment"""
+    started = time.perf_counter()
+    IN_FLIGHT.inc()
     try:
         # Get text from request
         data = request.get_json()
+        parsed = time.perf_counter()
+        PARSE_STAGE.observe(parsed - started)
         
         if not data or 'text' not in data:
             return jsonify({'error': 'No text provided'}), 400
@@ -53,40 +165,209 @@ def predict():
         if not text or text.strip() == '':
             return jsonify({'error': 'Empty text provided'}), 400
         
+        INPUT_LENGTH.observe(len(text))
+        
         # Preprocess text
         clean_text = preprocess_text(text)
+        PREPROCESS_STAGE.observe(time.perf_counter() - parsed)
         
-        # Vectorize
-        text_tfidf = vectorizer.transform([clean_text])
-        
-        # Predict
-        prediction = model.predict(text_tfidf)[0]
-        
-        # Convert back to original label
-        sentiment = label_encoder.inverse_transform([prediction])[0]
+        # Vectorize and score (or reuse a cached result)
+        fields = score_fields(score_clean_texts([clean_text])[0])
         
-        # Get prediction probability (confidence)
-        probabilities = model.decision_function(text_tfidf)[0]
-        
-        return jsonify({
+        scored = time.perf_counter()
+        response = jsonify({
             'text': text,
-            'sentiment': sentiment,
-            'confidence': float(max(probabilities) if hasattr(probabilities, '__iter__') else probabilities),
+            **fields,
             'success': True
         })
+        ENCODE_STAGE.observe(time.perf_counter() - scored)
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+    finally:
+        IN_FLIGHT.dec()
+        PREDICT_REQUEST.observe(time.perf_counter() - started)
+
+def batch_predictions(data):
+    """(response body, status) for a /predict/batch payload; shared with async_server.py"""
+    if not isinstance(data, dict) or 'items' not in data:
+        return {'error': 'No items provided'}, 400
+    
+    items = data['items']
+    
+    if not isinstance(items, list) or len(items) == 0:
+        return {'error': 'Items must be a non-empty list'}, 400
+    
+    if len(items) > MAX_BATCH_SIZE:
+        return {'error': f'Batch too large (max {MAX_BATCH_SIZE} items)'}, 400
+    
+    # "dedup": true (default threshold) or a Jaccard threshold in (0, 1]
+    dedup_threshold = data.get('dedup')
+    if dedup_threshold is True:
+        dedup_threshold = DEFAULT_THRESHOLD
+    elif dedup_threshold is False:
+        dedup_threshold = None
+    elif dedup_threshold is not None and (not isinstance(dedup_threshold, (int, float))
+                                          or not 0 < dedup_threshold <= 1):
+        return {'error': 'dedup must be true, false or a threshold in (0, 1]'}, 400
+    dedup = None
+    
+    # Accept either {"id": ..., "text": ...} objects or bare strings
+    results = []
+    valid_positions = []
+    clean_texts = []
+    for position, item in enumerate(items):
+        if isinstance(item, dict):
+            item_id = item.get('id', position)
+            text = item.get('text')
+        else:
+            item_id = position
+            text = item
+        
+        result = {'id': item_id, 'text': text}
+        if not isinstance(text, str) or text.strip() == '':
+            result.update({'error': 'Empty text provided', 'success': False})
+        else:
+            INPUT_LENGTH.observe(len(text))
+            valid_positions.append(position)
+            clean_texts.append(preprocess_text(text))
+        results.append(result)
+    
+    if clean_texts:
+        if dedup_threshold is not None:
+            # Score one text per group of near-duplicates and copy its result to the group
+            groups, representatives = group_duplicates(clean_texts, dedup_threshold)
+            representative_scores = score_clean_texts([clean_texts[i] for i in representatives])
+            scores = [representative_scores[group] for group in groups]
+            dedup = {'texts': len(clean_texts), 'scored': len(representatives), 'threshold': dedup_threshold}
+        else:
+            # One transform and one scoring pass for the cache misses
+            scores = score_clean_texts(clean_texts)
+        
+        for position, score in zip(valid_positions, scores):
+            results[position].update(score_fields(score), success=True)
+    
+    response = {
+        'results': results,
+        'count': len(results),
+        'success': True
+    }
+    if dedup is not None:
+        response['dedup'] = dedup
+    return response, 200
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """API endpoint to predict sentiment for a batch of texts"""
+    started = time.perf_counter()
+    IN_FLIGHT.inc()
+    try:
+        response, status = batch_predictions(request.get_json())
+        return jsonify(response), status
         
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
+    finally:
+        IN_FLIGHT.dec()
+        BATCH_REQUEST.observe(time.perf_counter() - started)
+
+def parse_stream_line(line, position, json_lines):
+    """(id, text, error) for one line of /predict/stream input"""
+    if line is OVERLONG:
+        return position, None, f'Line longer than {MAX_LINE_BYTES} bytes'
+    text = line.decode('utf-8', errors='replace')
+    if not json_lines:
+        return position, text, None
+    try:
+        item = json.loads(text)
+    except ValueError:
+        return position, None, 'Invalid JSON line'
+    if isinstance(item, dict):
+        return item.get('id', position), item.get('text'), None
+    return position, item, None
+
+def score_stream_batch(numbered_lines, json_lines):
+    """Result dicts for a batch of (line number, line) pairs, scoring the valid ones together"""
+    results = []
+    valid = []
+    clean_texts = []
+    for position, line in numbered_lines:
+        item_id, text, error = parse_stream_line(line, position, json_lines)
+        if error is None and (not isinstance(text, str) or text.strip() == ''):
+            error = 'Empty text provided'
+        if error is not None:
+            results.append({'id': item_id, 'error': error, 'success': False})
+            continue
+        INPUT_LENGTH.observe(len(text))
+        valid.append(len(results))
+        clean_texts.append(preprocess_text(text))
+        results.append({'id': item_id})
+    
+    if clean_texts:
+        for index, score in zip(valid, score_clean_texts(clean_texts)):
+            results[index].update(score_fields(score), success=True)
+    return results
+
+def encode_stream_results(results, event_stream):
+    if event_stream:
+        return ''.join(f'data: {json.dumps(result)}\n\n' for result in results)
+    return ''.join(json.dumps(result) + '\n' for result in results)
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Score a long-lived stream of newline-delimited texts, writing results as they are ready"""
+    if not STREAMS_ENABLED:
+        return jsonify({'error': '/predict/stream needs threaded workers (serve.py without --no-threads)',
+                        'success': False}), 503
+    # application/x-ndjson bodies hold {"id": ..., "text": ...} objects, anything else raw text lines
+    json_lines = request.mimetype == 'application/x-ndjson'
+    event_stream = 'text/event-stream' in request.headers.get('Accept', '')
+    reader = LineReader(request.stream, STREAM_BUFFER_LINES, MAX_LINE_BYTES)
+    
+    def generate():
+        OPEN_STREAMS.inc()
+        reader.start()
+        position = 0
+        try:
+            for lines in reader.batches(STREAM_BATCH_SIZE, STREAM_MAX_WAIT):
+                # Blank lines (e.g. keep-alives) produce no result but keep line numbering
+                numbered = [(i, line) for i, line in enumerate(lines, position)
+                            if line is OVERLONG or line.strip()]
+                STREAM_LINES.inc(len(lines))
+                position += len(lines)
+                results = score_stream_batch(numbered, json_lines)
+                if not results:
+                    continue
+                yield encode_stream_results(results, event_stream)
+            if reader.error is not None:
+                yield encode_stream_results([{'error': f'Reading the stream failed: {reader.error}',
+                                              'success': False}], event_stream)
+        finally:
+            # Runs when the body ends or the client disconnects
+            reader.close()
+            OPEN_STREAMS.dec()
+    
+    mimetype = 'text/event-stream' if event_stream else 'application/x-ndjson'
+    return app.response_class(generate(), mimetype=mimetype)
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
+        'model_loaded': engine is not None,
+        'model_version': engine.model_id if engine is not None else None,
+        'prediction_mode': PREDICTION_MODE,
+        'prediction_cache': prediction_cache.stats(),
         'message': 'Sentiment Analysis API is running'
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint"""
+    return app.response_class(metrics_registry.render(), content_type=CONTENT_TYPE)
+
 @app.route('/', methods=['GET'])
 def home():
     """Home endpoint"""
@@ -94,7 +375,10 @@ def home():
         'message': 'Sentiment Analysis API',
         'endpoints': {
             '/predict': 'POST - Predict sentiment for text',
-            '/health': 'GET - Health check'
+            '/predict/batch': 'POST - Predict sentiment for a list of texts',
+            '/predict/stream': 'POST - Stream newline-delimited texts, read results as they are scored',
+            '/health': 'GET - Health check',
+            '/metrics': 'GET - Prometheus metrics'
         }
     })
 
@@ -104,6 +388,6 @@ if __name__ == '__main__':
     # Load models
     if load_models():
         print("Starting Flask server...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        app.run(debug=True, host='0.0.0.0', port=5000, request_handler=StreamingRequestHandler)
     else:
         print("Failed to load models. Please train the model first.")
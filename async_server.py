@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Asyncio (ASGI) serving mode with request micro-batching.
+
+Concurrent /predict requests are queued and coalesced into micro-batches,
+bounded by a maximum batch size and a maximum wait. Each micro-batch is
+scored with one transform and one decision pass (through the same cache
+and engine as app.py), then results are handed back to the waiting requests.
+
+Usage:
+    python async_server.py --max-batch-size 64 --max-wait-ms 2
+    uvicorn async_server:application --port 5000
+
+Settings can also come from MICROBATCH_MAX_SIZE / MICROBATCH_MAX_WAIT_MS.
+GET /stats reports the batch-size histogram.
+
+/predict/batch (same payload as app.py, scored on a worker thread), /health
+and /metrics are served too. /predict/stream is not: it needs the
+line-by-line reader behind app.py and serve.py, and gets a 404 saying so.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as flask_app
+from metrics import CONTENT_TYPE
+from text_preprocessing import preprocess_text
+
+# Upper edges of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+
+class MicroBatcher:
+    """Queue single predictions and score them together in small batches"""
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self._task = None
+        # One scoring thread: the next batch fills up while this one is scored
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='microbatch')
+        self.histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS + ['+Inf']}
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        if self._task is None:
+            self.queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, clean_text):
+        """Queue one cleaned text and wait for its score_clean_texts result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((clean_text, future))
+        return await future
+
+    def _record(self, batch_size):
+        self.batches += 1
+        self.requests += batch_size
+        for bucket in BATCH_SIZE_BUCKETS:
+            if batch_size <= bucket:
+                self.histogram[bucket] += 1
+                return
+        self.histogram['+Inf'] += 1
+
+    async def _collect(self):
+        """Wait for one request, then gather more until the batch is full or max_wait passes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self._record(len(batch))
+            texts = [clean_text for clean_text, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.score_fn, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': round(self.requests / self.batches, 3) if self.batches else 0.0,
+            'batch_size_histogram': {f"le_{bucket}": count for bucket, count in self.histogram.items()}
+        }
+
+
+batcher = MicroBatcher(
+    flask_app.score_clean_texts,
+    max_batch_size=int(os.environ.get('MICROBATCH_MAX_SIZE', 64)),
+    max_wait_ms=float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2.0))
+)
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_body(send, body, content_type, status=200):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('ascii')),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, payload, status=200):
+    await send_body(send, json.dumps(payload).encode('utf-8'), 'application/json', status)
+
+
+async def read_json(receive, send):
+    """(True, parsed body), or (False, None) after answering invalid JSON with a 400"""
+    try:
+        return True, json.loads(await read_body(receive) or b'null')
+    except json.JSONDecodeError:
+        await send_json(send, {'error': 'Invalid JSON data', 'success': False}, 400)
+        return False, None
+
+
+async def predict(receive, send):
+    """Same request and response format as app.py's /predict"""
+    started = time.perf_counter()
+    flask_app.IN_FLIGHT.inc()
+    try:
+        await predict_text(receive, send)
+    finally:
+        flask_app.IN_FLIGHT.dec()
+        flask_app.PREDICT_REQUEST.observe(time.perf_counter() - started)
+
+
+async def predict_text(receive, send):
+    ok, data = await read_json(receive, send)
+    if not ok:
+        return
+
+    if not isinstance(data, dict) or 'text' not in data:
+        await send_json(send, {'error': 'No text provided'}, 400)
+        return
+
+    text = data['text']
+    if not isinstance(text, str) or text.strip() == '':
+        await send_json(send, {'error': 'Empty text provided'}, 400)
+        return
+
+    flask_app.INPUT_LENGTH.observe(len(text))
+    try:
+        score = await batcher.submit(preprocess_text(text))
+    except Exception as e:
+        await send_json(send, {'error': str(e), 'success': False}, 500)
+        return
+
+    await send_json(send, {
+        'text': text,
+        **flask_app.score_fields(score),
+        'success': True
+    })
+
+
+async def predict_batch(receive, send):
+    """Same request and response format as app.py's /predict/batch, scored off the event loop"""
+    started = time.perf_counter()
+    flask_app.IN_FLIGHT.inc()
+    try:
+        ok, data = await read_json(receive, send)
+        if not ok:
+            return
+        try:
+            payload, status = await asyncio.get_running_loop().run_in_executor(
+                None, flask_app.batch_predictions, data)
+        except Exception as e:
+            payload, status = {'error': str(e), 'success': False}, 500
+        await send_json(send, payload, status)
+    finally:
+        flask_app.IN_FLIGHT.dec()
+        flask_app.BATCH_REQUEST.observe(time.perf_counter() - started)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if flask_app.engine is None and not flask_app.load_models():
+                await send({'type': 'lifespan.startup.failed', 'message': 'Failed to load models'})
+                return
+            batcher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await batcher.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'websocket':
+        # No websocket routes: closing before accepting rejects the handshake (403)
+        await receive()
+        await send({'type': 'websocket.close', 'code': 1000})
+        return
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'], scope['method']
+    if path == '/predict' and method == 'POST':
+        await predict(receive, send)
+    elif path == '/predict/batch' and method == 'POST':
+        await predict_batch(receive, send)
+    elif path == '/predict/stream':
+        await send_json(send, {'error': '/predict/stream is not available in the async server; '
+                                        'use app.py or serve.py', 'success': False}, 404)
+    elif path == '/metrics' and method == 'GET':
+        await send_body(send, flask_app.metrics_registry.render().encode('utf-8'), CONTENT_TYPE)
+    elif path == '/stats' and method == 'GET':
+        await send_json(send, batcher.stats())
+    elif path == '/health' and method == 'GET':
+        await send_json(send, {
+            'status': 'healthy',
+            'model_loaded': flask_app.engine is not None,
+            'prediction_cache': flask_app.prediction_cache.stats(),
+            'microbatching': batcher.stats(),
+            'message': 'Sentiment Analysis API is running'
+        })
+    else:
+        await send_json(send, {'error': 'Not found'}, 404)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Async sentiment API with request micro-batching")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--max-batch-size', type=int, default=batcher.max_batch_size,
+                        help="Most requests scored together (default: %(default)s)")
+    parser.add_argument('--max-wait-ms', type=float, default=batcher.max_wait * 1000.0,
+                        help="Longest a request waits for a batch to fill (default: %(default)s)")
+    args = parser.parse_args()
+
+    batcher.max_batch_size = args.max_batch_size
+    batcher.max_wait = args.max_wait_ms / 1000.0
+
+    print("Starting async Sentiment Analysis API...")
+    uvicorn.run(application, host=args.host, port=args.port, log_level='warning')
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Per-stage microbenchmarks for the sentiment pipeline.
+
+Times each stage separately on rows from test.csv (cycled up to the largest
+batch size) and writes the results to a JSON baseline. In compare mode the
+run fails when any stage is slower than the baseline by more than the given
+percentage.
+
+Usage:
+    python benchmark_pipeline.py --output bench_baseline.json
+    python benchmark_pipeline.py --compare bench_baseline.json --threshold 15
+    python benchmark_pipeline.py --stages preprocess transform --sizes 1 100
+"""
+
+import argparse
+import csv
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000]
+# Stop repeating a measurement once this much time has been spent on it
+TIME_BUDGET = 1.0
+MAX_REPEATS = 50
+
+
+def load_rows(count, path='test.csv'):
+    """First texts of test.csv, repeated as needed to reach count rows"""
+    with open(path, encoding='latin-1', newline='') as f:
+        texts = [row['text'] for row in csv.DictReader(f) if row['text'].strip()]
+    return [texts[i % len(texts)] for i in range(count)]
+
+
+class BenchmarkHandler:
+    """Drives api/predict.py's handler without a socket"""
+
+    def __init__(self):
+        from api.predict import handler
+
+        class InMemoryHandler(handler):
+            def __init__(self, body):
+                self.rfile = io.BytesIO(body)
+                self.wfile = io.BytesIO()
+                self.headers = {'Content-Length': str(len(body))}
+                self.request_version = 'HTTP/1.1'
+                self.requestline = 'POST /api/predict HTTP/1.1'
+                self.command = 'POST'
+                self.client_address = ('127.0.0.1', 0)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.handler_class = InMemoryHandler
+
+    def post(self, text):
+        request = self.handler_class(json.dumps({'text': text}).encode('utf-8'))
+        request.do_POST()
+        return request.wfile.getvalue()
+
+
+def build_stages(stage_names):
+    """Return {name: fn(raw_texts, clean_texts, matrix) -> None} for the requested stages"""
+    from text_preprocessing import normalize_many
+
+    stages = {'preprocess': lambda raw, clean, X: normalize_many(raw)}
+
+    needs_model = {'transform', 'predict', 'decision_function', 'engine_score',
+                   'flask_predict', 'flask_predict_batch'}
+    if needs_model & set(stage_names):
+        import app as flask_app
+        if flask_app.engine is None and not flask_app.load_models():
+            raise RuntimeError("Could not load the model")
+        # Measure the real scoring path, not cache hits
+        flask_app.prediction_cache.maxsize = 0
+        engine = flask_app.engine
+
+        stages['transform'] = lambda raw, clean, X: engine.vectorizer.transform(clean)
+        stages['engine_score'] = lambda raw, clean, X: engine.predict_matrix(X)
+
+        try:
+            import joblib
+            model = joblib.load('svm_sentiment_model.pkl')
+            stages['predict'] = lambda raw, clean, X: model.predict(X)
+            stages['decision_function'] = lambda raw, clean, X: model.decision_function(X)
+        except (ImportError, OSError):
+            pass
+
+        client = flask_app.app.test_client()
+
+        def flask_predict(raw, clean, X):
+            for text in raw:
+                client.post('/predict', json={'text': text})
+
+        def flask_predict_batch(raw, clean, X):
+            for start in range(0, len(raw), flask_app.MAX_BATCH_SIZE):
+                items = raw[start:start + flask_app.MAX_BATCH_SIZE]
+                client.post('/predict/batch', json={'items': items})
+
+        stages['flask_predict'] = flask_predict
+        stages['flask_predict_batch'] = flask_predict_batch
+
+    if {'lexicon', 'handler_predict'} & set(stage_names):
+        from sentiment_lexicon import analyze_sentiment_simple
+        stages['lexicon'] = lambda raw, clean, X: [analyze_sentiment_simple(text) for text in clean]
+
+        benchmark_handler = BenchmarkHandler()
+
+        def handler_predict(raw, clean, X):
+            for text in raw:
+                benchmark_handler.post(text)
+
+        stages['handler_predict'] = handler_predict
+
+    def json_encode(raw, clean, X):
+        for text in raw:
+            json.dumps({'text': text, 'sentiment': 'neutral', 'confidence': 2.2, 'success': True})
+
+    stages['json_encode'] = json_encode
+
+    missing = [name for name in stage_names if name not in stages]
+    if missing:
+        print(f"Skipping unavailable stages: {', '.join(missing)}", file=sys.stderr)
+    return {name: stages[name] for name in stage_names if name in stages}
+
+
+def time_stage(fn, raw, clean, X):
+    """Repeat fn until the time budget is spent; returns per-run timings in seconds"""
+    timings = []
+    spent = 0.0
+    while len(timings) < MAX_REPEATS and (spent < TIME_BUDGET or len(timings) < 3):
+        start = time.perf_counter()
+        fn(raw, clean, X)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+    return timings
+
+
+def run_benchmarks(stage_names, sizes):
+    """Time every stage at every batch size"""
+    from text_preprocessing import normalize_many
+
+    stages = build_stages(stage_names)
+    rows = load_rows(max(sizes))
+    vectorizer = None
+    if {'transform', 'predict', 'decision_function', 'engine_score'} & set(stages):
+        import app as flask_app
+        vectorizer = flask_app.engine.vectorizer
+
+    results = {}
+    for size in sizes:
+        raw = rows[:size]
+        clean = normalize_many(raw)
+        X = vectorizer.transform(clean) if vectorizer is not None else None
+
+        for name, fn in stages.items():
+            timings = time_stage(fn, raw, clean, X)
+            median = statistics.median(timings)
+            results.setdefault(name, {})[str(size)] = {
+                'median_s': median,
+                'min_s': min(timings),
+                'per_item_us': median / size * 1e6,
+                'repeats': len(timings)
+            }
+            print(f"{name:>20} n={size:<6} median {median * 1e3:10.3f} ms "
+                  f"({median / size * 1e6:9.2f} µs/item, {len(timings)} runs)")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (stage, size, old, new, change%) that regressed beyond threshold"""
+    regressions = []
+    for stage, sizes in current.items():
+        for size, result in sizes.items():
+            old = baseline.get(stage, {}).get(size)
+            if old is None:
+                continue
+            change = (result['median_s'] - old['median_s']) / old['median_s'] * 100.0
+            marker = 'REGRESSION' if change > threshold else ''
+            print(f"{stage:>20} n={size:<6} {old['median_s'] * 1e3:10.3f} ms -> "
+                  f"{result['median_s'] * 1e3:10.3f} ms ({change:+6.1f}%) {marker}")
+            if change > threshold:
+                regressions.append((stage, size, old['median_s'], result['median_s'], change))
+    return regressions
+
+
+def main():
+    all_stages = ['preprocess', 'transform', 'predict', 'decision_function', 'engine_score',
+                  'lexicon', 'json_encode', 'flask_predict', 'flask_predict_batch', 'handler_predict']
+
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the sentiment pipeline")
+    parser.add_argument('--stages', nargs='+', default=all_stages, choices=all_stages)
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help="Batch sizes (default: %(default)s)")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Allowed slowdown in percent before failing (default: %(default)s)")
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking sentiment pipeline stages...")
+    results = run_benchmarks(args.stages, sorted(args.sizes))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sorted(args.sizes)
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Comparing against {args.compare} (threshold {args.threshold:.1f}%)")
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} stage(s) regressed beyond {args.threshold:.1f}%")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk sentiment scoring for large tweet dumps.
+
+Reads CSV (test.csv or Sentiment140 layout) or JSONL input in fixed-size
+chunks, scores the chunks on a process pool with the model loaded once per
+worker, and streams results to CSV or JSONL in input order. Only a bounded
+number of chunks are in flight at any time, so memory does not grow with the
+input size. Progress is checkpointed after every written chunk so an
+interrupted run can be resumed with --resume. With --dedup, exact and
+near-duplicate texts within a chunk are scored once (see dedup.py).
+
+Usage:
+    python bulk_score.py test.csv scored.csv
+    python bulk_score.py testdata.manual.2009.06.14.csv scored.jsonl --workers 4
+    python bulk_score.py huge.jsonl scored.jsonl --resume
+    python bulk_score.py retweets.csv scored.csv --dedup --dedup-threshold 0.8 --dedup-check 100
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dedup import DEFAULT_THRESHOLD, check_agreement, dedup_predict, near_duplicate_members
+from text_preprocessing import preprocess_text
+
+# Sentiment140 files have no header: polarity, id, date, query, user, text
+SENTIMENT140_ID_COLUMN = 1
+SENTIMENT140_TEXT_COLUMN = 5
+
+# Model loaded once in each worker process (or in-process with --workers 1)
+_engine = None
+
+
+def detect_format(path):
+    """Guess the input schema from the file extension and first line"""
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        return 'jsonl'
+    with open(path, encoding='latin-1', newline='') as f:
+        header = next(csv.reader(f), [])
+    return 'tweets' if 'text' in header else 'sentiment140'
+
+
+def iter_records(path, input_format):
+    """Yield (id, text) pairs from the input without loading it all"""
+    if input_format == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            for row_number, line in enumerate(f):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield record.get('id', row_number), record.get('text')
+        return
+
+    with open(path, encoding='latin-1', newline='') as f:
+        reader = csv.reader(f)
+        if input_format == 'tweets':
+            header = next(reader)
+            text_column = header.index('text')
+            id_column = header.index('textID') if 'textID' in header else None
+            for row_number, row in enumerate(reader):
+                text = row[text_column] if len(row) > text_column else None
+                yield (row[id_column] if id_column is not None else row_number), text
+        else:
+            for row in reader:
+                if len(row) <= SENTIMENT140_TEXT_COLUMN:
+                    continue
+                yield row[SENTIMENT140_ID_COLUMN], row[SENTIMENT140_TEXT_COLUMN]
+
+
+def iter_chunks(records, chunk_size):
+    """Group records into lists of at most chunk_size"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def init_worker():
+    """Load the model once per worker process"""
+    global _engine
+    from inference_engine import load_engine
+    _engine = load_engine()
+
+
+def score_chunk(chunk, dedup_threshold=None, dedup_check=0):
+    """Score one chunk, returning result dicts in the same order and dedup counts"""
+    results = []
+    positions = []
+    clean_texts = []
+    for record_id, text in chunk:
+        if not isinstance(text, str) or text.strip() == '':
+            results.append({'id': record_id, 'sentiment': '', 'confidence': '', 'error': 'Empty text provided'})
+            continue
+        positions.append(len(results))
+        clean_texts.append(preprocess_text(text))
+        results.append({'id': record_id})
+
+    stats = {'texts': len(clean_texts), 'scored': len(clean_texts), 'agreed': 0, 'checked': 0}
+    if clean_texts:
+        if dedup_threshold is not None:
+            sentiments, confidences, groups, representatives = dedup_predict(
+                _engine, clean_texts, dedup_threshold)
+            stats['scored'] = len(representatives)
+            if dedup_check:
+                members = near_duplicate_members(clean_texts, groups, representatives)
+                stats['agreed'], stats['checked'] = check_agreement(
+                    _engine, clean_texts, sentiments, members, dedup_check)
+        else:
+            sentiments, confidences = _engine.predict(clean_texts)
+        for position, sentiment, confidence in zip(positions, sentiments, confidences):
+            results[position].update({
+                'sentiment': str(sentiment),
+                'confidence': round(float(confidence), 6),
+                'error': ''
+            })
+    return results, stats
+
+
+class ResultWriter:
+    """Append results to CSV or JSONL and report the committed byte offset"""
+
+    CSV_FIELDS = ['id', 'sentiment', 'confidence', 'error']
+
+    def __init__(self, path, output_format, resume_offset=None):
+        self.output_format = output_format
+        if resume_offset is not None:
+            self.file = open(path, 'r+', encoding='utf-8', newline='')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline='')
+            if output_format == 'csv':
+                csv.writer(self.file).writerow(self.CSV_FIELDS)
+        self.csv_writer = csv.DictWriter(self.file, fieldnames=self.CSV_FIELDS)
+
+    def write(self, results):
+        if self.output_format == 'csv':
+            self.csv_writer.writerows(results)
+        else:
+            self.file.writelines(json.dumps(result) + '\n' for result in results)
+
+    def commit(self):
+        """Flush to disk and return the offset a resume should truncate to"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def checkpoint_path(output_path):
+    return f"{output_path}.checkpoint"
+
+
+def load_checkpoint(output_path, input_path, chunk_size):
+    """Read the checkpoint for a resumed run, checking it matches this run"""
+    path = checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint['input'] != os.path.abspath(input_path) or checkpoint['chunk_size'] != chunk_size:
+        raise ValueError(f"{path} was written for a different input or chunk size")
+    return checkpoint
+
+
+def save_checkpoint(output_path, checkpoint):
+    """Atomically record the last chunk whose results are on disk"""
+    path = checkpoint_path(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def bulk_score(input_path, output_path, input_format='auto', output_format=None,
+               chunk_size=10000, workers=None, resume=False, dedup_threshold=None, dedup_check=0):
+    """Score input_path into output_path, returning the number of rows scored"""
+    if input_format == 'auto':
+        input_format = detect_format(input_path)
+    if output_format is None:
+        output_format = 'jsonl' if output_path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    workers = workers or os.cpu_count() or 1
+
+    checkpoint = load_checkpoint(output_path, input_path, chunk_size) if resume else None
+    if checkpoint is None:
+        checkpoint = {
+            'input': os.path.abspath(input_path),
+            'chunk_size': chunk_size,
+            'chunks_done': 0,
+            'rows_done': 0,
+            'output_bytes': None
+        }
+    else:
+        print(f"Resuming after chunk {checkpoint['chunks_done']} ({checkpoint['rows_done']:,} rows)")
+    # Dedup counts carry over a resume; older checkpoints have none
+    checkpoint.setdefault('dedup', {'texts': 0, 'scored': 0, 'agreed': 0, 'checked': 0})
+
+    chunks = iter_chunks(iter_records(input_path, input_format), chunk_size)
+    # Skip chunks already committed by a previous run
+    for _ in range(checkpoint['chunks_done']):
+        next(chunks, None)
+
+    writer = ResultWriter(output_path, output_format, checkpoint['output_bytes'])
+    start_time = time.perf_counter()
+    rows_scored = 0
+
+    def commit(scored_chunk):
+        nonlocal rows_scored
+        results, stats = scored_chunk
+        writer.write(results)
+        rows_scored += len(results)
+        checkpoint['chunks_done'] += 1
+        checkpoint['rows_done'] += len(results)
+        for key, value in stats.items():
+            checkpoint['dedup'][key] += value
+        checkpoint['output_bytes'] = writer.commit()
+        save_checkpoint(output_path, checkpoint)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Chunk {checkpoint['chunks_done']}: {checkpoint['rows_done']:,} rows "
+              f"({rows_scored / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    try:
+        if workers == 1:
+            init_worker()
+            for chunk in chunks:
+                commit(score_chunk(chunk, dedup_threshold, dedup_check))
+        else:
+            # At most two chunks per worker in flight keeps memory bounded
+            max_in_flight = workers * 2
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk, dedup_threshold, dedup_check))
+                    if len(pending) >= max_in_flight:
+                        commit(pending.popleft().result())
+                while pending:
+                    commit(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    if os.path.exists(checkpoint_path(output_path)):
+        os.remove(checkpoint_path(output_path))
+    print(f"✅ Scored {rows_scored:,} rows in {elapsed:.1f}s "
+          f"({rows_scored / max(elapsed, 1e-9):,.0f} rows/sec) -> {output_path}")
+    if dedup_threshold is not None:
+        dedup = checkpoint['dedup']
+        print(f"🧬 Dedup: {dedup['scored']:,} of {dedup['texts']:,} texts scored "
+              f"({1 - dedup['scored'] / max(dedup['texts'], 1):.1%} collapsed at threshold {dedup_threshold})")
+        if dedup['checked']:
+            print(f"🔍 Label agreement on {dedup['checked']:,} near-duplicates scored on their own: "
+                  f"{dedup['agreed'] / dedup['checked']:.1%}")
+    return rows_scored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-score a CSV or JSONL corpus")
+    parser.add_argument('input', help="Input file (test.csv layout, Sentiment140 CSV or JSONL)")
+    parser.add_argument('output', help="Output file (.csv or .jsonl)")
+    parser.add_argument('--format', dest='input_format', default='auto',
+                        choices=['auto', 'tweets', 'sentiment140', 'jsonl'],
+                        help="Input schema (default: detect)")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'],
+                        help="Output format (default: from the output extension)")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="Rows per chunk (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue from the last committed chunk")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Score exact and near-duplicate texts once per chunk")
+    parser.add_argument('--dedup-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Word-bigram Jaccard similarity for near-duplicates; 1.0 means exact "
+                             "duplicates only (default: %(default)s)")
+    parser.add_argument('--dedup-check', type=int, default=0,
+                        help="Near-duplicates per chunk also scored on their own to check label agreement")
+    args = parser.parse_args()
+
+    bulk_score(args.input, args.output, args.input_format, args.output_format,
+               args.chunk_size, args.workers, args.resume,
+               args.dedup_threshold if args.dedup else None, args.dedup_check)
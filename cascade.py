@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Cascaded inference: the keyword lexicon first, the SVM only when it is unsure.
+
+The lexicon scorer in sentiment_lexicon.py costs a few microseconds per text.
+When its confidence and its sentiment-word density (lexicon words / words)
+both clear calibrated thresholds its answer is returned as is; the remaining
+texts are vectorised and scored by the SVM together in one batch.
+
+The two paths score confidence differently (the lexicon's 0.5-0.98 heuristic,
+the SVM's decision value), so calibration also fits an isotonic map per path
+from raw confidence to the accuracy observed on the texts that path answers.
+Cascade results report that estimate, a probability that the label is right.
+
+Thresholds and maps are picked on a labelled CSV for a target accuracy loss
+relative to the SVM alone and saved next to the model:
+
+    python cascade.py test.csv --max-accuracy-loss 0.01
+
+app.py uses them when started with PREDICTION_MODE=cascade.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from sentiment_lexicon import analyze_sentiment_simple
+
+DEFAULT_THRESHOLDS_PATH = 'cascade_thresholds.json'
+# Never take the cheap path; used until a calibration has been saved
+NEVER = {'min_confidence': float('inf'), 'min_density': float('inf')}
+
+
+def lexicon_scores(clean_texts):
+    """(lower-case sentiments, confidences, sentiment-word densities) from the lexicon"""
+    sentiments = []
+    confidences = np.empty(len(clean_texts))
+    densities = np.empty(len(clean_texts))
+    for i, clean_text in enumerate(clean_texts):
+        result = analyze_sentiment_simple(clean_text)
+        words = result['word_analysis']
+        total_words = words['total_words']
+        sentiments.append(result['sentiment'].lower())
+        confidences[i] = result['confidence']
+        densities[i] = (words['positive_words'] + words['negative_words'] + words['neutral_words']) \
+            / total_words if total_words else 0.0
+    return np.array(sentiments, dtype=object), confidences, densities
+
+
+def cheap_path_mask(confidences, densities, thresholds):
+    """Texts whose lexicon answer is trusted"""
+    return (confidences >= thresholds['min_confidence']) & (densities >= thresholds['min_density'])
+
+
+def fit_confidence_map(confidences, correct):
+    """Isotonic map from one path's raw confidences to its accuracy, as interpolation points"""
+    from sklearn.isotonic import IsotonicRegression
+
+    if len(confidences) == 0:
+        return None
+    isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip').fit(confidences, correct)
+    return {'x': isotonic.X_thresholds_.tolist(), 'y': isotonic.y_thresholds_.tolist()}
+
+
+def map_confidences(confidences, confidence_map):
+    """Estimated accuracy for raw confidences; unchanged when there is no map"""
+    if confidence_map is None:
+        return np.asarray(confidences, dtype=np.float64)
+    return np.interp(confidences, confidence_map['x'], confidence_map['y'])
+
+
+def cascade_predict(engine, clean_texts, thresholds):
+    """Return (sentiments, confidences, served_by_lexicon) with one SVM batch for the rest
+
+    Confidences go through the thresholds' confidence maps when there are
+    any; NEVER has none, so every text keeps the SVM's own confidence.
+    """
+    confidence_maps = thresholds.get('confidence_maps', {})
+    sentiments, confidences, densities = lexicon_scores(clean_texts)
+    cheap = cheap_path_mask(confidences, densities, thresholds)
+    sentiments = [str(sentiment) for sentiment in sentiments]
+    confidences = map_confidences(confidences, confidence_maps.get('lexicon')).tolist()
+
+    escalated = np.flatnonzero(~cheap)
+    if len(escalated):
+        svm_sentiments, svm_confidences = engine.predict([clean_texts[i] for i in escalated])
+        svm_confidences = map_confidences(svm_confidences, confidence_maps.get('svm'))
+        for i, sentiment, confidence in zip(escalated, svm_sentiments, svm_confidences):
+            sentiments[i] = str(sentiment)
+            confidences[i] = float(confidence)
+    return sentiments, confidences, cheap
+
+
+def calibrate(lexicon_sentiments, confidences, densities, svm_sentiments, y_true, max_accuracy_loss):
+    """Thresholds serving the most traffic from the lexicon within max_accuracy_loss of the SVM"""
+    lexicon_correct = lexicon_sentiments == y_true
+    svm_correct = svm_sentiments == y_true
+    svm_accuracy = float(svm_correct.mean())
+
+    best = dict(NEVER, cheap_fraction=0.0, accuracy=svm_accuracy, accuracy_loss=0.0)
+    for min_density in np.unique(np.round(densities, 2)):
+        dense_enough = densities >= min_density
+        for min_confidence in np.unique(confidences[dense_enough]):
+            cheap = dense_enough & (confidences >= min_confidence)
+            accuracy = float(np.where(cheap, lexicon_correct, svm_correct).mean())
+            loss = svm_accuracy - accuracy
+            fraction = float(cheap.mean())
+            if loss <= max_accuracy_loss and (fraction, -loss) > (best['cheap_fraction'], -best['accuracy_loss']):
+                best = {
+                    'min_confidence': float(min_confidence),
+                    'min_density': float(min_density),
+                    'cheap_fraction': fraction,
+                    'accuracy': accuracy,
+                    'accuracy_loss': loss
+                }
+    best['svm_accuracy'] = svm_accuracy
+    best['max_accuracy_loss'] = max_accuracy_loss
+    return best
+
+
+def load_thresholds(path=DEFAULT_THRESHOLDS_PATH):
+    """Saved calibration, or thresholds that escalate everything when there is none"""
+    if not os.path.exists(path):
+        return dict(NEVER)
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_thresholds(thresholds, path=DEFAULT_THRESHOLDS_PATH):
+    with open(path, 'w') as f:
+        json.dump(thresholds, f, indent=2)
+
+
+def main():
+    import pandas as pd
+
+    from inference_engine import load_engine
+    from text_preprocessing import normalize_many
+
+    parser = argparse.ArgumentParser(description="Calibrate the lexicon-then-SVM cascade")
+    parser.add_argument('data', nargs='?', default='test.csv',
+                        help="Labelled CSV with text and sentiment columns (default: %(default)s)")
+    parser.add_argument('--max-accuracy-loss', type=float, default=0.01,
+                        help="Accuracy the cascade may lose against the SVM alone (default: %(default)s)")
+    parser.add_argument('--output', default=DEFAULT_THRESHOLDS_PATH,
+                        help="Where the thresholds are saved (default: %(default)s)")
+    parser.add_argument('--artifact', default=None,
+                        help="Model artifact directory (default: MODEL_ARTIFACT or the pickles)")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, encoding='latin-1', usecols=['text', 'sentiment']).dropna()
+    clean_texts = normalize_many(data['text'])
+    y_true = data['sentiment'].to_numpy(dtype=object)
+    engine = load_engine(args.artifact)
+
+    started = time.perf_counter()
+    lexicon_sentiments, confidences, densities = lexicon_scores(clean_texts)
+    lexicon_us = (time.perf_counter() - started) / len(clean_texts) * 1e6
+    started = time.perf_counter()
+    svm_sentiments, svm_confidences = engine.predict(clean_texts)
+    svm_sentiments = svm_sentiments.astype(object)
+    svm_us = (time.perf_counter() - started) / len(clean_texts) * 1e6
+
+    print(f"🔎 Calibrating on {len(clean_texts):,} rows from {args.data}...")
+    result = calibrate(lexicon_sentiments, confidences, densities, svm_sentiments, y_true,
+                       args.max_accuracy_loss)
+    cheap = cheap_path_mask(confidences, densities, result)
+    result['confidence_maps'] = {
+        'lexicon': fit_confidence_map(confidences[cheap], lexicon_sentiments[cheap] == y_true[cheap]),
+        'svm': fit_confidence_map(svm_confidences[~cheap], svm_sentiments[~cheap] == y_true[~cheap])
+    }
+    result['model_id'] = engine.model_id
+    save_thresholds(result, args.output)
+
+    print(f"📊 SVM alone: {result['svm_accuracy']:.2%}, lexicon alone: "
+          f"{float((lexicon_sentiments == y_true).mean()):.2%}")
+    print(f"🎚️  min_confidence={result['min_confidence']}, min_density={result['min_density']}")
+    print(f"⚡ Served by the lexicon: {result['cheap_fraction']:.1%} of texts")
+    print(f"🎯 Cascade accuracy: {result['accuracy']:.2%} "
+          f"(loss {result['accuracy_loss']:+.2%}, allowed {args.max_accuracy_loss:.2%})")
+    for path, confidence_map in result['confidence_maps'].items():
+        if confidence_map is not None:
+            print(f"📐 {path} confidence maps to accuracy "
+                  f"{confidence_map['y'][0]:.2f}-{confidence_map['y'][-1]:.2f}")
+    print(f"⏱️  Lexicon {lexicon_us:.1f} µs/text, SVM {svm_us:.1f} µs/text (batched)")
+    print(f"💾 Thresholds saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Exact and near-duplicate grouping of cleaned texts for bulk scoring.
+
+Retweets and copies that differ only in a handle or a word are scored once.
+Identical cleaned texts are grouped first. Each distinct text then gets a
+MinHash signature over its word bigrams, and LSH banding on the signatures
+proposes candidate pairs. A pair joins the same group (union-find) when the
+exact Jaccard similarity of its bigram sets is at least the threshold. Each
+group's first text is scored and its result is copied to the rest.
+
+Grouping is transitive, so a chain of near-duplicates can join texts less
+similar than the threshold. Checking label agreement on a sample shows
+whether a threshold is safe:
+
+    python dedup.py test.csv --thresholds 0.6 0.7 0.8 0.9
+"""
+
+import argparse
+from itertools import chain
+
+import numpy as np
+from pandas.util import hash_array
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+# Fixed seed so groups are the same from run to run and process to process
+_SEED = 1
+
+
+def shingles(clean_text):
+    """Word bigrams of a cleaned text; a single word is its own shingle"""
+    words = clean_text.split()
+    if len(words) < 2:
+        return words
+    return [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+
+def jaccard(first, second):
+    """Jaccard similarity of two shingle lists taken as sets"""
+    first, second = set(first), set(second)
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def lsh_bands(threshold, num_perm):
+    """(bands, rows): the most selective banding still proposing 95% of pairs at the threshold"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= 0.95:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift permutations of 64-bit shingle hashes"""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=_SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # Odd multipliers; products wrap modulo 2**64 and the top 32 bits are kept
+        self.multipliers = rng.randint(0, 2 ** 62, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.increments = rng.randint(0, 2 ** 62, num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_lists):
+        """uint32 matrix with one signature row per shingle list"""
+        signatures = np.full((len(shingle_lists), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        lengths = np.array([len(shingle_list) for shingle_list in shingle_lists], dtype=np.int64)
+        present = np.flatnonzero(lengths)
+        if len(present) == 0:
+            return signatures
+        # pandas hashes object arrays in C with a fixed key, so hashes are stable across runs
+        hashes = hash_array(np.array(list(chain.from_iterable(shingle_lists)), dtype=object),
+                            categorize=False)
+        # One row per permutation keeps the reduction over contiguous memory
+        permuted = np.multiply(self.multipliers[:, None], hashes)
+        permuted += self.increments[:, None]
+        permuted >>= np.uint64(32)
+        permuted = permuted.astype(np.uint32)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[present] = np.minimum.reduceat(permuted, starts[present], axis=1).T
+        return signatures
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1; the smallest index is each set's root"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+
+def group_duplicates(clean_texts, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM):
+    """Group index per text and the index of each group's representative (its first text)"""
+    # Exact duplicates share one entry
+    distinct = {}
+    distinct_index = np.array([distinct.setdefault(text, len(distinct)) for text in clean_texts],
+                              dtype=np.int64)
+    distinct_texts = list(distinct)
+    sets = UnionFind(len(distinct_texts))
+
+    if threshold < 1.0 and len(distinct_texts) > 1:
+        shingle_lists = [shingles(text) for text in distinct_texts]
+        hasher = MinHasher(num_perm)
+        signatures = hasher.signatures(shingle_lists)
+        has_shingles = np.array([len(shingle_list) > 0 for shingle_list in shingle_lists])
+        bands, rows = lsh_bands(threshold, num_perm)
+        for band in range(bands):
+            # One 64-bit key per row of the band; only rows sharing a key reach Python
+            with np.errstate(over='ignore'):
+                keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+                        * hasher.multipliers[:rows]).sum(axis=1)
+            # Empty texts have no shingles and only match each other exactly
+            candidates = np.flatnonzero(has_shingles)
+            candidates = candidates[np.argsort(keys[candidates], kind='stable')]
+            sorted_keys = keys[candidates]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(candidates)]
+            shared = ends - starts > 1
+            candidates = candidates.tolist()
+            for start, end in zip(starts[shared].tolist(), ends[shared].tolist()):
+                bucket = candidates[start:end]
+                for position in range(1, len(bucket)):
+                    i = bucket[position]
+                    for j in bucket[:position]:
+                        if sets.find(i) == sets.find(j):
+                            break
+                        if jaccard(shingle_lists[i], shingle_lists[j]) >= threshold:
+                            sets.union(i, j)
+                            break
+
+    # Number groups in order of first appearance
+    roots = np.array([sets.find(i) for i in range(len(distinct_texts))], dtype=np.int64)[distinct_index]
+    _, representatives, groups = np.unique(roots, return_index=True, return_inverse=True)
+    order = np.argsort(representatives)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[groups], representatives[order]
+
+
+def dedup_predict(engine, clean_texts, threshold=DEFAULT_THRESHOLD):
+    """(sentiments, confidences, groups, representatives) scoring one text per group"""
+    groups, representatives = group_duplicates(clean_texts, threshold)
+    sentiments, confidences = engine.predict([clean_texts[i] for i in representatives])
+    return sentiments[groups], confidences[groups], groups, representatives
+
+
+def near_duplicate_members(clean_texts, groups, representatives):
+    """Indices of texts that share a group with a different text"""
+    representative_texts = [clean_texts[i] for i in representatives]
+    return [i for i, group in enumerate(groups) if clean_texts[i] != representative_texts[group]]
+
+
+def check_agreement(engine, clean_texts, sentiments, members, sample_size=1000, seed=0):
+    """(labels agreeing, labels checked) for a sample of near-duplicates scored on their own"""
+    if len(members) == 0:
+        return 0, 0
+    rng = np.random.RandomState(seed)
+    sample = rng.choice(members, size=min(sample_size, len(members)), replace=False)
+    own, _ = engine.predict([clean_texts[i] for i in sample])
+    return int(np.sum(own == sentiments[sample])), len(sample)
+
+
+def main():
+    import time
+
+    import pandas as pd
+
+    from bulk_score import detect_format, iter_records
+    from inference_engine import load_engine
+    from text_preprocessing import normalize_many
+
+    parser = argparse.ArgumentParser(description="Duplicate grouping and label agreement per threshold")
+    parser.add_argument('data', nargs='?', default='test.csv',
+                        help="CSV (test.csv layout or Sentiment140) or JSONL input (default: %(default)s)")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.6, 0.7, DEFAULT_THRESHOLD, 0.9, 1.0],
+                        help="Jaccard thresholds to try; 1.0 groups exact duplicates only (default: %(default)s)")
+    parser.add_argument('--sample-size', type=int, default=1000,
+                        help="Near-duplicates scored on their own per threshold (default: %(default)s)")
+    args = parser.parse_args()
+
+    texts = [text for _, text in iter_records(args.data, detect_format(args.data))
+             if isinstance(text, str) and text.strip()]
+    clean_texts = normalize_many(texts)
+    engine = load_engine()
+    print(f"🔎 {len(clean_texts):,} texts from {args.data}, "
+          f"{pd.Series(clean_texts).nunique():,} distinct after cleaning")
+
+    print(f"{'threshold':>9} {'groups':>8} {'collapsed':>10} {'agreement':>17} {'grouping µs/text':>17}")
+    for threshold in args.thresholds:
+        started = time.perf_counter()
+        groups, representatives = group_duplicates(clean_texts, threshold)
+        grouping_us = (time.perf_counter() - started) / len(clean_texts) * 1e6
+        sentiments = engine.predict([clean_texts[i] for i in representatives])[0][groups]
+        members = near_duplicate_members(clean_texts, groups, representatives)
+        agreed, checked = check_agreement(engine, clean_texts, sentiments, members, args.sample_size)
+        agreement = f"{agreed / checked:.1%} of {checked:,}" if checked else '-'
+        print(f"{threshold:>9.2f} {len(representatives):>8,} {1 - len(representatives) / len(clean_texts):>10.1%} "
+              f"{agreement:>17} {grouping_us:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Content-addressed on-disk cache of cleaned text and feature matrices.
+
+Entries are keyed by a hash of the input texts (i.e. of the rows read from
+the input file), ``PREPROCESS_VERSION`` and, for feature matrices, a
+fingerprint of the fitted vectorizer. A changed input file, preprocessing
+change or retrained vectorizer therefore misses instead of returning stale
+data. Cleaned text is stored as one UTF-8 blob plus an offsets array;
+matrices are stored with ``scipy.sparse.save_npz``. The least recently used
+entries are deleted once the directory grows past its size limit.
+
+The directory defaults to ``.feature_cache`` and can be changed with
+FEATURE_CACHE_DIR; FEATURE_CACHE_MAX_MB sets the limit (0 disables caching).
+"""
+
+import hashlib
+import os
+import zipfile
+
+import numpy as np
+import scipy.sparse as sp
+
+from text_preprocessing import PREPROCESS_VERSION, normalize_parallel
+
+DEFAULT_CACHE_DIR = '.feature_cache'
+DEFAULT_MAX_MB = 1024
+
+
+def texts_digest(texts):
+    """SHA-256 identifying a sequence of texts, order included"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text).encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _update_fingerprint(digest, estimator):
+    digest.update(type(estimator).__name__.encode('utf-8'))
+    steps = getattr(estimator, 'steps', None)
+    if steps is not None:
+        for _, step in steps:
+            _update_fingerprint(digest, step)
+        return
+
+    # Not a pickle: vectorizers cache private attributes on first use, which
+    # would change the bytes without changing the output
+    digest.update(repr(sorted(estimator.get_params(deep=False).items())).encode('utf-8'))
+    vocabulary = getattr(estimator, 'vocabulary_', None)
+    if vocabulary is not None:
+        for term, index in sorted(vocabulary.items(), key=lambda item: item[1]):
+            digest.update(term.encode('utf-8'))
+            digest.update(b'\0')
+    idf = getattr(estimator, 'idf_', None)
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf).tobytes())
+
+
+def vectorizer_fingerprint(vectorizer):
+    """SHA-256 of a fitted vectorizer's settings, vocabulary and idf weights"""
+    digest = hashlib.sha256()
+    _update_fingerprint(digest, vectorizer)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """Cleaned-text and feature-matrix cache in one directory, bounded by size"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or os.environ.get('FEATURE_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('FEATURE_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, kind, *parts):
+        key = hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f"{kind}-{key}.npz")
+
+    def _load(self, path, loader):
+        try:
+            value = loader(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            self.misses += 1
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def _store(self, path, writer):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def clean_texts(self, texts, source=None, workers=1):
+        """preprocess_text for every text, loaded from the cache when possible
+
+        source overrides the key for the input rows; by default the texts
+        themselves are hashed. On a miss, texts are cleaned by ``workers``
+        processes (None for one per core).
+        """
+        texts = list(texts)
+        if not self.enabled:
+            return normalize_parallel(texts, workers)
+
+        source = source or texts_digest(texts)
+        path = self._path('text', source, PREPROCESS_VERSION)
+        cached = self._load(path, _load_texts)
+        if cached is not None:
+            return cached
+
+        clean_texts = normalize_parallel(texts, workers)
+        self._store(path, lambda f: _save_texts(f, clean_texts))
+        return clean_texts
+
+    def features(self, clean_texts, vectorizer, source=None):
+        """vectorizer.transform(clean_texts), loaded from the cache when possible"""
+        if not self.enabled:
+            return vectorizer.transform(clean_texts)
+
+        clean_texts = list(clean_texts)
+        source = source or texts_digest(clean_texts)
+        path = self._path('features', source, PREPROCESS_VERSION, vectorizer_fingerprint(vectorizer))
+        cached = self._load(path, sp.load_npz)
+        if cached is not None:
+            return cached
+
+        X = sp.csr_matrix(vectorizer.transform(clean_texts))
+        self._store(path, lambda f: sp.save_npz(f, X, compressed=False))
+        return X
+
+    def evict(self):
+        """Delete least recently used entries until the directory fits in max_bytes"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        entries = []
+        for name in names:
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Delete every entry"""
+        max_bytes, self.max_bytes = self.max_bytes, 0
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+
+
+def _save_texts(f, texts):
+    """One UTF-8 blob plus end offsets, so loading is a single decode per text"""
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    np.savez(f, offsets=offsets, blob=np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+
+def _load_texts(path):
+    with np.load(path) as data:
+        offsets = data['offsets'].tolist()
+        blob = data['blob'].tobytes()
+    return [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
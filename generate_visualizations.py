@@ -1,16 +1,23 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import confusion_matrix, classification_report
-from sklearn.model_selection import learning_curve
 import joblib
-import json
-import os
+from feature_cache import FeatureCache
+from inference_engine import InferenceEngine
+
+# Cleaned text and TF-IDF features are reused across runs instead of being
+# recomputed each time
+feature_cache = FeatureCache()
 
-# Set style for better-looking plots
-plt.style.use('dark_background')
-sns.set_palette("husl")
+# Every chart is drawn from one prediction vector, so rendering is the only
+# per-chart work; it runs in a process pool.
+SAVEFIG_OPTIONS = {'dpi': 300, 'bbox_inches': 'tight', 'facecolor': '#1a1a1a', 'edgecolor': 'none'}
 
 def create_output_directory():
     """Create directory for storing visualizations"""
@@ -25,135 +32,142 @@ def load_model_and_data():
         model = joblib.load('svm_sentiment_model.pkl')
         vectorizer = joblib.load('tfidf_vectorizer.pkl')
         label_encoder = joblib.load('label_encoder.pkl')
-        
+
         # Load test data for visualization
         test_data = pd.read_csv('test.csv', index_col=0, encoding='latin-1')
-        
+
         # Drop unnecessary columns
-        columns_to_drop = ['Time of Tweet', 'Age of User', 'Country', 
+        columns_to_drop = ['Time of Tweet', 'Age of User', 'Country',
                           'Population -2020', 'Land Area (Km²)', 'Density (P/Km²)']
         existing_columns = [col for col in columns_to_drop if col in test_data.columns]
         if existing_columns:
             test_data.drop(existing_columns, axis=1, inplace=True)
-        
+
         test_data.dropna(inplace=True)
-        
+
         return model, vectorizer, label_encoder, test_data
     except Exception as e:
         print(f"Error loading model or data: {e}")
         return None, None, None, None
 
-def preprocess_text(text):
-    """Clean and preprocess text data"""
-    import re
-    text = re.sub(r'<.*?>', '', str(text))
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    text = text.lower()
-    return text
-
-def generate_confusion_matrix(model, vectorizer, label_encoder, test_data, viz_dir):
-    """Generate confusion matrix heatmap"""
-    # Prepare test data
-    test_data['clean_text'] = test_data['text'].apply(preprocess_text)
-    X_test = vectorizer.transform(test_data['clean_text'])
+def predict_test_set(model, vectorizer, label_encoder, test_data, preprocess_workers=1):
+    """Preprocess, vectorise and score the test set exactly once"""
+    test_data['clean_text'] = feature_cache.clean_texts(test_data['text'], workers=preprocess_workers)
+    X_test = feature_cache.features(test_data['clean_text'], vectorizer)
     y_test = label_encoder.transform(test_data['sentiment'])
-    
-    # Get predictions
-    y_pred = model.predict(X_test)
-    
-    # Create confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
-    
+
+    # Same labels as model.predict(), through the single-pass scorer
+    engine = InferenceEngine.from_sklearn(model, vectorizer, label_encoder)
+    sentiments, _ = engine.predict_matrix(X_test)
+    y_pred = label_encoder.transform(sentiments)
+
+    return y_test, y_pred
+
+def accuracy_over_samples(y_test, y_pred, points=10):
+    """Accuracy on growing prefixes of the test set, from cumulative correctness"""
+    sample_sizes = np.linspace(100, len(y_test), points, dtype=int)
+    cumulative_correct = np.cumsum(y_pred == y_test)
+    accuracies = cumulative_correct[sample_sizes - 1] / sample_sizes
+    return sample_sizes, accuracies
+
+def compute_statistics(y_test, y_pred, label_encoder, test_data):
+    """Everything the charts and model_stats.json need, derived from one prediction vector"""
+    labels = list(label_encoder.classes_)
+    sample_sizes, accuracies = accuracy_over_samples(y_test, y_pred)
+    return {
+        'labels': labels,
+        'cm': confusion_matrix(y_test, y_pred),
+        'report': classification_report(y_test, y_pred, target_names=labels, output_dict=True),
+        'sentiment_counts': test_data['sentiment'].value_counts(),
+        'sample_sizes': sample_sizes,
+        'accuracies': accuracies
+    }
+
+def _pyplot():
+    """Import matplotlib only when a chart is drawn, with the project style applied"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Set style for better-looking plots
+    plt.style.use('dark_background')
+    sns.set_palette("husl")
+    return plt, sns
+
+def generate_confusion_matrix(cm, labels, viz_dir):
+    """Generate confusion matrix heatmap"""
+    plt, sns = _pyplot()
+
     # Plot confusion matrix
     plt.figure(figsize=(10, 8))
-    labels = label_encoder.classes_
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
                 xticklabels=labels, yticklabels=labels,
                 cbar_kws={'label': 'Count'})
     plt.title('Confusion Matrix - SVM Sentiment Analysis', fontsize=16, pad=20)
     plt.xlabel('Predicted Sentiment', fontsize=12)
     plt.ylabel('True Sentiment', fontsize=12)
     plt.tight_layout()
-    plt.savefig(f'{viz_dir}/confusion_matrix.png', dpi=300, bbox_inches='tight', 
-                facecolor='#1a1a1a', edgecolor='none')
+    plt.savefig(f'{viz_dir}/confusion_matrix.png', **SAVEFIG_OPTIONS)
     plt.close()
-    
-    return cm, y_test, y_pred
 
-def generate_accuracy_metrics(y_test, y_pred, label_encoder, viz_dir):
+    return f'{viz_dir}/confusion_matrix.png'
+
+def generate_accuracy_metrics(report, viz_dir):
     """Generate accuracy metrics visualization"""
-    # Get classification report
-    report = classification_report(y_test, y_pred, target_names=label_encoder.classes_, output_dict=True)
-    
+    plt, _ = _pyplot()
+
     # Extract metrics
     metrics_df = pd.DataFrame(report).transpose()
     metrics_df = metrics_df.drop(['accuracy', 'macro avg', 'weighted avg'])
-    
+
     # Plot metrics
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
-    
+
     # Precision
     axes[0].bar(metrics_df.index, metrics_df['precision'], color='#00ffff', alpha=0.8)
     axes[0].set_title('Precision by Sentiment', fontsize=14)
     axes[0].set_ylabel('Score')
     axes[0].set_ylim(0, 1)
-    
+
     # Recall
     axes[1].bar(metrics_df.index, metrics_df['recall'], color='#00ff00', alpha=0.8)
     axes[1].set_title('Recall by Sentiment', fontsize=14)
     axes[1].set_ylabel('Score')
     axes[1].set_ylim(0, 1)
-    
+
     # F1-Score
     axes[2].bar(metrics_df.index, metrics_df['f1-score'], color='#0080ff', alpha=0.8)
     axes[2].set_title('F1-Score by Sentiment', fontsize=14)
     axes[2].set_ylabel('Score')
     axes[2].set_ylim(0, 1)
-    
+
     plt.suptitle('Model Performance Metrics', fontsize=16)
     plt.tight_layout()
-    plt.savefig(f'{viz_dir}/performance_metrics.png', dpi=300, bbox_inches='tight',
-                facecolor='#1a1a1a', edgecolor='none')
+    plt.savefig(f'{viz_dir}/performance_metrics.png', **SAVEFIG_OPTIONS)
     plt.close()
-    
-    return report
 
-def generate_sentiment_distribution(test_data, viz_dir):
+    return f'{viz_dir}/performance_metrics.png'
+
+def generate_sentiment_distribution(sentiment_counts, viz_dir):
     """Generate sentiment distribution pie chart"""
-    sentiment_counts = test_data['sentiment'].value_counts()
-    
+    plt, _ = _pyplot()
+
     plt.figure(figsize=(10, 8))
     colors = ['#00ffff', '#00ff00', '#ff6b6b']
     plt.pie(sentiment_counts.values, labels=sentiment_counts.index, autopct='%1.1f%%',
             colors=colors, startangle=90, textprops={'fontsize': 12})
     plt.title('Distribution of Sentiments in Dataset', fontsize=16, pad=20)
     plt.axis('equal')
-    plt.savefig(f'{viz_dir}/sentiment_distribution.png', dpi=300, bbox_inches='tight',
-                facecolor='#1a1a1a', edgecolor='none')
+    plt.savefig(f'{viz_dir}/sentiment_distribution.png', **SAVEFIG_OPTIONS)
     plt.close()
-    
-    return sentiment_counts
 
-def generate_accuracy_over_samples(model, vectorizer, test_data, viz_dir):
+    return f'{viz_dir}/sentiment_distribution.png'
+
+def generate_accuracy_over_samples(sample_sizes, accuracies, viz_dir):
     """Generate accuracy over different sample sizes"""
-    # Prepare data
-    test_data['clean_text'] = test_data['text'].apply(preprocess_text)
-    X_test = vectorizer.transform(test_data['clean_text'])
-    y_test = test_data['sentiment'].map({'positive': 2, 'neutral': 1, 'negative': 0})
-    
-    # Calculate accuracy over different sample sizes
-    sample_sizes = np.linspace(100, X_test.shape[0], 10, dtype=int)
-    accuracies = []
-    
-    for size in sample_sizes:
-        X_sample = X_test[:size]
-        y_sample = y_test[:size]
-        y_pred = model.predict(X_sample)
-        accuracy = (y_pred == y_sample).mean()
-        accuracies.append(accuracy)
-    
+    plt, _ = _pyplot()
+
     plt.figure(figsize=(12, 6))
     plt.plot(sample_sizes, accuracies, marker='o', linewidth=3, markersize=8, color='#00ffff')
     plt.title('Model Accuracy vs Sample Size', fontsize=16, pad=20)
@@ -161,11 +175,33 @@ def generate_accuracy_over_samples(model, vectorizer, test_data, viz_dir):
     plt.ylabel('Accuracy', fontsize=12)
     plt.grid(True, alpha=0.3)
     plt.ylim(0.5, 1.0)
-    plt.savefig(f'{viz_dir}/accuracy_vs_samples.png', dpi=300, bbox_inches='tight',
-                facecolor='#1a1a1a', edgecolor='none')
+    plt.savefig(f'{viz_dir}/accuracy_vs_samples.png', **SAVEFIG_OPTIONS)
     plt.close()
-    
-    return sample_sizes, accuracies
+
+    return f'{viz_dir}/accuracy_vs_samples.png'
+
+def render_charts(stats, viz_dir, workers=None):
+    """Draw the four figures in parallel worker processes"""
+    jobs = [
+        ("📊 Confusion matrix", generate_confusion_matrix, (stats['cm'], stats['labels'], viz_dir)),
+        ("📈 Performance metrics", generate_accuracy_metrics, (stats['report'], viz_dir)),
+        ("🥧 Sentiment distribution", generate_sentiment_distribution, (stats['sentiment_counts'], viz_dir)),
+        ("📉 Accuracy vs samples", generate_accuracy_over_samples,
+         (stats['sample_sizes'], stats['accuracies'], viz_dir)),
+    ]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+
+    if workers == 1:
+        for name, render, args in jobs:
+            render(*args)
+            print(f"{name} rendered")
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(name, executor.submit(render, *args)) for name, render, args in jobs]
+        for name, future in futures:
+            future.result()
+            print(f"{name} rendered")
 
 def save_model_stats(report, cm, sentiment_counts, viz_dir):
     """Save model statistics as JSON for frontend"""
@@ -177,63 +213,70 @@ def save_model_stats(report, cm, sentiment_counts, viz_dir):
         },
         "performance_metrics": {
             "precision": {
-                sentiment: float(metrics['precision']) 
-                for sentiment, metrics in report.items() 
+                sentiment: float(metrics['precision'])
+                for sentiment, metrics in report.items()
                 if sentiment not in ['accuracy', 'macro avg', 'weighted avg']
             },
             "recall": {
-                sentiment: float(metrics['recall']) 
-                for sentiment, metrics in report.items() 
+                sentiment: float(metrics['recall'])
+                for sentiment, metrics in report.items()
                 if sentiment not in ['accuracy', 'macro avg', 'weighted avg']
             },
             "f1_score": {
-                sentiment: float(metrics['f1-score']) 
-                for sentiment, metrics in report.items() 
+                sentiment: float(metrics['f1-score'])
+                for sentiment, metrics in report.items()
                 if sentiment not in ['accuracy', 'macro avg', 'weighted avg']
             }
         }
     }
-    
+
     with open(f'{viz_dir}/model_stats.json', 'w') as f:
         json.dump(stats, f, indent=2)
-    
+
     return stats
 
-def main():
+def main(stats_only=False, workers=None, preprocess_workers=1):
     """Main function to generate all visualizations"""
+    started = time.perf_counter()
     print("🎨 Generating visualizations for Sentify...")
-    
+
     # Create output directory
     viz_dir = create_output_directory()
-    
+
     # Load model and data
     model, vectorizer, label_encoder, test_data = load_model_and_data()
-    
+
     if model is None:
         print("❌ Could not load model or data. Make sure the model is trained.")
         return
-    
-    print("📊 Generating confusion matrix...")
-    cm, y_test, y_pred = generate_confusion_matrix(model, vectorizer, label_encoder, test_data, viz_dir)
-    
-    print("📈 Generating performance metrics...")
-    report = generate_accuracy_metrics(y_test, y_pred, label_encoder, viz_dir)
-    
-    print("🥧 Generating sentiment distribution...")
-    sentiment_counts = generate_sentiment_distribution(test_data, viz_dir)
-    
-    print("📉 Generating accuracy vs samples...")
-    sample_sizes, accuracies = generate_accuracy_over_samples(model, vectorizer, test_data, viz_dir)
-    
+
+    print("🔮 Scoring test set...")
+    y_test, y_pred = predict_test_set(model, vectorizer, label_encoder, test_data, preprocess_workers)
+    stats = compute_statistics(y_test, y_pred, label_encoder, test_data)
+
     print("💾 Saving model statistics...")
-    stats = save_model_stats(report, cm, sentiment_counts, viz_dir)
-    
-    print("✅ All visualizations generated successfully!")
+    model_stats = save_model_stats(stats['report'], stats['cm'], stats['sentiment_counts'], viz_dir)
+
+    if not stats_only:
+        render_charts(stats, viz_dir, workers)
+        print("✅ All visualizations generated successfully!")
+    else:
+        print("✅ Model statistics written (charts skipped)")
     print(f"📁 Files saved in: {viz_dir}/")
-    print(f"📊 Overall Accuracy: {stats['overall_accuracy']:.1%}")
-    print(f"🔢 Total Samples: {stats['total_samples']:,}")
-    
+    print(f"📊 Overall Accuracy: {model_stats['overall_accuracy']:.1%}")
+    print(f"🔢 Total Samples: {model_stats['total_samples']:,}")
+    print(f"⏱️  Finished in {time.perf_counter() - started:.1f}s")
+
     return viz_dir
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate evaluation charts and model_stats.json")
+    parser.add_argument('--stats-only', action='store_true',
+                        help="Only write model_stats.json; matplotlib is never imported")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes used to render charts (default: one per chart, up to the core count)")
+    parser.add_argument('--preprocess-workers', type=int, default=1,
+                        help="Processes cleaning the test texts; 0 for one per core (default: %(default)s)")
+    args = parser.parse_args()
+    main(stats_only=args.stats_only, workers=args.workers,
+         preprocess_workers=args.preprocess_workers or None)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Out-of-core incremental training for corpora larger than RAM.
+
+CSV files are streamed in chunks. Features come from a HashingVectorizer, so
+there is no vocabulary pass over the whole corpus, and a linear SVM
+(SGDClassifier with hinge loss) is updated with partial_fit on each chunk.
+Training state is checkpointed periodically. Running again with the same
+checkpoint resumes where it stopped, and new files (e.g. today's data)
+continue training the saved model instead of starting over. The result is
+exported as a model artifact that app.py can serve:
+
+    python incremental_training.py train.csv test.csv
+    python incremental_training.py tweets_2024_06_01.csv          # continue on new data
+    MODEL_ARTIFACT=incremental_model.artifact python app.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from model_artifact import export_artifact
+from text_preprocessing import normalize_many
+
+LABELS = np.array(['negative', 'neutral', 'positive'])
+
+DEFAULT_CHECKPOINT = 'incremental_model.ckpt'
+DEFAULT_ARTIFACT = 'incremental_model.artifact'
+
+# 2**18 hashed columns keeps collisions rare for unigrams + bigrams of tweets
+# while the exported weights stay at 6 MiB
+N_FEATURES = 2 ** 18
+
+
+def make_vectorizer(n_features=N_FEATURES):
+    """Stateless features matching the TF-IDF settings in train_svm_model.py"""
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, 2),
+        stop_words='english',
+        alternate_sign=False,
+        norm='l2'
+    )
+
+
+def make_classifier(alpha=1e-5, random_state=42):
+    """Linear SVM trained by stochastic gradient descent"""
+    # Averaging the weights over all updates makes the model much less
+    # sensitive to the order in which chunks arrive
+    return SGDClassifier(loss='hinge', alpha=alpha, average=True, random_state=random_state)
+
+
+def new_state(n_features=N_FEATURES, alpha=1e-5):
+    """Fresh training state; files maps each input path to the rows already trained on"""
+    return {
+        'vectorizer': make_vectorizer(n_features),
+        'model': make_classifier(alpha),
+        'files': {},
+        'rows_seen': 0,
+        'chunks_seen': 0
+    }
+
+
+def load_checkpoint(path):
+    """Training state saved by save_checkpoint, or None"""
+    if not os.path.exists(path):
+        return None
+    return joblib.load(path)
+
+
+def save_checkpoint(state, path):
+    """Write the state atomically so a crash never leaves a torn checkpoint"""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def iter_labelled_chunks(path, chunk_size, skip_rows=0):
+    """Yield (clean_texts, labels, rows_consumed) for each chunk of a CSV with text/sentiment columns
+
+    skip_rows counts CSV records, not physical lines: they are dropped from
+    the parsed chunks, so quoted texts spanning several lines resume at the
+    right record.
+    """
+    reader = pd.read_csv(path, encoding='latin-1', usecols=['text', 'sentiment'], chunksize=chunk_size)
+    for chunk in reader:
+        if skip_rows:
+            skipped = min(skip_rows, len(chunk))
+            skip_rows -= skipped
+            chunk = chunk.iloc[skipped:]
+            if chunk.empty:
+                continue
+        rows_consumed = len(chunk)
+        chunk = chunk.dropna()
+        chunk = chunk[chunk['sentiment'].isin(LABELS)]
+        yield normalize_many(chunk['text']), chunk['sentiment'].to_numpy(), rows_consumed
+
+
+def train_on_files(state, paths, chunk_size=10000, checkpoint_path=DEFAULT_CHECKPOINT,
+                   checkpoint_every=10, random_state=42):
+    """Stream every file into the model, resuming each file where training left off"""
+    vectorizer, model = state['vectorizer'], state['model']
+    rng = np.random.RandomState(random_state + state['chunks_seen'])
+
+    for path in paths:
+        progress = state['files'].setdefault(os.path.abspath(path), {'rows': 0, 'done': False})
+        if progress['done']:
+            print(f"Skipping {path}: already trained on ({progress['rows']:,} rows)")
+            continue
+        if progress['rows']:
+            print(f"Resuming {path} after {progress['rows']:,} rows")
+        else:
+            print(f"Training on {path}...")
+
+        started = time.perf_counter()
+        file_rows = 0
+        for clean_texts, labels, rows_consumed in iter_labelled_chunks(path, chunk_size, progress['rows']):
+            if len(labels):
+                # SGD expects shuffled input; rows within a CSV are often grouped
+                order = rng.permutation(len(labels))
+                X = vectorizer.transform([clean_texts[i] for i in order])
+                model.partial_fit(X, labels[order], classes=LABELS)
+
+            progress['rows'] += rows_consumed
+            file_rows += rows_consumed
+            state['rows_seen'] += rows_consumed
+            state['chunks_seen'] += 1
+
+            if state['chunks_seen'] % checkpoint_every == 0:
+                save_checkpoint(state, checkpoint_path)
+            elapsed = time.perf_counter() - started
+            print(f"  {progress['rows']:,} rows ({file_rows / elapsed:,.0f} rows/sec)")
+
+        progress['done'] = True
+        save_checkpoint(state, checkpoint_path)
+
+    return state
+
+
+def evaluate(state, path, chunk_size=10000):
+    """Accuracy of the current model on a labelled CSV, streamed in chunks"""
+    correct = total = 0
+    for clean_texts, labels, _ in iter_labelled_chunks(path, chunk_size):
+        if len(labels):
+            predictions = state['model'].predict(state['vectorizer'].transform(clean_texts))
+            correct += int((predictions == labels).sum())
+            total += len(labels)
+    return correct / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally train the sentiment model on CSV files")
+    parser.add_argument('inputs', nargs='+', help="CSV files with 'text' and 'sentiment' columns")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help="Training state to resume from and save to (default: %(default)s)")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Ignore an existing checkpoint and start a new model")
+    parser.add_argument('--artifact', default=DEFAULT_ARTIFACT,
+                        help="Where to export the servable model (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--checkpoint-every', type=int, default=10,
+                        help="Save the checkpoint every N chunks (default: %(default)s)")
+    parser.add_argument('--n-features', type=int, default=N_FEATURES,
+                        help="Hashed feature columns for a new model (default: %(default)s)")
+    parser.add_argument('--alpha', type=float, default=1e-5,
+                        help="Regularisation strength for a new model (default: %(default)s)")
+    parser.add_argument('--eval', help="Labelled CSV to report accuracy on after training")
+    args = parser.parse_args()
+
+    state = None if args.fresh else load_checkpoint(args.checkpoint)
+    if state is None:
+        print("🆕 Starting a new model")
+        state = new_state(args.n_features, args.alpha)
+    else:
+        print(f"📂 Continuing from {args.checkpoint} "
+              f"({state['rows_seen']:,} rows in {len(state['files'])} files so far)")
+
+    started = time.perf_counter()
+    train_on_files(state, args.inputs, args.chunk_size, args.checkpoint, args.checkpoint_every)
+    print(f"✅ Trained on {state['rows_seen']:,} rows in total "
+          f"({time.perf_counter() - started:.1f}s this run)")
+
+    if not hasattr(state['model'], 'coef_'):
+        print("No labelled rows found; nothing to export")
+        sys.exit(1)
+
+    if args.eval:
+        print(f"Accuracy on {args.eval}: {evaluate(state, args.eval, args.chunk_size):.4f}")
+
+    manifest = export_artifact(state['model'], state['vectorizer'], None, args.artifact)
+    print(f"💾 Artifact {manifest['model_id']} written to {args.artifact}/")
+
+
+if __name__ == "__main__":
+    main()
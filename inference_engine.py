@@ -0,0 +1,315 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from model_artifact import votes_and_ovr_scores
+
+
+# Reduced-precision weights from a quantised artifact stay in these dtypes
+COMPACT_DTYPES = (np.float32, np.float16, np.int8)
+
+
+def _weight_matrix(weights):
+    weights = np.asarray(weights)
+    if weights.dtype in COMPACT_DTYPES:
+        return weights
+    return np.ascontiguousarray(weights, dtype=np.float64)
+
+
+def linear_decision(X, weights, scale=None):
+    """X @ weights (* scale per column), reading compact weights without widening the matrix"""
+    if weights.dtype == np.float64:
+        return np.asarray(X @ weights)
+
+    # Only the rows of the terms present in X are gathered and widened, so a
+    # batch touches nnz(X) weight rows instead of a float64 copy of all of them
+    X = sp.csr_matrix(X)
+    n_samples = X.shape[0]
+    rows = np.repeat(np.arange(n_samples), np.diff(X.indptr))
+    contributions = weights[X.indices] * X.data[:, None]
+    decision = np.empty((n_samples, weights.shape[1]))
+    for k in range(weights.shape[1]):
+        decision[:, k] = np.bincount(rows, weights=contributions[:, k], minlength=n_samples)
+    if scale is not None:
+        decision *= scale
+    return decision
+
+
+class OvoScorer:
+    """Shared label/confidence logic for scorers that produce one-vs-one decisions"""
+
+    n_classes = 2
+
+    def decision(self, X):
+        raise NotImplementedError
+
+    def score(self, X):
+        """Return (class indices, confidences) from a single decision pass"""
+        decision = self.decision(X)
+
+        if self.n_classes == 2:
+            decision = decision.ravel()
+            return (decision > 0).astype(np.intp), decision
+
+        votes, ovr_scores = votes_and_ovr_scores(decision, self.n_classes)
+        return np.argmax(votes, axis=1), ovr_scores.max(axis=1)
+
+
+class LinearSVCScorer(OvoScorer):
+    """Linear-kernel SVC collapsed into one weight matrix plus intercepts"""
+
+    def __init__(self, weights, intercept, n_classes, scale=None):
+        # weights are (n_features, n_pairs) and dense: with only a handful of
+        # class pairs, X @ weights is a single sparse mat-vec. int8 weights
+        # come with one scale per pair.
+        self.weights = _weight_matrix(weights)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.n_classes = n_classes
+        self.scale = scale
+
+    @classmethod
+    def from_coef(cls, coef, intercept, n_classes):
+        """Build from SVC's (n_pairs, n_features) coef_, sparse or dense"""
+        if sp.issparse(coef):
+            coef = coef.toarray()
+        return cls(np.asarray(coef).T, intercept, n_classes)
+
+    def decision(self, X):
+        """One-vs-one decision values, identical to libsvm's for a linear kernel"""
+        return linear_decision(X, self.weights, self.scale) + self.intercept
+
+
+class KernelMap:
+    """Kernel values between rows of X and a fixed set of sparse vectors"""
+
+    def __init__(self, vectors, kernel, gamma, coef0, degree):
+        self.vectors = sp.csr_matrix(vectors)
+        self.kernel = kernel
+        self.gamma = gamma
+        self.coef0 = coef0
+        self.degree = degree
+        self.squared_norms = np.asarray(self.vectors.multiply(self.vectors).sum(axis=1)).ravel()
+        # Transposed once here rather than converted from CSC on every call
+        self.vectors_t = self.vectors.T.tocsr()
+
+    def __call__(self, X):
+        dots = X @ self.vectors_t
+        dots = dots.toarray() if sp.issparse(dots) else np.asarray(dots)
+
+        if self.kernel == 'linear':
+            return dots
+        if self.kernel == 'poly':
+            return (self.gamma * dots + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * dots + self.coef0)
+        if self.kernel == 'rbf':
+            if sp.issparse(X):
+                X = sp.csr_matrix(X)
+                x_squared_norms = np.add.reduceat(np.append(X.data ** 2, 0), X.indptr[:-1])
+                x_squared_norms[np.diff(X.indptr) == 0] = 0
+                x_squared_norms = x_squared_norms[:, None]
+            else:
+                x_squared_norms = (np.asarray(X) ** 2).sum(axis=1, keepdims=True)
+            distances = x_squared_norms + self.squared_norms - 2 * dots
+            return np.exp(-self.gamma * distances)
+        raise ValueError(f"Unsupported kernel: {self.kernel}")
+
+
+class KernelSVCScorer(OvoScorer):
+    """Non-linear SVC scored from its support vectors, for models loaded from an artifact"""
+
+    def __init__(self, support_vectors, dual_coef, n_support, intercept, kernel, gamma, coef0, degree):
+        self.kernel_map = KernelMap(support_vectors, kernel, gamma, coef0, degree)
+        self.dual_coef = np.asarray(dual_coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.n_classes = len(n_support)
+
+        starts = np.concatenate([[0], np.cumsum(n_support)])
+        self.class_slices = [slice(starts[i], starts[i + 1]) for i in range(self.n_classes)]
+
+    def kernel_matrix(self, X):
+        """Kernel values between each row of X and every support vector"""
+        return self.kernel_map(X)
+
+    def decision(self, X):
+        """One-vs-one decision values laid out like libsvm's"""
+        K = self.kernel_matrix(X)
+
+        if self.n_classes == 2:
+            return K @ self.dual_coef[0] + self.intercept[0]
+
+        decision = np.empty((K.shape[0], len(self.intercept)))
+        k = 0
+        for i in range(self.n_classes):
+            for j in range(i + 1, self.n_classes):
+                si, sj = self.class_slices[i], self.class_slices[j]
+                decision[:, k] = (K[:, si] @ self.dual_coef[j - 1, si]
+                                  + K[:, sj] @ self.dual_coef[i, sj]
+                                  + self.intercept[k])
+                k += 1
+        return decision
+
+
+class LinearOvrScorer:
+    """One-vs-rest linear classifier (e.g. SGDClassifier) as one weight matrix plus intercepts"""
+
+    def __init__(self, weights, intercept, scale=None):
+        # weights are (n_features, n_outputs); a binary model has one output
+        self.weights = _weight_matrix(weights)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.n_classes = max(2, self.weights.shape[1])
+        self.scale = scale
+
+    @classmethod
+    def from_coef(cls, coef, intercept):
+        """Build from a linear model's (n_outputs, n_features) coef_, sparse or dense"""
+        if sp.issparse(coef):
+            coef = coef.toarray()
+        return cls(np.asarray(coef).T, intercept)
+
+    def decision(self, X):
+        return linear_decision(X, self.weights, self.scale) + self.intercept
+
+    def score(self, X):
+        """Return (class indices, confidences) like the model's predict() and decision_function()"""
+        decision = self.decision(X)
+
+        if decision.shape[1] == 1:
+            decision = decision.ravel()
+            return (decision > 0).astype(np.intp), decision
+
+        return np.argmax(decision, axis=1), decision.max(axis=1)
+
+
+class NystroemScorer(LinearOvrScorer):
+    """Nystroem kernel approximation followed by a one-vs-rest linear model
+
+    The feature map's normalisation matrix is folded into the linear weights,
+    so a request costs one kernel evaluation per component whatever the
+    training set size.
+    """
+
+    def __init__(self, components, weights, intercept, kernel, gamma, coef0, degree):
+        super().__init__(weights, intercept)
+        self.kernel_map = KernelMap(components, kernel, gamma, coef0, degree)
+
+    @classmethod
+    def from_pipeline(cls, model):
+        """Build from a fitted Pipeline(Nystroem, LinearSVC or another linear classifier)"""
+        nystroem, linear = model.steps[0][1], model.steps[-1][1]
+        coef = linear.coef_.toarray() if sp.issparse(linear.coef_) else np.asarray(linear.coef_)
+        # embedded = K @ normalization_.T, so embedded @ coef.T = K @ (normalization_.T @ coef.T)
+        weights = nystroem.normalization_.T @ coef.T
+        return cls(nystroem.components_, weights, linear.intercept_, *nystroem_kernel_params(nystroem))
+
+    def decision(self, X):
+        decision = self.kernel_map(X) @ self.weights
+        if self.scale is not None:
+            decision = decision * self.scale
+        return decision + self.intercept
+
+
+def nystroem_kernel_params(nystroem):
+    """(kernel, gamma, coef0, degree) with sklearn's defaults filled in"""
+    gamma = nystroem.gamma if nystroem.gamma is not None else 1.0 / nystroem.components_.shape[1]
+    coef0 = nystroem.coef0 if nystroem.coef0 is not None else 1
+    degree = nystroem.degree if nystroem.degree is not None else 3
+    return nystroem.kernel, float(gamma), float(coef0), int(degree)
+
+
+def is_nystroem_pipeline(model):
+    """True for a two-step Pipeline of a Nystroem map and a linear classifier"""
+    steps = getattr(model, 'steps', None)
+    if steps is None or len(steps) != 2 or type(steps[0][1]).__name__ != 'Nystroem':
+        return False
+    nystroem, linear = steps[0][1], steps[1][1]
+    return (nystroem.kernel in ('linear', 'poly', 'rbf', 'sigmoid') and not nystroem.kernel_params
+            and hasattr(linear, 'coef_'))
+
+
+class DecisionFunctionScorer:
+    """Fallback for non-linear kernels: one decision_function call, label derived from it"""
+
+    def __init__(self, model):
+        self.model = model
+        self.n_classes = len(model.classes_)
+
+    def score(self, X):
+        """Return (class indices, confidences) from a single decision pass"""
+        decision = self.model.decision_function(X)
+
+        if decision.ndim == 1:
+            return (decision > 0).astype(np.intp), decision
+
+        if getattr(self.model, 'decision_function_shape', 'ovr') == 'ovo':
+            votes, _ = votes_and_ovr_scores(decision, self.n_classes)
+            labels = np.argmax(votes, axis=1)
+        elif hasattr(self.model, 'break_ties') and not self.model.break_ties:
+            # SVC's ovr scores are votes plus a confidence term in (-1/3, 1/3);
+            # rounding recovers the votes so ties go to the first class like predict()
+            labels = np.argmax(np.rint(decision), axis=1)
+        else:
+            labels = np.argmax(decision, axis=1)
+
+        return labels, decision.max(axis=1)
+
+
+def compile_model(model):
+    """Pick the cheapest scorer that reproduces the model's predictions"""
+    if getattr(model, 'kernel', None) == 'linear' and hasattr(model, 'dual_coef_'):
+        return LinearSVCScorer.from_coef(model.coef_, model.intercept_, len(model.classes_))
+    if hasattr(model, 'coef_') and not hasattr(model, 'dual_coef_'):
+        return LinearOvrScorer.from_coef(model.coef_, model.intercept_)
+    if is_nystroem_pipeline(model):
+        return NystroemScorer.from_pipeline(model)
+    return DecisionFunctionScorer(model)
+
+
+class InferenceEngine:
+    """Vectorise cleaned texts and get label and confidence from one scoring pass"""
+
+    def __init__(self, vectorizer, labels, scorer, model_id=None):
+        self.vectorizer = vectorizer
+        self.labels = np.asarray(labels)
+        self.scorer = scorer
+        # Identifies the loaded model, e.g. for cache invalidation
+        self.model_id = model_id
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer, label_encoder, model_id=None):
+        """Build an engine from the pickled model, vectorizer and label encoder"""
+        # Models trained on the label strings themselves need no encoder
+        labels = label_encoder.inverse_transform(model.classes_) if label_encoder is not None \
+            else model.classes_
+        return cls(vectorizer, labels, compile_model(model), model_id)
+
+    def predict_matrix(self, X):
+        """Score an already vectorised matrix, returning (sentiments, confidences)"""
+        indices, confidences = self.scorer.score(X)
+        return self.labels[indices], confidences
+
+    def predict(self, clean_texts):
+        """Score a list of preprocessed texts, returning (sentiments, confidences)"""
+        return self.predict_matrix(self.vectorizer.transform(clean_texts))
+
+
+def load_engine(artifact_path=None):
+    """Load the compiled artifact if there is one, otherwise the joblib pickles"""
+    from model_artifact import DEFAULT_ARTIFACT_PATH, load_artifact
+
+    artifact_path = artifact_path or os.environ.get('MODEL_ARTIFACT', DEFAULT_ARTIFACT_PATH)
+    if os.path.isdir(artifact_path):
+        return load_artifact(artifact_path).to_engine()
+
+    import hashlib
+    import joblib
+
+    paths = ['svm_sentiment_model.pkl', 'tfidf_vectorizer.pkl', 'label_encoder.pkl']
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+
+    model, vectorizer, label_encoder = (joblib.load(path) for path in paths)
+    return InferenceEngine.from_sklearn(model, vectorizer, label_encoder, digest.hexdigest()[:16])
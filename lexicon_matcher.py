@@ -0,0 +1,91 @@
+"""
+Aho-Corasick matcher for the keyword sentiment analyser.
+
+A word counts towards a lexicon when any of the lexicon's terms occurs inside
+it as a substring (``any(term in word for term in terms)``). The automaton
+checks every lexicon at once in a single scan of each word, so the cost per
+word depends on the word length, not on how many terms are loaded.
+"""
+
+from collections import Counter, deque
+from functools import lru_cache
+
+
+class LexiconMatcher:
+    """Substring matcher over several named lexicons, built once"""
+
+    def __init__(self, lexicons, cache_size=65536):
+        self.names = list(lexicons)
+        if len(self.names) > 62:
+            raise ValueError("At most 62 lexicons are supported")
+
+        # Trie: goto transitions and a bitmask of the lexicons ending at each state
+        goto = [{}]
+        output = [0]
+        for bit, name in enumerate(self.names):
+            for term in lexicons[name]:
+                term = term.strip().lower()
+                if not term:
+                    continue
+                state = 0
+                for char in term:
+                    if char not in goto[state]:
+                        goto.append({})
+                        output.append(0)
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                output[state] |= 1 << bit
+
+        # Breadth-first pass: failure links, inherited outputs, and a full
+        # transition table per state so scanning never follows failure links
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] |= output[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        self._delta = delta
+        self._output = output
+        self.word_mask = lru_cache(maxsize=cache_size)(self._scan_word)
+
+    @classmethod
+    def from_files(cls, paths, **kwargs):
+        """Build from {name: path} files holding one term per line"""
+        lexicons = {}
+        for name, path in paths.items():
+            with open(path, encoding='utf-8') as f:
+                lexicons[name] = [line for line in f if line.strip() and not line.startswith('#')]
+        return cls(lexicons, **kwargs)
+
+    def _scan_word(self, word):
+        """Bitmask of the lexicons with a term inside word"""
+        delta = self._delta
+        output = self._output
+        state = 0
+        mask = 0
+        for char in word:
+            state = delta[state].get(char, 0)
+            mask |= output[state]
+        return mask
+
+    def count_words(self, text):
+        """Count words matching each lexicon; returns ({name: count}, total_words)"""
+        words = text.lower().split()
+        mask_counts = Counter(map(self.word_mask, words))
+
+        counts = [0] * len(self.names)
+        for mask, count in mask_counts.items():
+            bit = 0
+            while mask:
+                if mask & 1:
+                    counts[bit] += count
+                mask >>= 1
+                bit += 1
+        return dict(zip(self.names, counts)), len(words)
@@ -0,0 +1,204 @@
+"""
+Bounded reading of newline-delimited request bodies for /predict/stream.
+
+A LineReader thread reads the request body one line at a time and puts the
+lines on a bounded queue; batches() takes them off in groups for
+scoring. When the client reads results slower than they are produced, the
+response write blocks, batches() stops taking lines, the queue fills, the
+reader stops reading and TCP flow control pushes back on the sender. Memory
+per stream is at most max_buffered_lines lines of max_line_bytes each, however
+long the connection stays open.
+
+Run the development server with StreamingRequestHandler so that reading a
+line costs one socket-file readline rather than one call per byte.
+"""
+
+import io
+import queue
+import threading
+import time
+
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.serving import DechunkedInput, WSGIRequestHandler
+from werkzeug.wsgi import get_content_length
+
+# Stands in for a line longer than max_line_bytes; its content is dropped
+OVERLONG = object()
+_END = object()
+
+
+def read_lines(stream, max_line_bytes):
+    """Yield each line (without its newline) as soon as it is complete, OVERLONG for oversized ones"""
+    pending = b''
+    overlong = False
+    while True:
+        # Never asks for more than the rest of one line, so a complete line is
+        # returned without waiting for more of the body to arrive
+        chunk = stream.readline(max_line_bytes + 1 - len(pending))
+        if not chunk:
+            break
+        if chunk.endswith(b'\n'):
+            yield OVERLONG if overlong else pending + chunk[:-1]
+            pending = b''
+            overlong = False
+            continue
+        pending += chunk
+        # Drop an oversized partial line now instead of buffering until its newline
+        if len(pending) > max_line_bytes:
+            pending = b''
+            overlong = True
+    if overlong:
+        yield OVERLONG
+    elif pending:
+        yield pending
+
+
+class BodyInput(io.RawIOBase):
+    """Request body of known length whose reads never ask for more than is left
+
+    werkzeug wraps bodies in a LimitedStream, and its dev server decodes chunked
+    ones with a DechunkedInput; neither has a readline of its own, so reading a
+    line goes a byte at a time. Here readline is the socket file's, bounded by
+    what remains of the body.
+    """
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self._left = length
+
+    def readable(self):
+        return True
+
+    def _available(self):
+        return self._left
+
+    def _took(self, data):
+        if not data:
+            raise ClientDisconnected()
+        self._left -= len(data)
+        return data
+
+    def readinto(self, buf):
+        available = self._available()
+        if not available:
+            return 0
+        data = self._took(self._rfile.read(min(len(buf), available)))
+        buf[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        available = self._available()
+        if not available:
+            return b''
+        if size is not None and size >= 0:
+            available = min(size, available)
+        return self._took(self._rfile.readline(available))
+
+
+class ChunkedInput(BodyInput):
+    """Chunked request body; reads stop at the end of the current chunk, which has been sent"""
+
+    def __init__(self, rfile):
+        super().__init__(rfile, 0)
+        self._after_data = False
+        self._done = False
+
+    def _available(self):
+        while self._left == 0 and not self._done:
+            line = self._rfile.readline(100)
+            if self._after_data and line in (b'\r\n', b'\n'):
+                # The line break closing the previous chunk's data
+                self._after_data = False
+                continue
+            try:
+                size = int(line.split(b';')[0].strip(), 16)
+            except ValueError as e:
+                raise OSError("Invalid chunk header") from e
+            if size < 0:
+                raise OSError("Negative chunk length not allowed")
+            if size == 0:
+                self._done = True
+                # Optional trailer fields end at a blank line
+                while self._rfile.readline(65536).strip():
+                    pass
+            self._left = size
+        return self._left
+
+    def _took(self, data):
+        data = super()._took(data)
+        self._after_data = self._left == 0
+        return data
+
+
+class StreamingRequestHandler(WSGIRequestHandler):
+    """Development server handler giving requests a BodyInput or ChunkedInput body"""
+
+    def make_environ(self):
+        environ = super().make_environ()
+        if isinstance(environ['wsgi.input'], DechunkedInput):
+            environ['wsgi.input'] = ChunkedInput(self.rfile)
+        elif get_content_length(environ) is not None:
+            # Already bounded, so werkzeug reads it as is instead of wrapping it
+            environ['wsgi.input'] = BodyInput(self.rfile, get_content_length(environ))
+            environ['wsgi.input_terminated'] = True
+        return environ
+
+
+class LineReader:
+    """Read lines from a byte stream on a background thread into a bounded queue"""
+
+    def __init__(self, stream, max_buffered_lines=256, max_line_bytes=16384):
+        self.stream = stream
+        self.max_line_bytes = max_line_bytes
+        self._queue = queue.Queue(maxsize=max_buffered_lines)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='line-reader', daemon=True)
+        self.error = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop reading; the thread exits at its next line or queue put"""
+        self._closed.set()
+
+    def _put(self, item):
+        # Blocks while the queue is full, which is what throttles the sender
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            for line in read_lines(self.stream, self.max_line_bytes):
+                if self._closed.is_set() or not self._put(line):
+                    return
+        except Exception as e:
+            # Client disconnects and malformed chunked bodies end the stream
+            self.error = e
+        self._put(_END)
+
+    def batches(self, max_batch_size=64, max_wait=0.02):
+        """Yield lists of lines: wait for one, then gather more until full or max_wait passes"""
+        while True:
+            line = self._queue.get()
+            if line is _END:
+                return
+            batch = [line]
+            deadline = time.monotonic() + max_wait
+            while len(batch) < max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    line = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if line is _END:
+                    yield batch
+                    return
+                batch.append(line)
+            yield batch
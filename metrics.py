@@ -0,0 +1,205 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text format.
+
+Histograms keep per-bucket counts and a sum; counters only go up; gauges
+hold a single value.
+Updates are plain additions without a lock: a lock would triple the cost of
+an observation, and under the GIL the worst case is a rare lost increment
+when two threads update the same series at the same instant, which is
+acceptable for monitoring. Each process has its own registry, so with
+serve.py every worker reports its own series.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; stages range from a few microseconds (cleaning) to a full request
+LATENCY_BUCKETS = [0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+# Characters in the submitted text
+LENGTH_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramSeries:
+    """Bucket counts for one label combination"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram:
+    """Histogram with optional labels; labels() returns a series to observe on"""
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = list(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._series[()] = _HistogramSeries(self.buckets)
+
+    def labels(self, *values):
+        """Series for these label values; look it up once and keep it"""
+        values = tuple(str(value) for value in values)
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, _HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value):
+        self._series[()].observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            labels = list(zip(self.labelnames, values))
+            counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + [float('inf')], counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels + [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        return lines
+
+
+class _CounterSeries:
+    """Count for one label combination"""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Counter:
+    """Monotonic count with optional labels; labels() returns a series to inc()"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._series[()] = _CounterSeries()
+
+    def labels(self, *values):
+        """Series for these label values; look it up once and keep it"""
+        values = tuple(str(value) for value in values)
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, _CounterSeries())
+        return series
+
+    def inc(self, amount=1):
+        self._series[()].inc(amount)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for values, series in sorted(self._series.items()):
+            labels = _format_labels(list(zip(self.labelnames, values)))
+            lines.append(f"{self.name}{labels} {_format_value(series.value)}")
+        return lines
+
+
+class Gauge:
+    """Single value that can go up and down"""
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def render(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(self.value)}"]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        metric = Histogram(name, documentation, buckets, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation):
+        metric = Gauge(name, documentation)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+if __name__ == "__main__":
+    # Cost of the instrumentation app.py adds to one /predict request: seven
+    # timed observations sharing timestamps, an input length and the gauge
+    registry = MetricsRegistry()
+    stages = registry.histogram('bench_stage_seconds', 'Benchmark', labelnames=('stage',))
+    series = [stages.labels(stage) for stage in range(7)]
+    length = registry.histogram('bench_length', 'Benchmark', buckets=LENGTH_BUCKETS)
+    in_flight = registry.gauge('bench_in_flight', 'Benchmark')
+    n = 100000
+
+    start = time.perf_counter()
+    for _ in range(n):
+        in_flight.inc()
+        length.observe(80)
+        previous = time.perf_counter()
+        for stage in series:
+            now = time.perf_counter()
+            stage.observe(now - previous)
+            previous = now
+        in_flight.dec()
+    elapsed = time.perf_counter() - start
+    print(f"Instrumentation per request: {elapsed / n * 1e6:.2f} µs")
@@ -0,0 +1,600 @@
+"""
+Compiled, memory-mappable model artifact.
+
+The three joblib pickles are replaced by one directory holding a JSON manifest
+and raw ``.npy`` arrays (idf, weights or support vectors, intercepts) plus the
+vocabulary as a single UTF-8 blob. Hashing vectorizers (optionally followed by
+a TfidfTransformer) have no vocabulary; only their settings and idf are stored.
+Arrays are opened with ``mmap_mode='r'`` so cold start does no copying and
+forked workers share the same pages.
+
+Weights can be exported at reduced precision (``--precision``): float32 or
+float16 copies, or int8 with one scale per class column. The scorers work on
+the compact arrays directly. export_artifact rejects a reduced-precision
+export (raising ParityError, nothing written) if accuracy or label agreement
+on ``test.csv`` drops by more than the configured tolerance.
+
+Only NumPy is needed to load an artifact; scikit-learn is imported lazily when
+a vectorizer has to be rebuilt from it.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+
+import numpy as np
+
+FORMAT_NAME = 'sentify-model'
+# Version 2 adds reduced-precision arrays; full-precision exports are still
+# written as version 1 so older readers keep loading them
+FORMAT_VERSION = 2
+DEFAULT_ARTIFACT_PATH = 'sentiment_model.artifact'
+
+MANIFEST_FILE = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.bin'
+
+PRECISIONS = ['float64', 'float32', 'float16', 'int8']
+# Labelled CSV the parity gate scores reduced-precision exports on
+DEFAULT_EVAL_DATA = 'test.csv'
+
+
+class ParityError(ValueError):
+    """A reduced-precision export drifted too far from the full-precision model"""
+
+    def __init__(self, message, result):
+        super().__init__(message)
+        self.result = result
+
+
+# Used by both inference_engine and the NumPy-only numpy_runtime
+def votes_and_ovr_scores(ovo_decision, n_classes):
+    """Turn one-vs-one decision values into libsvm votes and SVC's one-vs-rest scores"""
+    # Same arithmetic as sklearn's _ovr_decision_function, which SVC uses for
+    # decision_function_shape='ovr'. libsvm itself votes for class i only when
+    # the pair decision is strictly positive, so the two vote tables can
+    # differ on exact zeros.
+    n_samples = ovo_decision.shape[0]
+    votes = np.zeros((n_samples, n_classes))
+    ovr_votes = np.zeros((n_samples, n_classes))
+    sum_of_confidences = np.zeros((n_samples, n_classes))
+
+    k = 0
+    for i in range(n_classes):
+        for j in range(i + 1, n_classes):
+            decision = ovo_decision[:, k]
+            sum_of_confidences[:, i] += decision
+            sum_of_confidences[:, j] -= decision
+
+            positive = decision > 0
+            votes[positive, i] += 1
+            votes[~positive, j] += 1
+
+            non_negative = decision >= 0
+            ovr_votes[non_negative, i] += 1
+            ovr_votes[~non_negative, j] += 1
+            k += 1
+
+    transformed_confidences = sum_of_confidences / (3 * (np.abs(sum_of_confidences) + 1))
+    return votes, ovr_votes + transformed_confidences
+
+
+def _vectorizer_manifest(vectorizer):
+    """Describe a fitted TfidfVectorizer, HashingVectorizer or hashing + TF-IDF pipeline"""
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import Pipeline
+
+    transformer = None
+    if isinstance(vectorizer, Pipeline):
+        steps = [step for _, step in vectorizer.steps]
+        if len(steps) != 2 or not isinstance(steps[0], HashingVectorizer) \
+                or not isinstance(steps[1], TfidfTransformer):
+            raise ValueError("Only HashingVectorizer + TfidfTransformer pipelines can be exported")
+        vectorizer, transformer = steps
+        if vectorizer.norm is not None:
+            raise ValueError("Hashed counts must be left unnormalised before the TfidfTransformer")
+
+    if getattr(vectorizer, 'analyzer', None) != 'word':
+        raise ValueError("Only word-analyzer vectorizers can be exported")
+    if vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("Custom tokenizers or preprocessors cannot be exported")
+
+    stop_words = vectorizer.get_stop_words()
+    settings = {
+        'lowercase': vectorizer.lowercase,
+        'strip_accents': vectorizer.strip_accents,
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'stop_words': sorted(stop_words) if stop_words is not None else None,
+        'binary': vectorizer.binary,
+        'norm': vectorizer.norm,
+    }
+
+    if isinstance(vectorizer, HashingVectorizer):
+        settings.update({
+            'type': 'hashing',
+            'n_features': vectorizer.n_features,
+            'alternate_sign': vectorizer.alternate_sign,
+            'use_idf': False,
+            'smooth_idf': False,
+            'sublinear_tf': False,
+        })
+        if transformer is not None:
+            settings.update({
+                'norm': transformer.norm,
+                'use_idf': transformer.use_idf,
+                'smooth_idf': transformer.smooth_idf,
+                'sublinear_tf': transformer.sublinear_tf,
+            })
+        return settings
+
+    settings.update({
+        'type': 'tfidf',
+        'n_features': len(vectorizer.vocabulary_),
+        'use_idf': vectorizer.use_idf,
+        'smooth_idf': vectorizer.smooth_idf,
+        'sublinear_tf': vectorizer.sublinear_tf,
+    })
+    return settings
+
+
+def _sparse_arrays(prefix, matrix):
+    """CSR data, indices and indptr of a sparse or dense matrix under prefix_*"""
+    import scipy.sparse as sp
+    matrix = sp.csr_matrix(matrix)
+    return {
+        f'{prefix}_data': np.asarray(matrix.data, dtype=np.float64),
+        f'{prefix}_indices': np.asarray(matrix.indices, dtype=np.int32),
+        f'{prefix}_indptr': np.asarray(matrix.indptr, dtype=np.int64),
+    }
+
+
+def _classifier_arrays(model):
+    """Split an SVC, a one-vs-rest linear model or a Nystroem pipeline into a manifest entry and its arrays"""
+    from inference_engine import NystroemScorer, is_nystroem_pipeline, nystroem_kernel_params
+
+    if is_nystroem_pipeline(model):
+        nystroem = model.steps[0][1]
+        kernel, gamma, coef0, degree = nystroem_kernel_params(nystroem)
+        scorer = NystroemScorer.from_pipeline(model)
+        classifier = {
+            'type': 'nystroem',
+            'n_classes': len(model.classes_),
+            'kernel': kernel,
+            'gamma': gamma,
+            'coef0': coef0,
+            'degree': degree,
+            'n_features': int(nystroem.components_.shape[1]),
+        }
+        arrays = _sparse_arrays('components', nystroem.components_)
+        # Normalisation already folded in: (n_components, n_outputs)
+        arrays['weights'] = np.ascontiguousarray(scorer.weights, dtype=np.float64)
+        arrays['intercept'] = np.asarray(scorer.intercept, dtype=np.float64)
+        return classifier, arrays
+
+    if hasattr(model, 'coef_') and not hasattr(model, 'dual_coef_'):
+        # SGDClassifier, LinearSVC and friends: argmax of X @ coef_.T + intercept_
+        coef = model.coef_
+        coef = coef.toarray() if hasattr(coef, 'toarray') else np.asarray(coef)
+        classifier = {'type': 'ovr_linear', 'n_classes': len(model.classes_)}
+        arrays = {
+            'weights': np.ascontiguousarray(coef.T, dtype=np.float64),
+            'intercept': np.asarray(model.intercept_, dtype=np.float64),
+        }
+        return classifier, arrays
+
+    kernel = getattr(model, 'kernel', None)
+    if not hasattr(model, 'dual_coef_') or not isinstance(kernel, str) or kernel == 'precomputed':
+        raise ValueError(f"Unsupported model for export: {model!r}")
+
+    classifier = {'n_classes': len(model.classes_)}
+
+    if kernel == 'linear':
+        coef = model.coef_
+        coef = coef.toarray() if hasattr(coef, 'toarray') else np.asarray(coef)
+        classifier['type'] = 'ovo_linear'
+        arrays = {
+            # Stored as (n_features, n_pairs) so it can be used as-is from the mmap
+            'weights': np.ascontiguousarray(coef.T, dtype=np.float64),
+            'intercept': np.asarray(model.intercept_, dtype=np.float64),
+        }
+        return classifier, arrays
+
+    dual_coef = model.dual_coef_
+    dual_coef = dual_coef.toarray() if hasattr(dual_coef, 'toarray') else dual_coef
+
+    classifier.update({
+        'type': 'ovo_kernel',
+        'kernel': kernel,
+        'gamma': float(model._gamma),
+        'coef0': float(model.coef0),
+        'degree': int(model.degree),
+        'n_features': int(model.support_vectors_.shape[1]),
+    })
+    arrays = _sparse_arrays('sv', model.support_vectors_)
+    arrays.update({
+        'dual_coef': np.asarray(dual_coef, dtype=np.float64),
+        'n_support': np.asarray(model.n_support_, dtype=np.int64),
+        'intercept': np.asarray(model.intercept_, dtype=np.float64),
+    })
+    return classifier, arrays
+
+
+def _quantize_columns(weights):
+    """Symmetric int8 codes with one scale per column (class or class pair)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    scale = np.abs(weights).max(axis=0) / 127
+    scale[scale == 0] = 1.0
+    codes = np.rint(weights / scale).astype(np.int8)
+    return codes, scale
+
+
+def _quantize_idf(idf):
+    """uint8 codes spanning [min, max] of the idf weights, which are all positive"""
+    offset = float(idf.min())
+    scale = float(idf.max() - offset) / 255 or 1.0
+    codes = np.rint((idf - offset) / scale).astype(np.uint8)
+    return codes, {'offset': offset, 'scale': scale}
+
+
+def _reduce_precision(classifier, arrays, precision):
+    """Replace weights, support vectors and idf with compact arrays; returns the quantization entry"""
+    if precision == 'float64':
+        return None
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}; choose from {PRECISIONS}")
+
+    quantization = {'precision': precision}
+    if precision in ('float32', 'float16'):
+        dtype = np.dtype(precision)
+        for name in ('weights', 'sv_data', 'components_data', 'dual_coef', 'idf'):
+            if name in arrays:
+                arrays[name] = arrays[name].astype(dtype)
+        return quantization
+
+    if classifier['type'] in ('ovo_kernel', 'nystroem'):
+        # Kernel values mix every support vector coordinate; scipy's sparse
+        # products have no integer path, so there is nothing compact to score on
+        raise ValueError("int8 export supports linear models only; use float16 for kernel models")
+    arrays['weights'], arrays['weights_scale'] = _quantize_columns(arrays['weights'])
+    if 'idf' in arrays:
+        arrays['idf'], quantization['idf'] = _quantize_idf(arrays['idf'])
+    return quantization
+
+
+def _model_id(manifest, arrays, vocabulary_blob):
+    """Content hash identifying this exact model"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(manifest, sort_keys=True).encode('utf-8'))
+    for name in sorted(arrays):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    if vocabulary_blob:
+        digest.update(vocabulary_blob)
+    return digest.hexdigest()[:16]
+
+
+def _write_artifact(path, manifest, arrays, vocabulary_blob):
+    """Write manifest, arrays and vocabulary, replacing any previous artifact"""
+    manifest = dict(manifest)
+    manifest['model_id'] = _model_id(manifest, arrays, vocabulary_blob)
+    manifest['arrays'] = {
+        name: {'dtype': str(array.dtype), 'shape': list(array.shape)}
+        for name, array in arrays.items()
+    }
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+    if vocabulary_blob is not None:
+        with open(os.path.join(tmp_path, VOCABULARY_FILE), 'wb') as f:
+            f.write(vocabulary_blob)
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def _build_artifact(model, vectorizer, label_encoder, path, precision):
+    """Write the artifact for a trained classifier at the given precision, unchecked"""
+    vectorizer_manifest = _vectorizer_manifest(vectorizer)
+    classifier, arrays = _classifier_arrays(model)
+
+    vocabulary_blob = None
+    if vectorizer_manifest['type'] == 'tfidf':
+        if vectorizer.use_idf:
+            arrays['idf'] = np.asarray(vectorizer.idf_, dtype=np.float64)
+
+        # Terms in column order, one per line; n-grams never contain newlines
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+        vocabulary_blob = '\n'.join(terms).encode('utf-8')
+    elif vectorizer_manifest['use_idf']:
+        # Hashing pipeline: the TfidfTransformer holds the idf weights
+        arrays['idf'] = np.asarray(vectorizer[-1].idf_, dtype=np.float64)
+
+    quantization = _reduce_precision(classifier, arrays, precision)
+
+    labels = label_encoder.inverse_transform(model.classes_) if label_encoder is not None \
+        else model.classes_
+    manifest = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION if quantization else 1,
+        'labels': [str(label) for label in labels],
+        'vectorizer': vectorizer_manifest,
+        'classifier': classifier,
+    }
+    if quantization:
+        manifest['quantization'] = quantization
+    return _write_artifact(path, manifest, arrays, vocabulary_blob)
+
+
+def export_artifact(model, vectorizer, label_encoder, path=DEFAULT_ARTIFACT_PATH, precision='float64',
+                    eval_data=DEFAULT_EVAL_DATA, max_accuracy_drop=0.005, min_agreement=0.99):
+    """Export a trained classifier, vectorizer and label encoder as one artifact
+
+    label_encoder may be None for models trained on the label strings directly.
+    precision is one of PRECISIONS. Anything below float64 is written next to
+    path, scored against the full-precision model on eval_data with
+    check_parity, and only moved into place if it passes; otherwise it is
+    deleted and ParityError is raised. The returned manifest then carries
+    the parity result under 'parity'.
+    """
+    if precision == 'float64':
+        return _build_artifact(model, vectorizer, label_encoder, path, precision)
+
+    import pandas as pd
+    from inference_engine import InferenceEngine
+    from text_preprocessing import normalize_many
+
+    candidate_path = f"{path}.candidate"
+    manifest = _build_artifact(model, vectorizer, label_encoder, candidate_path, precision)
+    try:
+        data = pd.read_csv(eval_data, encoding='latin-1', usecols=['text', 'sentiment']).dropna()
+        reference = InferenceEngine.from_sklearn(model, vectorizer, label_encoder)
+        candidate = load_artifact(candidate_path).to_engine()
+        result = check_parity(reference, candidate, normalize_many(data['text']), data['sentiment'],
+                              max_accuracy_drop, min_agreement)
+    except Exception:
+        shutil.rmtree(candidate_path)
+        raise
+    if not result['passed']:
+        shutil.rmtree(candidate_path)
+        raise ParityError(f"{precision} export rejected: accuracy {result['reference_accuracy']:.4f} -> "
+                          f"{result['candidate_accuracy']:.4f} (max drop {max_accuracy_drop}), "
+                          f"label agreement {result['agreement']:.2%} (min {min_agreement:.2%})", result)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(candidate_path, path)
+    manifest['parity'] = result
+    return manifest
+
+
+class ModelArtifact:
+    """A loaded artifact: manifest plus memory-mapped arrays"""
+
+    def __init__(self, path, manifest, arrays, vocabulary_blob):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self._vocabulary_blob = vocabulary_blob
+        self._vocabulary = None
+
+    @property
+    def model_id(self):
+        return self.manifest['model_id']
+
+    @property
+    def labels(self):
+        return self.manifest['labels']
+
+    @property
+    def precision(self):
+        return self.manifest.get('quantization', {}).get('precision', 'float64')
+
+    @property
+    def idf(self):
+        """idf weights, decoded from uint8 codes for int8 artifacts"""
+        idf = self.arrays['idf']
+        idf_codes = self.manifest.get('quantization', {}).get('idf')
+        if idf_codes is None:
+            return idf
+        # 256 distinct values; decoding costs one float per vocabulary term
+        return idf_codes['offset'] + idf_codes['scale'] * idf.astype(np.float64)
+
+    @property
+    def vocabulary(self):
+        """Term -> column dict, built on first use from the vocabulary blob"""
+        if self._vocabulary is None:
+            terms = bytes(self._vocabulary_blob).decode('utf-8').split('\n')
+            self._vocabulary = dict(zip(terms, range(len(terms))))
+        return self._vocabulary
+
+    def to_vectorizer(self):
+        """Rebuild the sklearn vectorizer from the stored settings"""
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+        from sklearn.pipeline import make_pipeline
+
+        settings = self.manifest['vectorizer']
+        if settings['type'] == 'hashing':
+            weighted = settings['use_idf'] or settings['sublinear_tf']
+            hashing = HashingVectorizer(
+                n_features=settings['n_features'],
+                lowercase=settings['lowercase'],
+                strip_accents=settings['strip_accents'],
+                token_pattern=settings['token_pattern'],
+                ngram_range=tuple(settings['ngram_range']),
+                stop_words=settings['stop_words'],
+                binary=settings['binary'],
+                # With IDF weighting, normalisation happens after it
+                norm=None if weighted else settings['norm'],
+                alternate_sign=settings['alternate_sign'],
+            )
+            if not weighted:
+                return hashing
+
+            transformer = TfidfTransformer(
+                norm=settings['norm'],
+                use_idf=settings['use_idf'],
+                smooth_idf=settings['smooth_idf'],
+                sublinear_tf=settings['sublinear_tf'],
+            )
+            if settings['use_idf']:
+                transformer.idf_ = self.idf
+            transformer.n_features_in_ = settings['n_features']
+            return make_pipeline(hashing, transformer)
+
+        vectorizer = TfidfVectorizer(
+            vocabulary=self.vocabulary,
+            lowercase=settings['lowercase'],
+            strip_accents=settings['strip_accents'],
+            token_pattern=settings['token_pattern'],
+            ngram_range=tuple(settings['ngram_range']),
+            stop_words=settings['stop_words'],
+            binary=settings['binary'],
+            norm=settings['norm'],
+            use_idf=settings['use_idf'],
+            smooth_idf=settings['smooth_idf'],
+            sublinear_tf=settings['sublinear_tf'],
+        )
+        if settings['use_idf']:
+            vectorizer.idf_ = self.idf
+        return vectorizer
+
+    def to_scorer(self):
+        """Build the matching inference_engine scorer over the mapped arrays"""
+        from inference_engine import LinearSVCScorer, KernelSVCScorer, LinearOvrScorer, NystroemScorer
+
+        classifier = self.manifest['classifier']
+        arrays = self.arrays
+        scale = arrays.get('weights_scale')
+        if classifier['type'] == 'ovo_linear':
+            return LinearSVCScorer(arrays['weights'], arrays['intercept'], classifier['n_classes'], scale)
+        if classifier['type'] == 'ovr_linear':
+            return LinearOvrScorer(arrays['weights'], arrays['intercept'], scale)
+        if classifier['type'] == 'nystroem':
+            return NystroemScorer(
+                self._sparse_matrix('components'), arrays['weights'], arrays['intercept'],
+                classifier['kernel'], classifier['gamma'], classifier['coef0'], classifier['degree'],
+            )
+        if classifier['type'] == 'ovo_kernel':
+            support_vectors = self._sparse_matrix('sv')
+            return KernelSVCScorer(
+                support_vectors, arrays['dual_coef'], arrays['n_support'], arrays['intercept'],
+                classifier['kernel'], classifier['gamma'], classifier['coef0'], classifier['degree'],
+            )
+        raise ValueError(f"Unknown classifier type: {classifier['type']}")
+
+    def _sparse_matrix(self, prefix):
+        """CSR matrix over the mapped prefix_* arrays"""
+        import scipy.sparse as sp
+        arrays = self.arrays
+        return sp.csr_matrix(
+            (arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'], arrays[f'{prefix}_indptr']),
+            shape=(len(arrays[f'{prefix}_indptr']) - 1, self.manifest['classifier']['n_features']),
+        )
+
+    def to_engine(self):
+        """Build an InferenceEngine that scores straight from the artifact"""
+        from inference_engine import InferenceEngine
+        return InferenceEngine(self.to_vectorizer(), self.labels, self.to_scorer(), self.model_id)
+
+
+def load_artifact(path=DEFAULT_ARTIFACT_PATH, mmap_arrays=True):
+    """Load an artifact directory, memory-mapping its arrays"""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    if manifest.get('format') != FORMAT_NAME:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} artifact")
+    if manifest.get('format_version') not in range(1, FORMAT_VERSION + 1):
+        raise ValueError(
+            f"Unsupported artifact version {manifest.get('format_version')} "
+            f"(expected at most {FORMAT_VERSION})"
+        )
+
+    mmap_mode = 'r' if mmap_arrays else None
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in manifest['arrays']
+    }
+
+    vocabulary_blob = b''
+    vocabulary_path = os.path.join(path, VOCABULARY_FILE)
+    if os.path.exists(vocabulary_path) and os.path.getsize(vocabulary_path) > 0:
+        with open(vocabulary_path, 'rb') as f:
+            vocabulary_blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return ModelArtifact(path, manifest, arrays, vocabulary_blob)
+
+
+def check_parity(reference, candidate, clean_texts, labels, max_accuracy_drop=0.005, min_agreement=0.99):
+    """Compare two engines on labelled texts; passed is False if the candidate drifts too far"""
+    reference_labels, _ = reference.predict(clean_texts)
+    candidate_labels, _ = candidate.predict(clean_texts)
+    labels = np.asarray(labels)
+
+    result = {
+        'reference_accuracy': float(np.mean(reference_labels == labels)),
+        'candidate_accuracy': float(np.mean(candidate_labels == labels)),
+        'agreement': float(np.mean(reference_labels == candidate_labels)),
+    }
+    result['passed'] = (result['reference_accuracy'] - result['candidate_accuracy'] <= max_accuracy_drop
+                        and result['agreement'] >= min_agreement)
+    return result
+
+
+def _array_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith('.npy'))
+
+
+if __name__ == "__main__":
+    # Export the current joblib pickles without retraining
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the pickled model as a memory-mapped artifact")
+    parser.add_argument('output', nargs='?', default=DEFAULT_ARTIFACT_PATH,
+                        help="Artifact directory (default: %(default)s)")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help="Storage precision for weights, support vectors and idf (default: %(default)s)")
+    parser.add_argument('--eval-data', default=DEFAULT_EVAL_DATA,
+                        help="Labelled CSV for the parity gate on reduced-precision exports (default: %(default)s)")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.005,
+                        help="Largest accepted accuracy loss, as a fraction (default: %(default)s)")
+    parser.add_argument('--min-agreement', type=float, default=0.99,
+                        help="Smallest accepted share of labels matching full precision (default: %(default)s)")
+    args = parser.parse_args()
+
+    model = joblib.load('svm_sentiment_model.pkl')
+    vectorizer = joblib.load('tfidf_vectorizer.pkl')
+    label_encoder = joblib.load('label_encoder.pkl')
+
+    try:
+        manifest = export_artifact(model, vectorizer, label_encoder, args.output, args.precision,
+                                   args.eval_data, args.max_accuracy_drop, args.min_agreement)
+    except ParityError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.precision == 'float64':
+        print(f"Exported {manifest['classifier']['type']} model {manifest['model_id']} to {args.output}/")
+        sys.exit(0)
+
+    result = manifest['parity']
+    print(f"Accuracy on {args.eval_data}: {result['reference_accuracy']:.4f} (float64) -> "
+          f"{result['candidate_accuracy']:.4f} ({args.precision}); "
+          f"label agreement {result['agreement']:.2%}")
+    print(f"Exported {args.precision} {manifest['classifier']['type']} model {manifest['model_id']} "
+          f"to {args.output}/ ({_array_bytes(args.output) / 1024:.0f} KiB of arrays)")
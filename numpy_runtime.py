@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Inference on an exported model artifact with only NumPy and the standard library.
+
+Serverless functions cannot ship scikit-learn or SciPy, so this module
+reimplements what scoring needs from them: the word analyzer (accent
+stripping, token pattern, stop words, n-grams), vocabulary or murmurhash3
+feature lookup, sublinear tf, idf weighting and row normalisation, followed
+by the linear, kernel or Nystroem decision of the exported classifier.
+Sparse rows are kept as plain CSR arrays.
+
+TF-IDF features are bit-identical to TfidfVectorizer.transform, and linear
+decisions accumulate in the same order as SciPy's sparse product, so they
+match as well. Kernel decisions agree to floating-point rounding.
+
+    python numpy_runtime.py          # cold-start and latency vs the scikit-learn engine
+"""
+
+import math
+import os
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+
+from model_artifact import DEFAULT_ARTIFACT_PATH, load_artifact, votes_and_ovr_scores
+
+
+def strip_accents_unicode(text):
+    """Decompose and drop combining marks, like sklearn's strip_accents='unicode'"""
+    if text.isascii():
+        return text
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def strip_accents_ascii(text):
+    """Keep only characters with an ASCII decomposition, like strip_accents='ascii'"""
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+def murmurhash3_32(data, seed=0):
+    """Signed 32-bit MurmurHash3 (x86) of bytes, as used by HashingVectorizer"""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed & 0xffffffff
+    length = len(data)
+    blocks = length // 4
+
+    for block in range(blocks):
+        k = int.from_bytes(data[block * 4:block * 4 + 4], 'little')
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xffffffff
+        h = (h * 5 + 0xe6546b64) & 0xffffffff
+
+    tail = data[blocks * 4:]
+    if tail:
+        k = int.from_bytes(tail, 'little')
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xffffffff
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xffffffff
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+class SparseRows:
+    """CSR arrays for a batch of documents"""
+
+    def __init__(self, indptr, indices, data, n_features):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_features = n_features
+
+    @property
+    def n_rows(self):
+        return len(self.indptr) - 1
+
+    def row_ids(self):
+        """Row number of every stored value"""
+        return np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+
+
+def _normalize_rows(rows, norm):
+    """In-place row normalisation summing in stored order, like sklearn's Cython loops"""
+    data = rows.data
+    values = data.tolist()
+    indptr = rows.indptr.tolist()
+    norms = []
+    for start, end in zip(indptr, indptr[1:]):
+        total = 0.0
+        if norm == 'l2':
+            for value in values[start:end]:
+                total += value * value
+            total = math.sqrt(total)
+        else:
+            for value in values[start:end]:
+                total += abs(value)
+        norms.append(total if total != 0.0 else 1.0)
+    data /= np.repeat(norms, np.diff(rows.indptr))
+
+
+class NumpyVectorizer:
+    """TfidfVectorizer / HashingVectorizer (+ TfidfTransformer) transform from artifact settings"""
+
+    def __init__(self, settings, vocabulary=None, idf=None):
+        self.settings = settings
+        self.vocabulary = vocabulary
+        self.idf = None if idf is None else np.asarray(idf)
+        self.n_features = settings['n_features']
+        self.lowercase = settings['lowercase']
+        self.strip_accents = {
+            None: None, 'unicode': strip_accents_unicode, 'ascii': strip_accents_ascii
+        }[settings['strip_accents']]
+        self.token_pattern = re.compile(settings['token_pattern'])
+        self.stop_words = frozenset(settings['stop_words']) if settings['stop_words'] else None
+        self.min_n, self.max_n = settings['ngram_range']
+
+    def analyze(self, doc):
+        """Terms of one document, in the order sklearn's word analyzer yields them"""
+        if self.lowercase:
+            doc = doc.lower()
+        if self.strip_accents is not None:
+            doc = self.strip_accents(doc)
+        tokens = self.token_pattern.findall(doc)
+        if self.stop_words is not None:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        min_n, max_n = self.min_n, self.max_n
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+            for i in range(len(original_tokens) - n + 1):
+                tokens.append(' '.join(original_tokens[i:i + n]))
+        return tokens
+
+    def _counts(self, terms):
+        """{column: value} for one document's terms"""
+        counts = {}
+        if self.vocabulary is not None:
+            vocabulary = self.vocabulary
+            for term in terms:
+                index = vocabulary.get(term)
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+            return counts
+
+        n_features = self.n_features
+        alternate_sign = self.settings['alternate_sign']
+        for term in terms:
+            h = murmurhash3_32(term.encode('utf-8'))
+            index = (2147483647 - (n_features - 1)) % n_features if h == -2147483648 else abs(h) % n_features
+            value = -1 if alternate_sign and h < 0 else 1
+            counts[index] = counts.get(index, 0) + value
+        return counts
+
+    def transform(self, docs):
+        """SparseRows of TF-IDF (or hashed) features for a list of documents"""
+        settings = self.settings
+        indptr = [0]
+        indices = []
+        values = []
+        for doc in docs:
+            counts = self._counts(self.analyze(doc))
+            columns = sorted(counts)
+            indices.extend(columns)
+            values.extend(counts[column] for column in columns)
+            indptr.append(len(indices))
+
+        rows = SparseRows(np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int64),
+                          np.asarray(values, dtype=np.float64), self.n_features)
+        if settings['binary']:
+            rows.data.fill(1)
+        if settings['sublinear_tf']:
+            np.log(rows.data, rows.data)
+            rows.data += 1.0
+        if self.idf is not None:
+            rows.data *= self.idf[rows.indices]
+        if settings['norm'] is not None:
+            _normalize_rows(rows, settings['norm'])
+        return rows
+
+
+def sparse_dot_dense(rows, weights, scale=None):
+    """rows @ weights for a dense (n_features, k) matrix, accumulated in SciPy's order"""
+    n_rows = rows.n_rows
+    row_ids = rows.row_ids()
+    contributions = rows.data[:, None] * weights[rows.indices]
+    result = np.empty((n_rows, weights.shape[1]))
+    for k in range(weights.shape[1]):
+        result[:, k] = np.bincount(row_ids, weights=contributions[:, k], minlength=n_rows)
+    if scale is not None:
+        result *= scale
+    return result
+
+
+class SparseVectors:
+    """Stored sparse vectors (support vectors or Nystroem components) indexed by feature"""
+
+    def __init__(self, data, indices, indptr, kernel, gamma, coef0, degree):
+        self.n_vectors = len(indptr) - 1
+        self.kernel = kernel
+        self.gamma = gamma
+        self.coef0 = coef0
+        self.degree = degree
+
+        data = np.asarray(data, dtype=np.float64)
+        vector_ids = np.repeat(np.arange(self.n_vectors), np.diff(indptr))
+        self.squared_norms = np.bincount(vector_ids, weights=data * data, minlength=self.n_vectors)
+
+        # Feature-major copy so a document only visits vectors sharing its terms
+        order = np.argsort(indices, kind='stable')
+        self.feature_ptr = np.searchsorted(np.asarray(indices)[order],
+                                           np.arange(int(np.max(indices, initial=-1)) + 2))
+        self.vector_ids = vector_ids[order]
+        self.values = data[order]
+
+    def dots(self, rows):
+        """(n_rows, n_vectors) dot products with every stored vector"""
+        n_features = len(self.feature_ptr) - 1
+        row_ids = rows.row_ids()
+        known = rows.indices < n_features
+        columns, row_ids, data = rows.indices[known], row_ids[known], rows.data[known]
+
+        starts = self.feature_ptr[columns]
+        lengths = self.feature_ptr[columns + 1] - starts
+        total = int(lengths.sum())
+        # Positions of every (term, vector) pair, flattened
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        positions = offsets + np.arange(total)
+
+        pair_rows = np.repeat(row_ids, lengths)
+        products = np.repeat(data, lengths) * self.values[positions]
+        flat = np.bincount(pair_rows * self.n_vectors + self.vector_ids[positions],
+                           weights=products, minlength=rows.n_rows * self.n_vectors)
+        return flat.reshape(rows.n_rows, self.n_vectors)
+
+    def kernel_matrix(self, rows):
+        dots = self.dots(rows)
+        if self.kernel == 'linear':
+            return dots
+        if self.kernel == 'poly':
+            return (self.gamma * dots + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * dots + self.coef0)
+        if self.kernel == 'rbf':
+            x_squared_norms = np.bincount(rows.row_ids(), weights=rows.data * rows.data,
+                                          minlength=rows.n_rows)[:, None]
+            return np.exp(-self.gamma * (x_squared_norms + self.squared_norms - 2 * dots))
+        raise ValueError(f"Unsupported kernel: {self.kernel}")
+
+
+class NumpyModel:
+    """An exported model scored with NumPy only; predict() mirrors InferenceEngine.predict()"""
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+        self.labels = np.asarray(artifact.labels)
+        self.model_id = artifact.model_id
+        settings = artifact.manifest['vectorizer']
+        idf = artifact.idf if 'idf' in artifact.arrays else None
+        vocabulary = artifact.vocabulary if settings['type'] == 'tfidf' else None
+        self.vectorizer = NumpyVectorizer(settings, vocabulary, idf)
+
+        classifier = artifact.manifest['classifier']
+        arrays = artifact.arrays
+        self.kind = classifier['type']
+        self.n_classes = classifier['n_classes']
+        self.intercept = np.asarray(arrays['intercept'], dtype=np.float64)
+        self.weights = arrays.get('weights')
+        self.scale = arrays.get('weights_scale')
+        self.vectors = None
+        if self.kind == 'ovo_kernel':
+            self.vectors = SparseVectors(arrays['sv_data'], arrays['sv_indices'], arrays['sv_indptr'],
+                                         classifier['kernel'], classifier['gamma'],
+                                         classifier['coef0'], classifier['degree'])
+            self.dual_coef = np.asarray(arrays['dual_coef'], dtype=np.float64)
+            starts = np.concatenate([[0], np.cumsum(arrays['n_support'])])
+            self.class_slices = [slice(starts[i], starts[i + 1]) for i in range(self.n_classes)]
+        elif self.kind == 'nystroem':
+            self.vectors = SparseVectors(arrays['components_data'], arrays['components_indices'],
+                                         arrays['components_indptr'], classifier['kernel'],
+                                         classifier['gamma'], classifier['coef0'], classifier['degree'])
+        elif self.kind not in ('ovo_linear', 'ovr_linear'):
+            raise ValueError(f"Unknown classifier type: {self.kind}")
+
+    @classmethod
+    def load(cls, path=None):
+        """Load MODEL_ARTIFACT or the default artifact directory"""
+        return cls(load_artifact(path or os.environ.get('MODEL_ARTIFACT', DEFAULT_ARTIFACT_PATH)))
+
+    def decision(self, rows):
+        """Raw decision values: one-vs-one pairs, or one column per one-vs-rest output"""
+        if self.kind in ('ovo_linear', 'ovr_linear'):
+            return sparse_dot_dense(rows, self.weights, self.scale) + self.intercept
+        K = self.vectors.kernel_matrix(rows)
+        if self.kind == 'nystroem':
+            decision = K @ self.weights
+            return (decision * self.scale if self.scale is not None else decision) + self.intercept
+
+        if self.n_classes == 2:
+            return (K @ self.dual_coef[0] + self.intercept[0])[:, None]
+        decision = np.empty((K.shape[0], len(self.intercept)))
+        k = 0
+        for i in range(self.n_classes):
+            for j in range(i + 1, self.n_classes):
+                si, sj = self.class_slices[i], self.class_slices[j]
+                decision[:, k] = (K[:, si] @ self.dual_coef[j - 1, si]
+                                  + K[:, sj] @ self.dual_coef[i, sj]
+                                  + self.intercept[k])
+                k += 1
+        return decision
+
+    def class_scores(self, clean_texts):
+        """(class indices, per-class scores); binary models give one signed score per text"""
+        decision = self.decision(self.vectorizer.transform(clean_texts))
+        if decision.shape[1] == 1:
+            decision = decision.ravel()
+            return (decision > 0).astype(np.intp), decision
+        if self.kind in ('ovr_linear', 'nystroem'):
+            return np.argmax(decision, axis=1), decision
+
+        votes, ovr_scores = votes_and_ovr_scores(decision, self.n_classes)
+        return np.argmax(votes, axis=1), ovr_scores
+
+    def predict(self, clean_texts):
+        """Score a list of preprocessed texts, returning (sentiments, confidences)"""
+        indices, scores = self.class_scores(clean_texts)
+        confidences = scores if scores.ndim == 1 else scores.max(axis=1)
+        return self.labels[indices], confidences
+
+
+if __name__ == "__main__":
+    # Cold start in fresh interpreters: import + load + first prediction
+    import subprocess
+
+    snippets = {
+        'numpy runtime': "from numpy_runtime import NumpyModel; m = NumpyModel.load(); m.predict(['i love it'])",
+        'sklearn engine': "from inference_engine import load_engine; e = load_engine(); e.predict(['i love it'])",
+    }
+    for name, snippet in snippets.items():
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', snippet], check=True)
+            timings.append(time.perf_counter() - start)
+        modules = subprocess.run(
+            [sys.executable, '-c', snippet + "; import sys; print(len(sys.modules))"],
+            check=True, capture_output=True, text=True).stdout.strip()
+        print(f"{name:<15} cold start {min(timings) * 1000:6.0f} ms (best of 5), {modules} modules loaded")
+
+    import pandas as pd
+    from text_preprocessing import normalize_many
+
+    clean_texts = normalize_many(pd.read_csv('test.csv', encoding='latin-1', usecols=['text'])
+                                 ['text'].dropna())
+    from inference_engine import load_engine
+    for name, model in [('numpy runtime', NumpyModel.load()), ('sklearn engine', load_engine())]:
+        model.predict(clean_texts[:1])
+        start = time.perf_counter()
+        for text in clean_texts[:1000]:
+            model.predict([text])
+        single_us = (time.perf_counter() - start) / 1000 * 1e6
+        start = time.perf_counter()
+        model.predict(clean_texts)
+        rate = len(clean_texts) / (time.perf_counter() - start)
+        print(f"{name:<15} {single_us:6.0f} µs per request, {rate:,.0f} texts/sec in one batch")
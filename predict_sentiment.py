@@ -1,62 +1,191 @@
-import joblib
-import re
+import argparse
+import hashlib
+import json
+import os
+import signal
+import socket
+import socketserver
 import sys
+import tempfile
 
-def preprocess_text(text):
-    """Clean and preprocess text data"""
-    # Remove HTML tags
-    text = re.sub(r'<.*?>', '', str(text))
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    # Remove punctuation and special characters
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Convert to lowercase
-    text = text.lower()
-    return text
+from text_preprocessing import preprocess_text
+
+def default_socket_path():
+    """Per-user daemon socket: $SENTIFY_SOCKET, else in $XDG_RUNTIME_DIR or a private temp directory"""
+    if os.environ.get('SENTIFY_SOCKET'):
+        return os.environ['SENTIFY_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or os.path.join(
+        tempfile.gettempdir(), f'sentify-{os.getuid()}')
+    return os.path.join(runtime_dir, 'sentify.sock')
+
+# Unix socket used by the warm daemon (--serve) and by clients that find it
+DEFAULT_SOCKET_PATH = default_socket_path()
+
+# Files load_engine() hashes into the model id when there is no artifact
+PICKLE_PATHS = ['svm_sentiment_model.pkl', 'tfidf_vectorizer.pkl', 'label_encoder.pkl']
+
+# Process-level model cache, filled on first use
+_engine = None
 
 def load_model():
-    """Load the trained model and vectorizer"""
+    """Load the trained model (compiled artifact if present, otherwise the pickles)"""
+    # Imported here so daemon clients never pay for numpy/scikit-learn
+    from inference_engine import load_engine
     try:
-        model = joblib.load('svm_sentiment_model.pkl')
-        vectorizer = joblib.load('tfidf_vectorizer.pkl')
-        label_encoder = joblib.load('label_encoder.pkl')
-        return model, vectorizer, label_encoder
+        return load_engine()
     except Exception as e:
         print(f"Error loading model: {e}")
-        return None, None, None
+        return None
+
+def get_model():
+    """Return the cached model, loading it on first call"""
+    global _engine
+    if _engine is None:
+        _engine = load_model()
+    return _engine
+
+def local_model_id():
+    """The model_id load_model() would give, read without importing numpy/scikit-learn"""
+    artifact_path = os.environ.get('MODEL_ARTIFACT', 'sentiment_model.artifact')
+    if os.path.isdir(artifact_path):
+        with open(os.path.join(artifact_path, 'manifest.json')) as f:
+            return json.load(f)['model_id']
+    digest = hashlib.sha256()
+    for path in PICKLE_PATHS:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
 
 def predict_sentiment(text):
     """Predict sentiment for given text"""
-    # Load model
-    model, vectorizer, label_encoder = load_model()
+    # Load model (once per process)
+    engine = get_model()
     
-    if model is None:
+    if engine is None:
         return "Error: Model not found. Please train the model first."
     
     try:
         # Preprocess text
         clean_text = preprocess_text(text)
         
-        # Vectorize
-        text_tfidf = vectorizer.transform([clean_text])
+        # Vectorize and predict
+        sentiments, _ = engine.predict([clean_text])
         
-        # Predict
-        prediction = model.predict(text_tfidf)[0]
-        
-        # Convert back to original label
-        sentiment = label_encoder.inverse_transform([prediction])[0]
-        
-        return sentiment
+        return str(sentiments[0])
         
     except Exception as e:
         return f"Error predicting sentiment: {e}"
 
+class PredictionRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON-encoded text per line in, one JSON result per line out"""
+
+    def handle(self):
+        # Clients only trust answers from the model they would load themselves
+        model_id = get_model().model_id
+        for line in self.rfile:
+            try:
+                text = json.loads(line)
+                response = {'sentiment': predict_sentiment(text), 'model_id': model_id}
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                response = {'error': 'Invalid JSON data', 'model_id': model_id}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+def is_private(socket_path):
+    """True if only this user can create, replace or own the socket at socket_path"""
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        directory_stat = os.stat(directory)
+        socket_stat = os.lstat(socket_path) if os.path.lexists(socket_path) else None
+    except OSError:
+        return False
+    if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & 0o022:
+        return False
+    return socket_stat is None or socket_stat.st_uid == os.getuid()
+
+def daemon_is_running(socket_path):
+    """True if something accepts connections on socket_path"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+    except OSError:
+        return False
+    return True
+
+def serve(socket_path=DEFAULT_SOCKET_PATH):
+    """Keep the model warm and answer predictions on a Unix socket"""
+    if get_model() is None:
+        print("Failed to load models. Please train the model first.")
+        return
+
+    # Another user must not be able to swap the socket for their own daemon
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+    if not is_private(socket_path):
+        print(f"Refusing to serve on {socket_path}: its directory is writable by other users "
+              "or it belongs to someone else")
+        return
+
+    # A leftover socket file from a crashed daemon would make bind() fail
+    if os.path.exists(socket_path):
+        if daemon_is_running(socket_path):
+            print(f"A daemon is already listening on {socket_path}")
+            return
+        os.unlink(socket_path)
+
+    # Turn SIGTERM into a normal exit so the socket file is cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, PredictionRequestHandler) as server:
+        os.chmod(socket_path, 0o600)
+        # An idle client connection must not hold up shutdown
+        server.daemon_threads = True
+        print(f"Sentiment daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+def predict_via_daemon(text, socket_path=DEFAULT_SOCKET_PATH, model_id=None):
+    """Ask a running daemon for a prediction
+
+    Returns None, so the caller scores in-process, if no daemon is running,
+    the socket is not private to this user, or the daemon serves a model
+    other than model_id (by default the one this process would load).
+    """
+    if not is_private(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(json.dumps(text).encode('utf-8') + b'\n')
+            response = json.loads(client.makefile('rb').readline())
+        if model_id is None:
+            model_id = local_model_id()
+    except (FileNotFoundError, ConnectionError, json.JSONDecodeError, OSError):
+        return None
+    if response.get('model_id') != model_id:
+        return None
+    return response.get('sentiment', response.get('error'))
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        text = " ".join(sys.argv[1:])
-        result = predict_sentiment(text)
+    parser = argparse.ArgumentParser(description="Predict sentiment for a piece of text")
+    parser.add_argument('text', nargs='*', help="Text to analyze")
+    parser.add_argument('--serve', action='store_true',
+                        help="Run as a warm daemon on a Unix socket")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH,
+                        help="Daemon socket path (default: %(default)s)")
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="Always load the model in this process")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.socket)
+    elif args.text:
+        text = " ".join(args.text)
+        result = None if args.no_daemon else predict_via_daemon(text, args.socket)
+        if result is None:
+            result = predict_sentiment(text)
         print(result)
     else:
         print("Usage: python predict_sentiment.py 'Your text here'")
@@ -0,0 +1,94 @@
+"""
+In-process cache of prediction results keyed on normalised text.
+
+Keys are a hash of the model version plus the ``preprocess_text`` output, so
+retweets and copy-paste duplicates that clean to the same string share one
+entry. The cache is size-bounded (LRU), entries can optionally expire after a
+TTL, and it empties itself when a different model version is set.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with optional TTL and hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=10000, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Seconds-valued clock for TTL expiry; tests pass a fake one
+        self.clock = clock
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def set_model_version(self, model_version):
+        """Switch to a new model; entries from any other model are dropped"""
+        with self._lock:
+            if model_version != self.model_version:
+                self._entries.clear()
+                self.model_version = model_version
+
+    def _key(self, clean_text):
+        payload = f"{self.model_version}\0{clean_text}".encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def get(self, clean_text):
+        """Return the cached result for clean_text, or None"""
+        if self.maxsize <= 0:
+            return None
+        key = self._key(clean_text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, clean_text, value):
+        """Store a result, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        key = self._key(clean_text)
+        expires_at = self.clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for the /health endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'model_version': self.model_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,100 @@
+"""
+Keyword lexicon sentiment analyser shared by the Vercel function (api/predict.py)
+and the cascade in app.py (cascade.py).
+
+Importing this builds the lexicon automaton and nothing else, so callers that
+only need the word lists or the rule-based analyser don't load a model.
+"""
+
+from lexicon_matcher import LexiconMatcher
+
+# Word lists for the rule-based analyser. Matching is by substring, so
+# 'love' also counts 'loved' and 'lovely'.
+POSITIVE_WORDS = [
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'love', 'fantastic', 
+    'awesome', 'happy', 'perfect', 'beautiful', 'brilliant', 'outstanding', 
+    'superb', 'marvelous', 'delighted', 'thrilled', 'excited', 'pleased', 
+    'satisfied', 'joy', 'cheerful', 'optimistic', 'grateful', 'blessed',
+    'incredible', 'magnificent', 'spectacular', 'phenomenal', 'exceptional',
+    'best', 'better', 'positive', 'nice', 'lovely'
+]
+
+NEGATIVE_WORDS = [
+    'bad', 'terrible', 'awful', 'hate', 'horrible', 'disappointed', 'worst', 
+    'sad', 'angry', 'frustrated', 'disgusting', 'annoying', 'boring', 
+    'stupid', 'ugly', 'nasty', 'rude', 'mean', 'cruel', 'harsh', 'bitter',
+    'depressed', 'miserable', 'unhappy', 'upset', 'worried', 'concerned',
+    'terrible', 'dreadful', 'appalling', 'shocking', 'outrageous',
+    'worse', 'negative', 'poor', 'lacking'
+]
+
+NEUTRAL_INDICATORS = [
+    'okay', 'fine', 'alright', 'normal', 'average', 'standard', 'typical',
+    'usual', 'regular', 'moderate', 'fair', 'adequate', 'acceptable'
+]
+
+EMOTIONS = {
+    'Positive': ['joy', 'satisfaction', 'optimism', 'happiness'],
+    'Negative': ['disappointment', 'frustration', 'concern', 'dissatisfaction'],
+    'Neutral': ['calm', 'balanced', 'informative', 'objective']
+}
+
+# Built once at import; scores all three lists in one pass over the words
+SENTIMENT_LEXICON = LexiconMatcher({
+    'positive': POSITIVE_WORDS,
+    'negative': NEGATIVE_WORDS,
+    'neutral': NEUTRAL_INDICATORS
+})
+
+def word_analysis(text):
+    """Lexicon word counts, reported alongside either analyser"""
+    counts, total_words = SENTIMENT_LEXICON.count_words(text)
+    return {
+        'positive_words': counts['positive'],
+        'negative_words': counts['negative'],
+        'neutral_words': counts['neutral'],
+        'total_words': total_words
+    }
+
+def analyze_sentiment_simple(text):
+    """Simple rule-based sentiment analysis"""
+    counts, total_words = SENTIMENT_LEXICON.count_words(text)
+    positive_score = counts['positive']
+    negative_score = counts['negative']
+    neutral_score = counts['neutral']
+    
+    total_sentiment_words = positive_score + negative_score + neutral_score
+    
+    # Calculate confidence based on sentiment word density
+    if total_words > 0:
+        sentiment_density = total_sentiment_words / total_words
+        base_confidence = min(0.6 + (sentiment_density * 0.3), 0.95)
+    else:
+        base_confidence = 0.5
+    
+    # Determine sentiment
+    if positive_score > negative_score and positive_score > neutral_score:
+        sentiment = 'Positive'
+        confidence = base_confidence + (positive_score - max(negative_score, neutral_score)) * 0.05
+    elif negative_score > positive_score and negative_score > neutral_score:
+        sentiment = 'Negative'
+        confidence = base_confidence + (negative_score - max(positive_score, neutral_score)) * 0.05
+    else:
+        sentiment = 'Neutral'
+        confidence = base_confidence
+    emotions = EMOTIONS[sentiment]
+    
+    # Ensure confidence is within bounds
+    confidence = min(max(confidence, 0.5), 0.98)
+    
+    return {
+        'sentiment': sentiment,
+        'confidence': round(confidence, 3),
+        'emotions': emotions[:3],  # Return top 3 emotions
+        'word_analysis': {
+            'positive_words': positive_score,
+            'negative_words': negative_score,
+            'neutral_words': neutral_score,
+            'total_words': total_words
+        }
+    }
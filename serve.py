@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Pre-fork production launcher for the Flask API in app.py.
+
+The master process loads the model once, freezes the garbage collector so
+the loaded objects are never written to again, binds the listening socket
+and forks N workers. Workers share the model pages copy-on-write and accept
+connections from the shared socket. A worker that exits unexpectedly is
+replaced. Workers handle requests on threads, so a long-lived
+/predict/stream connection does not stop a worker from answering other
+requests; --no-threads serves one request at a time and refuses streams.
+Send SIGUSR1 to the master to log per-worker RSS/PSS, and
+SIGTERM/SIGINT to shut everything down.
+
+Usage:
+    python serve.py --workers 4 --port 5000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import app as flask_app
+
+# A worker dying sooner than this after starting counts as a crash loop
+MIN_WORKER_LIFETIME = 1.0
+
+
+def worker_memory(pid):
+    """RSS and PSS (proportional, shared pages split between sharers) in MiB"""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Dirty'):
+                    memory[field.lower()] = int(value.split()[0]) / 1024.0
+    except OSError:
+        pass
+    return memory
+
+
+def run_worker(listener, threaded):
+    """Serve requests from the inherited socket until told to stop"""
+    from werkzeug.serving import make_server
+
+    from line_stream import StreamingRequestHandler
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    if not threaded:
+        # An open stream would hold the only thread, so /health and /predict would time out
+        flask_app.STREAMS_ENABLED = False
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, flask_app.app, threaded=threaded, fd=listener.fileno(),
+                         request_handler=StreamingRequestHandler)
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+class Master:
+    """Keeps N forked workers alive on one shared listening socket"""
+
+    def __init__(self, listener, workers, threaded=True):
+        self.listener = listener
+        self.num_workers = workers
+        self.threaded = threaded
+        self.workers = {}
+        self.running = True
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.listener, self.threaded)
+        self.workers[pid] = time.monotonic()
+        print(f"Worker {pid} started")
+
+    def report_memory(self, signum=None, frame=None):
+        total_pss = 0.0
+        for pid in list(self.workers) + [os.getpid()]:
+            memory = worker_memory(pid)
+            total_pss += memory.get('pss', 0.0)
+            role = 'master' if pid == os.getpid() else 'worker'
+            print(f"{role} {pid}: RSS {memory.get('rss', 0):.1f} MiB, "
+                  f"PSS {memory.get('pss', 0):.1f} MiB, "
+                  f"shared {memory.get('shared_clean', 0) + memory.get('shared_dirty', 0):.1f} MiB, "
+                  f"private dirty {memory.get('private_dirty', 0):.1f} MiB")
+        print(f"Total PSS: {total_pss:.1f} MiB across {len(self.workers)} workers")
+        sys.stdout.flush()
+
+    def stop(self, signum=None, frame=None):
+        self.running = False
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.report_memory)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            started = self.workers.pop(pid, None)
+            if started is None or not self.running:
+                continue
+
+            print(f"Worker {pid} exited with status {status}; restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                # Avoid a tight fork loop if workers die immediately
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+        self.listener.close()
+        print("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork launcher for the sentiment API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core)")
+    parser.add_argument('--threaded', dest='threaded', action='store_true', default=True,
+                        help="Handle requests on threads inside each worker (default)")
+    parser.add_argument('--no-threads', dest='threaded', action='store_false',
+                        help="One request at a time per worker; /predict/stream is refused")
+    parser.add_argument('--backlog', type=int, default=2048)
+    args = parser.parse_args()
+
+    print("Starting Sentiment Analysis API (pre-fork)...")
+    if not flask_app.load_models():
+        print("Failed to load models. Please train the model first.")
+        sys.exit(1)
+
+    # Warm the model so lazily built state is created before forking
+    flask_app.engine.predict(['warm up'])
+    # Move everything loaded so far out of the collector's reach; otherwise
+    # the first GC pass in each worker writes to (and copies) every page
+    gc.collect()
+    gc.freeze()
+
+    listener = socket.socket(socket.AF_INET6 if ':' in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(args.backlog)
+    listener.set_inheritable(True)
+
+    print(f"Listening on {args.host}:{args.port} with {args.workers} workers "
+          f"(master pid {os.getpid()}, SIGUSR1 for memory report)")
+    Master(listener, args.workers, args.threaded).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -36,14 +36,18 @@ const analyzeSentiment = async (text) => {
       throw new Error(data.error || 'Analysis failed')
     }
     
+    // The SVM's confidence is a decision score (as on /predict), not a 0-1 share
+    const isScore = data.model === 'svm'
+
     // Transform API response to match the UI expectations
     return {
       sentiment: data.sentiment,
       confidence: data.confidence,
+      isScore,
       emotions: data.emotions,
       wordAnalysis: data.word_analysis,
-      // Create scores object for compatibility
-      scores: {
+      // Create scores object for compatibility (lexicon shares only)
+      scores: isScore ? null : {
         positive: data.sentiment === 'Positive' ? data.confidence : (1 - data.confidence) * 0.4,
         negative: data.sentiment === 'Negative' ? data.confidence : (1 - data.confidence) * 0.4,
         neutral: data.sentiment === 'Neutral' ? data.confidence : (1 - data.confidence) * 0.2
@@ -368,7 +372,9 @@ const Model = () => {
                                   <div>
                                     <h3 className="font-semibold text-lg">{message.content.sentiment}</h3>
                                     <p className="text-sm opacity-80">
-                                      Confidence: {(message.content.confidence * 100).toFixed(1)}%
+                                      {message.content.isScore
+                                        ? `Score: ${message.content.confidence.toFixed(2)}`
+                                        : `Confidence: ${(message.content.confidence * 100).toFixed(1)}%`}
                                     </p>
                                   </div>
                                 </div>
@@ -376,6 +382,7 @@ const Model = () => {
                             )}
 
                             {/* Detailed Scores */}
+                            {message.content.scores && (
                             <div className="grid grid-cols-3 gap-3">
                               <div className="card-dark p-3 text-center">
                                 <div className="text-green-400 font-semibold">
@@ -396,6 +403,7 @@ const Model = () => {
                                 <div className="text-xs text-gray-400 mt-1">Negative</div>
                               </div>
                             </div>
+                            )}
 
                             {/* Emotions */}
                             <div>
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Streaming evaluation of the sentiment model on labelled CSV files of any size.
+
+The file is read in chunks and each chunk is scored and reduced to a
+confusion matrix, so memory use depends on the chunk size rather than the
+number of rows. Partial matrices from worker processes are added together
+and precision, recall and F1 are derived from the final counts, giving the
+same model_stats.json as generate_visualizations.py:
+
+    python streaming_evaluation.py test.csv
+    python streaming_evaluation.py big_labelled.csv --workers 8 --output-dir /tmp/eval
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from generate_visualizations import save_model_stats
+from text_preprocessing import normalize_many
+
+_engine = None
+
+
+def init_worker(artifact_path=None):
+    """Load the model once per worker process"""
+    global _engine
+    from inference_engine import load_engine
+    _engine = load_engine(artifact_path)
+
+
+def _engine_labels():
+    return [str(label) for label in _engine.labels]
+
+
+def iter_labelled_chunks(path, chunk_size, text_column='text', label_column='sentiment'):
+    """Yield (texts, labels) lists for each chunk, skipping rows with a missing value"""
+    reader = pd.read_csv(path, encoding='latin-1', usecols=[text_column, label_column],
+                         chunksize=chunk_size)
+    for chunk in reader:
+        chunk = chunk.dropna()
+        yield chunk[text_column].tolist(), chunk[label_column].astype(str).tolist()
+
+
+def confusion_counts(texts, labels):
+    """Score one chunk, returning (confusion matrix, rows with an unknown label)"""
+    n_classes = len(_engine.labels)
+    label_index = {label: i for i, label in enumerate(_engine.labels)}
+    y_true = np.array([label_index.get(label, -1) for label in labels], dtype=np.int64)
+    known = y_true >= 0
+
+    cm = np.zeros((n_classes, n_classes), dtype=np.int64)
+    if known.any():
+        clean_texts = normalize_many(text for text, keep in zip(texts, known) if keep)
+        y_pred, _ = _engine.scorer.score(_engine.vectorizer.transform(clean_texts))
+        cm += np.bincount(y_true[known] * n_classes + np.asarray(y_pred, dtype=np.int64),
+                          minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+    return cm, int((~known).sum())
+
+
+def _score_chunk(chunk):
+    return confusion_counts(*chunk)
+
+
+def report_from_confusion_matrix(cm, labels):
+    """Per-class and averaged metrics in classification_report(output_dict=True) form"""
+    cm = np.asarray(cm, dtype=np.float64)
+    true_positives = np.diag(cm)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total = support.sum()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        # Same formula as sklearn, so results agree to the last bit
+        f1 = np.where(support + predicted > 0, 2 * true_positives / (support + predicted), 0.0)
+
+    report = {}
+    for i, label in enumerate(labels):
+        report[str(label)] = {
+            'precision': float(precision[i]),
+            'recall': float(recall[i]),
+            'f1-score': float(f1[i]),
+            'support': float(support[i])
+        }
+    report['accuracy'] = float(true_positives.sum() / total) if total else 0.0
+    report['macro avg'] = {
+        'precision': float(precision.mean()),
+        'recall': float(recall.mean()),
+        'f1-score': float(f1.mean()),
+        'support': float(total)
+    }
+    report['weighted avg'] = {
+        'precision': float(np.average(precision, weights=support)) if total else 0.0,
+        'recall': float(np.average(recall, weights=support)) if total else 0.0,
+        'f1-score': float(np.average(f1, weights=support)) if total else 0.0,
+        'support': float(total)
+    }
+    return report
+
+
+def sentiment_counts_from_confusion_matrix(cm, labels):
+    """True-label counts, most frequent first like Series.value_counts()"""
+    counts = {str(label): int(count) for label, count in zip(labels, np.asarray(cm).sum(axis=1))}
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def evaluate_stream(path, chunk_size=50000, workers=1, artifact_path=None,
+                    text_column='text', label_column='sentiment'):
+    """Confusion matrix, labels and unknown-label row count for a labelled CSV"""
+    chunks = iter_labelled_chunks(path, chunk_size, text_column, label_column)
+    start_time = time.perf_counter()
+    cm = None
+    skipped = 0
+    labels = None
+
+    def merge(result):
+        nonlocal cm, skipped
+        partial, unknown = result
+        cm = partial if cm is None else cm + partial
+        skipped += unknown
+        rows = int(cm.sum())
+        elapsed = time.perf_counter() - start_time
+        print(f"  {rows:,} rows ({rows / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    if workers == 1:
+        init_worker(artifact_path)
+        labels = _engine_labels()
+        for chunk in chunks:
+            merge(confusion_counts(*chunk))
+    else:
+        # At most two chunks per worker in flight keeps memory bounded
+        max_in_flight = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(artifact_path,)) as pool:
+            labels = pool.submit(_engine_labels).result()
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+
+    if cm is None:
+        cm = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    return cm, labels, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the model on a labelled CSV in constant memory")
+    parser.add_argument('input', nargs='?', default='test.csv',
+                        help="CSV with text and label columns (default: %(default)s)")
+    parser.add_argument('--output-dir', default='src/assets/visualizations',
+                        help="Where model_stats.json is written (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="Rows per chunk (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes scoring chunks (default: %(default)s)")
+    parser.add_argument('--artifact', default=None,
+                        help="Model artifact directory (default: MODEL_ARTIFACT or the pickles)")
+    parser.add_argument('--text-column', default='text')
+    parser.add_argument('--label-column', default='sentiment')
+    args = parser.parse_args()
+
+    print(f"🔮 Evaluating {args.input}...")
+    started = time.perf_counter()
+    cm, labels, skipped = evaluate_stream(args.input, args.chunk_size, args.workers, args.artifact,
+                                          args.text_column, args.label_column)
+    elapsed = time.perf_counter() - started
+
+    report = report_from_confusion_matrix(cm, labels)
+    os.makedirs(args.output_dir, exist_ok=True)
+    model_stats = save_model_stats(report, cm, sentiment_counts_from_confusion_matrix(cm, labels),
+                                   args.output_dir)
+
+    print(f"💾 Model statistics written to {args.output_dir}/model_stats.json")
+    if skipped:
+        print(f"⚠️  Skipped {skipped:,} rows with a label the model does not know")
+    print(f"📊 Overall Accuracy: {model_stats['overall_accuracy']:.1%}")
+    print(f"🔢 Total Samples: {model_stats['total_samples']:,}")
+    print(f"⏱️  Finished in {elapsed:.1f}s ({model_stats['total_samples'] / max(elapsed, 1e-9):,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
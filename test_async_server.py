@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the ASGI server: micro-batching and parity with the Flask routes
+"""
+
+import asyncio
+import json
+
+import app as flask_app
+import async_server
+from metrics import CONTENT_TYPE
+
+
+async def call(method, path, payload=None):
+    """(status, headers, body) from one request to the ASGI application"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    received = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            received['status'] = message['status']
+            received['headers'] = dict(message['headers'])
+        else:
+            received['body'] = received.get('body', b'') + message['body']
+
+    await async_server.application({'type': 'http', 'method': method, 'path': path}, receive, send)
+    return received['status'], received['headers'], received['body']
+
+
+class RecordingEngine:
+    """Real engine that remembers how many rows each predict_matrix call scored"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.calls = []
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def predict_matrix(self, X):
+        self.calls.append(X.shape[0])
+        return self.engine.predict_matrix(X)
+
+
+def with_batcher(batcher, coroutine):
+    """Run coroutine with async_server.batcher swapped for batcher, stopping it afterwards"""
+    original = async_server.batcher
+    async_server.batcher = batcher
+
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await batcher.stop()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        async_server.batcher = original
+
+
+def test_concurrent_requests_share_one_predict_matrix_call():
+    """Requests arriving together are vectorised and scored in a single pass"""
+    assert flask_app.load_models()
+    engine = flask_app.engine
+    recording = RecordingEngine(engine)
+    flask_app.engine = recording
+    flask_app.prediction_cache.clear()
+    texts = [f'I love this so much {i}' for i in range(8)] + ['worst day ever']
+    batcher = async_server.MicroBatcher(flask_app.score_clean_texts, max_batch_size=64, max_wait_ms=200)
+
+    async def requests():
+        return await asyncio.gather(*(call('POST', '/predict', {'text': text}) for text in texts))
+
+    try:
+        responses = with_batcher(batcher, requests())
+    finally:
+        flask_app.engine = engine
+
+    assert recording.calls == [len(texts)]
+    assert batcher.batches == 1 and batcher.requests == len(texts)
+    expected = engine.predict([flask_app.preprocess_text(text) for text in texts])
+    for (status, _, body), sentiment, confidence in zip(responses, *expected):
+        result = json.loads(body)
+        assert status == 200 and result['success']
+        assert (result['sentiment'], result['confidence']) == (sentiment, float(confidence))
+
+
+def test_flask_routes_are_served_or_refused_clearly():
+    """/predict/batch matches the Flask app, /metrics is Prometheus text, /predict/stream says why not"""
+    assert flask_app.load_models()
+    payload = {'items': [{'id': 'a', 'text': 'I love this'}, '', 'worst day ever']}
+    batcher = async_server.MicroBatcher(flask_app.score_clean_texts)
+
+    async def requests():
+        return (await call('POST', '/predict/batch', payload), await call('GET', '/metrics'),
+                await call('POST', '/predict/stream'), await call('GET', '/nowhere'))
+
+    batch, metrics, stream, missing = with_batcher(batcher, requests())
+    flask_batch = flask_app.app.test_client().post('/predict/batch', json=payload).get_json()
+    assert batch[0] == 200 and json.loads(batch[2]) == flask_batch
+
+    assert metrics[0] == 200 and metrics[1][b'content-type'] == CONTENT_TYPE.encode('ascii')
+    assert b'sentify_request_seconds_bucket{route="/predict/batch",le="+Inf"}' in metrics[2]
+
+    assert stream[0] == 404 and 'use app.py or serve.py' in json.loads(stream[2])['error']
+    assert missing[0] == 404 and json.loads(missing[2])['error'] == 'Not found'
+
+
+def test_websocket_connections_are_refused():
+    """A websocket scope is closed at the handshake instead of failing on a missing method"""
+    sent = []
+
+    async def receive():
+        return {'type': 'websocket.connect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(async_server.application({'type': 'websocket', 'path': '/predict'}, receive, send))
+    assert sent == [{'type': 'websocket.close', 'code': 1000}]
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_one_predict_matrix_call()
+    test_flask_routes_are_served_or_refused_clearly()
+    test_websocket_connections_are_refused()
+    print("✅ Async server batches concurrent requests and serves the Flask routes")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for resuming an interrupted bulk-scoring run
+"""
+
+import csv
+import os
+
+import bulk_score
+
+TEXTS = ['I love this so much!', 'worst day ever', 'The bus leaves at noon', '',
+         'what a great concert', 'this is awful', 'meeting moved to 3pm', 'best coffee in town',
+         'my phone died again', 'happy birthday to my best friend', 'so tired of this weather']
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_input(path, texts=TEXTS):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['textID', 'text'])
+        writer.writerows([f'id{i}', text] for i, text in enumerate(texts))
+
+
+def interrupt_after(chunks, *args, **kwargs):
+    """Run bulk_score but stop right after the given number of chunks are checkpointed"""
+    original_save = bulk_score.save_checkpoint
+    saved = 0
+
+    def save_then_stop(output_path, checkpoint):
+        nonlocal saved
+        original_save(output_path, checkpoint)
+        saved += 1
+        if saved == chunks:
+            raise Interrupted()
+
+    bulk_score.save_checkpoint = save_then_stop
+    try:
+        bulk_score.bulk_score(*args, **kwargs)
+        assert False, "scoring was not interrupted"
+    except Interrupted:
+        pass
+    finally:
+        bulk_score.save_checkpoint = original_save
+
+
+def test_resumed_run_matches_clean_run(tmp_path):
+    """Stopping after N chunks and resuming writes the same bytes as one uninterrupted run"""
+    input_path = str(tmp_path / 'tweets.csv')
+    write_input(input_path)
+
+    for extension in ('csv', 'jsonl'):
+        clean_path = str(tmp_path / f'clean.{extension}')
+        bulk_score.bulk_score(input_path, clean_path, chunk_size=3, workers=1)
+        with open(clean_path, 'rb') as f:
+            expected = f.read()
+
+        for chunks in (1, 2, 3):
+            output_path = str(tmp_path / f'resumed_{chunks}.{extension}')
+            interrupt_after(chunks, input_path, output_path, chunk_size=3, workers=1)
+            assert os.path.exists(bulk_score.checkpoint_path(output_path))
+            # Part of a chunk written after the last checkpoint is dropped on resume
+            with open(output_path, 'a') as f:
+                f.write('partial,row\n')
+
+            rows = bulk_score.bulk_score(input_path, output_path, chunk_size=3, workers=1, resume=True)
+            assert rows == len(TEXTS) - 3 * chunks
+            with open(output_path, 'rb') as f:
+                assert f.read() == expected
+            assert not os.path.exists(bulk_score.checkpoint_path(output_path))
+
+
+def test_resume_rejects_a_different_run(tmp_path):
+    """A checkpoint written for another input or chunk size is refused instead of being applied"""
+    input_path = str(tmp_path / 'tweets.csv')
+    other_path = str(tmp_path / 'other.csv')
+    write_input(input_path)
+    write_input(other_path, TEXTS[::-1])
+    output_path = str(tmp_path / 'scored.csv')
+    interrupt_after(1, input_path, output_path, chunk_size=3, workers=1)
+
+    for path, chunk_size in ((other_path, 3), (input_path, 4)):
+        try:
+            bulk_score.bulk_score(path, output_path, chunk_size=chunk_size, workers=1, resume=True)
+            assert False, "mismatched checkpoint was accepted"
+        except ValueError as e:
+            assert 'different input or chunk size' in str(e)
+    # The refused runs left the checkpoint alone
+    assert bulk_score.load_checkpoint(output_path, input_path, 3)['chunks_done'] == 1
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_resumed_run_matches_clean_run(pathlib.Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_resume_rejects_a_different_run(pathlib.Path(tmp_dir))
+    print("✅ Bulk scoring resumes byte-for-byte")
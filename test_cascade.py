@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the lexicon-then-SVM cascade and its threshold calibration
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from cascade import NEVER, calibrate, cascade_predict, fit_confidence_map, lexicon_scores
+from inference_engine import load_engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'sentiment_model.artifact')
+
+
+class RecordingEngine:
+    """Real engine that remembers what it was asked to score"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.batches = []
+
+    def predict(self, clean_texts):
+        self.batches.append(list(clean_texts))
+        return self.engine.predict(clean_texts)
+
+
+def test_only_uncertain_texts_reach_the_model():
+    """Confident lexicon matches are answered directly; the rest go to the model in one batch"""
+    engine = load_engine(ARTIFACT_PATH)
+    recording = RecordingEngine(engine)
+    clean_texts = ['i love this it is amazing and great', 'the bus leaves at noon',
+                   'worst awful terrible day', 'we met at the station']
+    thresholds = {'min_confidence': 0.7, 'min_density': 0.3}
+
+    sentiments, confidences, cheap = cascade_predict(recording, clean_texts, thresholds)
+
+    assert cheap.tolist() == [True, False, True, False]
+    assert recording.batches == [['the bus leaves at noon', 'we met at the station']]
+    assert sentiments[0] == 'positive' and sentiments[2] == 'negative'
+    svm_sentiments, svm_confidences = engine.predict(['the bus leaves at noon', 'we met at the station'])
+    assert [sentiments[1], sentiments[3]] == svm_sentiments.tolist()
+    assert [confidences[1], confidences[3]] == svm_confidences.tolist()
+
+    # Thresholds that never trust the lexicon reproduce the model exactly
+    sentiments, _, cheap = cascade_predict(engine, clean_texts, NEVER)
+    assert not cheap.any()
+    assert sentiments == engine.predict(clean_texts)[0].tolist()
+
+
+def test_calibration_respects_accuracy_budget():
+    """The chosen thresholds never lose more than allowed and widen as the budget grows"""
+    clean_texts = ['love it great', 'hate this awful', 'good but bad', 'just a day', 'okay fine',
+                   'great great day', 'bad news', 'nice and good', 'awful bus', 'the cat']
+    y_true = np.array(['positive', 'negative', 'negative', 'neutral', 'neutral',
+                       'positive', 'negative', 'positive', 'neutral', 'neutral'], dtype=object)
+    svm_sentiments = y_true.copy()
+    svm_sentiments[[0, 3]] = 'negative'
+    lexicon_sentiments, confidences, densities = lexicon_scores(clean_texts)
+
+    fractions = []
+    for max_loss in (0.0, 0.1, 0.3):
+        result = calibrate(lexicon_sentiments, confidences, densities, svm_sentiments, y_true, max_loss)
+        cheap = (confidences >= result['min_confidence']) & (densities >= result['min_density'])
+        accuracy = np.where(cheap, lexicon_sentiments == y_true, svm_sentiments == y_true).mean()
+        assert result['svm_accuracy'] - accuracy <= max_loss + 1e-12
+        assert abs(result['accuracy'] - accuracy) < 1e-12
+        assert result['cheap_fraction'] == cheap.mean()
+        fractions.append(result['cheap_fraction'])
+    assert fractions == sorted(fractions) and fractions[-1] > 0
+
+
+def test_both_paths_report_mapped_confidence():
+    """With confidence maps, lexicon and SVM answers share one 0-1 accuracy scale"""
+    engine = load_engine(ARTIFACT_PATH)
+    clean_texts = ['i love this it is amazing and great', 'the bus leaves at noon']
+    raw_lexicon = lexicon_scores(clean_texts)[1][0]
+    raw_svm = engine.predict(clean_texts[1:])[1][0]
+    thresholds = {
+        'min_confidence': 0.7, 'min_density': 0.3,
+        'confidence_maps': {
+            'lexicon': fit_confidence_map(np.array([0.5, 0.98]), np.array([False, True])),
+            'svm': {'x': [raw_svm - 1, raw_svm + 1], 'y': [0.2, 0.6]}
+        }
+    }
+    _, confidences, cheap = cascade_predict(engine, clean_texts, thresholds)
+    assert cheap.tolist() == [True, False]
+    assert np.isclose(confidences[0], np.interp(raw_lexicon, [0.5, 0.98], [0.0, 1.0]))
+    assert np.isclose(confidences[1], 0.4)
+
+
+def test_app_reports_the_answering_path():
+    """Cascade mode tags every result with its path; stale thresholds fall back to the SVM scale"""
+    import app
+
+    try:
+        app.PREDICTION_MODE = 'cascade'
+        assert app.load_models()
+        assert 'confidence_maps' in app.cascade_thresholds
+        client = app.app.test_client()
+        texts = ['I love this, it is amazing and great', 'The bus leaves at noon']
+        results = client.post('/predict/batch', json={'items': texts}).get_json()['results']
+        assert [result['answered_by'] for result in results] == ['lexicon', 'svm']
+        assert all(0.0 <= result['confidence'] <= 1.0 for result in results)
+        single = client.post('/predict', json={'text': texts[0]}).get_json()
+        assert (single['answered_by'], single['confidence']) == ('lexicon', results[0]['confidence'])
+
+        os.environ['CASCADE_THRESHOLDS'] = os.devnull + '.missing'
+        assert app.load_models() and app.cascade_thresholds == NEVER
+        result = client.post('/predict', json={'text': texts[0]}).get_json()
+        assert result['answered_by'] == 'svm'
+        assert result['confidence'] == float(app.engine.predict([app.preprocess_text(texts[0])])[1][0])
+    finally:
+        os.environ.pop('CASCADE_THRESHOLDS', None)
+        app.PREDICTION_MODE = 'svm'
+        app.cascade_thresholds = None
+        assert app.load_models()
+    assert 'answered_by' not in client.post('/predict', json={'text': texts[0]}).get_json()
+
+
+def test_default_mode_does_not_load_the_cascade():
+    """app.py imports the cascade (and the lexicon) only when PREDICTION_MODE=cascade"""
+    check = ("import sys, app; app.load_models(); "
+             "print(sorted(m for m in ('cascade', 'sentiment_lexicon', 'api.predict') if m in sys.modules))")
+    for mode, expected in (('svm', "[]"), ('cascade', "['cascade', 'sentiment_lexicon']")):
+        env = dict(os.environ, PREDICTION_MODE=mode)
+        output = subprocess.run([sys.executable, '-c', check], cwd=BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        assert output.splitlines()[-1] == expected, (mode, output)
+
+
+if __name__ == "__main__":
+    test_only_uncertain_texts_reach_the_model()
+    test_calibration_respects_accuracy_budget()
+    test_both_paths_report_mapped_confidence()
+    test_app_reports_the_answering_path()
+    test_default_mode_does_not_load_the_cascade()
+    print("✅ Cascade escalates only uncertain texts within its accuracy budget")
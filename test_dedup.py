@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for duplicate grouping and deduplicated bulk and batch scoring
+"""
+
+import csv
+
+from dedup import group_duplicates, jaccard, shingles
+
+ORIGINAL = 'just finished the best concert of my life and i cant stop smiling about it'
+TEXTS = [
+    ORIGINAL,
+    'rt fan2231 ' + ORIGINAL,
+    'the bus was late again and i missed my first class this morning',
+    ORIGINAL,
+    ORIGINAL + ' bitly',
+    'the bus was late again and i missed my',
+    'i love this',
+]
+
+
+def test_groups_exact_and_near_duplicates():
+    """Retweets and trailing handles join the original; the first text represents each group"""
+    groups, representatives = group_duplicates(TEXTS, threshold=0.8)
+    assert groups.tolist() == [0, 0, 1, 0, 0, 2, 3]
+    assert representatives.tolist() == [0, 2, 5, 6]
+    assert jaccard(shingles(TEXTS[2]), shingles(TEXTS[5])) < 0.8
+
+    groups, representatives = group_duplicates(TEXTS, threshold=1.0)
+    assert groups.tolist() == [0, 1, 2, 0, 3, 4, 5]
+    assert representatives.tolist() == [0, 1, 2, 4, 5, 6]
+
+    # A lower threshold joins the shortened bus text as well
+    groups, _ = group_duplicates(TEXTS, threshold=0.6)
+    assert groups[5] == groups[2]
+
+
+def test_bulk_and_batch_scoring_broadcast_group_results(tmp_path):
+    """Deduplicated scoring gives every member its representative's result and reports the ratio"""
+    import app
+    import bulk_score
+
+    input_path = tmp_path / 'tweets.csv'
+    with open(input_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['textID', 'text'])
+        writer.writerows([i, text] for i, text in enumerate(TEXTS + ['']))
+    output_path = tmp_path / 'scored.csv'
+    bulk_score.bulk_score(str(input_path), str(output_path), workers=1,
+                          dedup_threshold=0.8, dedup_check=10)
+    with open(output_path) as f:
+        rows = list(csv.DictReader(f))
+    assert {rows[i]['sentiment'] for i in (0, 1, 3, 4)} == {rows[0]['sentiment']}
+    assert rows[7]['error']
+
+    assert app.load_models()
+    response = app.app.test_client().post('/predict/batch', json={'items': TEXTS, 'dedup': True}).get_json()
+    assert response['dedup'] == {'texts': 7, 'scored': 4, 'threshold': 0.8}
+    results = response['results']
+    assert {(r['sentiment'], r['confidence']) for r in (results[0], results[1], results[3], results[4])} \
+        == {(results[0]['sentiment'], results[0]['confidence'])}
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_groups_exact_and_near_duplicates()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_bulk_and_batch_scoring_broadcast_group_results(pathlib.Path(tmp_dir))
+    print("✅ Duplicate groups are scored once and broadcast")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk cleaned text and feature matrix cache
+"""
+
+import os
+
+import joblib
+
+from feature_cache import FeatureCache
+from text_preprocessing import normalize_many
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TEXTS = ['I LOVE this!! http://t.co/x', 'meh <b>okay</b>', 'café naïve — fine', '']
+
+
+def test_cached_results_match_uncached(tmp_path):
+    """Second calls are hits and return exactly what preprocessing and transform produce"""
+    cache = FeatureCache(str(tmp_path))
+    vectorizer = joblib.load(os.path.join(BASE_DIR, 'tfidf_vectorizer.pkl'))
+
+    for _ in range(2):
+        clean_texts = cache.clean_texts(TEXTS)
+        X = cache.features(clean_texts, vectorizer)
+
+    assert cache.hits == 2
+    assert clean_texts == normalize_many(TEXTS)
+    assert (X != vectorizer.transform(clean_texts)).nnz == 0
+
+
+def test_changed_inputs_miss(tmp_path):
+    """Different texts or a differently fitted vectorizer never reuse an entry"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    cache = FeatureCache(str(tmp_path))
+    first = TfidfVectorizer().fit(['good day', 'bad day'])
+    second = TfidfVectorizer().fit(['good night', 'bad night'])
+
+    cache.features(['good day'], first)
+    X = cache.features(['good day'], second)
+    cache.clean_texts(['a b'])
+    assert cache.clean_texts(['a c']) == ['a c']
+
+    assert cache.hits == 0
+    assert (X != second.transform(['good day'])).nnz == 0
+
+
+def test_eviction_keeps_directory_under_limit(tmp_path):
+    """Least recently used entries are removed once the size limit is exceeded"""
+    cache = FeatureCache(str(tmp_path), max_bytes=1)
+    cache.clean_texts(['first text'])
+    cache.clean_texts(['second text'])
+    assert len(os.listdir(tmp_path)) == 0
+
+    cache.max_bytes = 10 ** 6
+    for i in range(5):
+        cache.clean_texts([f'text {i}'])
+    entry_size = max(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    assert len(os.listdir(tmp_path)) == 2
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in [test_cached_results_match_uncached, test_changed_inputs_miss,
+                 test_eviction_keeps_directory_under_limit]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(pathlib.Path(tmp_dir))
+    print("✅ Feature cache returns fresh, exact results")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for resuming out-of-core incremental training
+"""
+
+import csv
+import os
+
+import incremental_training
+from incremental_training import iter_labelled_chunks, load_checkpoint, new_state, train_on_files
+
+ROWS = [
+    ('I love this so much', 'positive'),
+    ('worst day ever\nand it is still raining', 'negative'),
+    ('The bus leaves at noon', 'neutral'),
+    ('what a great\nconcert\nlast night', 'positive'),
+    ('this is awful', 'negative'),
+    ('meeting moved to 3pm', 'neutral'),
+    ('best coffee in town', 'positive'),
+]
+
+
+def write_csv(path):
+    """Labelled CSV whose quoted texts span several physical lines"""
+    with open(path, 'w', newline='', encoding='latin-1') as f:
+        writer = csv.writer(f)
+        writer.writerow(['text', 'sentiment'])
+        writer.writerows(ROWS)
+
+
+def test_skip_rows_counts_records_not_lines(tmp_path):
+    """Resuming after N records yields exactly the records after them, whatever the chunk size"""
+    path = tmp_path / 'multiline.csv'
+    write_csv(path)
+    full = [text for texts, _, _ in iter_labelled_chunks(path, 2) for text in texts]
+    assert len(full) == len(ROWS)
+
+    for chunk_size in (1, 2, 3, 10):
+        for skip in range(len(ROWS) + 1):
+            chunks = list(iter_labelled_chunks(path, chunk_size, skip))
+            assert [text for texts, _, _ in chunks for text in texts] == full[skip:]
+            assert sum(rows for _, _, rows in chunks) == len(ROWS) - skip
+
+
+def test_interrupted_training_resumes_at_the_next_record(tmp_path):
+    """A run stopped after a checkpoint picks up at the first record it had not trained on"""
+    path = tmp_path / 'multiline.csv'
+    write_csv(path)
+    checkpoint_path = str(tmp_path / 'model.ckpt')
+
+    class Interrupted(Exception):
+        pass
+
+    original_save = incremental_training.save_checkpoint
+
+    def save_then_stop(state, checkpoint):
+        original_save(state, checkpoint)
+        raise Interrupted()
+
+    incremental_training.save_checkpoint = save_then_stop
+    try:
+        train_on_files(new_state(n_features=2 ** 10), [path], chunk_size=2,
+                       checkpoint_path=checkpoint_path, checkpoint_every=2)
+        assert False, "training was not interrupted"
+    except Interrupted:
+        pass
+    finally:
+        incremental_training.save_checkpoint = original_save
+
+    state = load_checkpoint(checkpoint_path)
+    progress = state['files'][os.path.abspath(path)]
+    assert (progress['rows'], progress['done'], state['chunks_seen']) == (4, False, 2)
+
+    state = train_on_files(state, [path], chunk_size=2, checkpoint_path=checkpoint_path)
+    progress = state['files'][os.path.abspath(path)]
+    assert progress['done'] and progress['rows'] == state['rows_seen'] == len(ROWS)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_skip_rows_counts_records_not_lines(pathlib.Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_interrupted_training_resumes_at_the_next_record(pathlib.Path(tmp_dir))
+    print("✅ Incremental training resumes at the right record")
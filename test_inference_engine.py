@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the single-pass inference engine against the trained SVC
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.svm import SVC
+
+from inference_engine import (InferenceEngine, LinearSVCScorer, KernelSVCScorer, DecisionFunctionScorer,
+                              LinearOvrScorer, NystroemScorer)
+from model_artifact import ParityError, check_parity, export_artifact, load_artifact
+from text_preprocessing import preprocess_text
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_artifacts():
+    """Load the pickled model, vectorizer and label encoder"""
+    model = joblib.load(os.path.join(BASE_DIR, 'svm_sentiment_model.pkl'))
+    vectorizer = joblib.load(os.path.join(BASE_DIR, 'tfidf_vectorizer.pkl'))
+    label_encoder = joblib.load(os.path.join(BASE_DIR, 'label_encoder.pkl'))
+    return model, vectorizer, label_encoder
+
+
+def load_test_texts():
+    """Cleaned texts and labels from test.csv"""
+    test_data = pd.read_csv(os.path.join(BASE_DIR, 'test.csv'), index_col=0, encoding='latin-1')
+    test_data = test_data.dropna(subset=['text', 'sentiment'])
+    return [preprocess_text(text) for text in test_data['text']], test_data['sentiment'].tolist()
+
+
+def expected_output(model, X, label_encoder):
+    """What app.py returned before: predict() plus max of decision_function()"""
+    sentiments = label_encoder.inverse_transform(model.predict(X))
+    decisions = model.decision_function(X)
+    confidences = decisions if decisions.ndim == 1 else decisions.max(axis=1)
+    return sentiments, confidences
+
+
+def test_engine_matches_svc_on_test_csv():
+    """The compiled engine reproduces SVC labels and confidences on test.csv"""
+    model, vectorizer, label_encoder = load_artifacts()
+    clean_texts, _ = load_test_texts()
+    X = vectorizer.transform(clean_texts)
+
+    expected_sentiments, expected_confidences = expected_output(model, X, label_encoder)
+
+    engine = InferenceEngine.from_sklearn(model, vectorizer, label_encoder)
+    if model.kernel == 'linear':
+        assert isinstance(engine.scorer, LinearSVCScorer)
+    sentiments, confidences = engine.predict(clean_texts)
+
+    assert list(sentiments) == list(expected_sentiments)
+    assert np.allclose(confidences, expected_confidences)
+
+
+def test_fallback_matches_rbf_svc():
+    """Non-linear kernels score once through decision_function and agree with predict()"""
+    _, vectorizer, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    X = vectorizer.transform(clean_texts)
+    y = label_encoder.transform(labels)
+
+    rbf_model = SVC(kernel='rbf', C=1, gamma='scale').fit(X[:1500], y[:1500])
+    X_eval = X[1500:]
+
+    expected_sentiments, expected_confidences = expected_output(rbf_model, X_eval, label_encoder)
+
+    engine = InferenceEngine.from_sklearn(rbf_model, vectorizer, label_encoder)
+    assert isinstance(engine.scorer, DecisionFunctionScorer)
+    sentiments, confidences = engine.predict_matrix(X_eval)
+
+    assert list(sentiments) == list(expected_sentiments)
+    assert np.allclose(confidences, expected_confidences)
+
+
+def test_artifact_round_trip_matches_svc(tmp_path):
+    """An engine loaded from the exported artifact scores like the pickled SVC"""
+    model, vectorizer, label_encoder = load_artifacts()
+    clean_texts, _ = load_test_texts()
+    expected_sentiments, expected_confidences = expected_output(
+        model, vectorizer.transform(clean_texts), label_encoder
+    )
+
+    export_artifact(model, vectorizer, label_encoder, str(tmp_path / 'model.artifact'))
+    engine = load_artifact(str(tmp_path / 'model.artifact')).to_engine()
+    sentiments, confidences = engine.predict(clean_texts)
+
+    assert list(sentiments) == list(expected_sentiments)
+    assert np.allclose(confidences, expected_confidences)
+
+
+def test_kernel_artifact_matches_rbf_svc(tmp_path):
+    """Support vectors exported from an rbf SVC reproduce its decisions"""
+    _, vectorizer, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    X = vectorizer.transform(clean_texts)
+    y = label_encoder.transform(labels)
+
+    rbf_model = SVC(kernel='rbf', C=1, gamma='scale').fit(X[:1500], y[:1500])
+    X_eval = X[1500:]
+    expected_sentiments, expected_confidences = expected_output(rbf_model, X_eval, label_encoder)
+
+    export_artifact(rbf_model, vectorizer, label_encoder, str(tmp_path / 'rbf.artifact'))
+    engine = load_artifact(str(tmp_path / 'rbf.artifact')).to_engine()
+    assert isinstance(engine.scorer, KernelSVCScorer)
+    sentiments, confidences = engine.predict_matrix(X_eval)
+
+    assert list(sentiments) == list(expected_sentiments)
+    assert np.allclose(confidences, expected_confidences)
+
+
+def test_hashing_sgd_artifact_matches_model(tmp_path):
+    """Incrementally trained hashing + SGD models export and score like the model itself"""
+    from incremental_training import make_classifier, make_vectorizer, LABELS
+
+    clean_texts, labels = load_test_texts()
+    vectorizer = make_vectorizer()
+    model = make_classifier()
+    X = vectorizer.transform(clean_texts)
+    for start in range(0, 1500, 500):
+        model.partial_fit(X[start:start + 500], labels[start:start + 500], classes=LABELS)
+    X_eval = X[1500:]
+
+    export_artifact(model, vectorizer, None, str(tmp_path / 'sgd.artifact'))
+    engine = load_artifact(str(tmp_path / 'sgd.artifact')).to_engine()
+    assert isinstance(engine.scorer, LinearOvrScorer)
+    sentiments, confidences = engine.predict(clean_texts[1500:])
+
+    assert list(sentiments) == list(model.predict(X_eval))
+    assert np.allclose(confidences, model.decision_function(X_eval).max(axis=1))
+
+
+def test_hashing_tfidf_artifact_matches_svc(tmp_path):
+    """A linear SVC on hashed features with IDF weights round-trips through the artifact"""
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+
+    _, _, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    vectorizer = make_pipeline(
+        HashingVectorizer(n_features=2 ** 16, ngram_range=(1, 2), stop_words='english',
+                          alternate_sign=False, norm=None),
+        TfidfTransformer()
+    )
+    X = vectorizer.fit_transform(clean_texts[:1500])
+    model = SVC(kernel='linear', C=1).fit(X, label_encoder.transform(labels[:1500]))
+    expected_sentiments, expected_confidences = expected_output(
+        model, vectorizer.transform(clean_texts[1500:]), label_encoder
+    )
+
+    export_artifact(model, vectorizer, label_encoder, str(tmp_path / 'hashing.artifact'))
+    engine = load_artifact(str(tmp_path / 'hashing.artifact')).to_engine()
+    sentiments, confidences = engine.predict(clean_texts[1500:])
+
+    assert list(sentiments) == list(expected_sentiments)
+    assert np.allclose(confidences, expected_confidences)
+
+
+def test_nystroem_artifact_matches_pipeline(tmp_path):
+    """A Nystroem approximation of an rbf SVC scores like the sklearn pipeline, from pickle or artifact"""
+    from kernel_approximation import approximate_kernel
+
+    _, vectorizer, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    X = vectorizer.transform(clean_texts)
+    y = label_encoder.transform(labels)
+
+    rbf_model = SVC(kernel='rbf', C=1, gamma='scale').fit(X[:1500], y[:1500])
+    model = approximate_kernel(rbf_model, X[:1500], y[:1500], n_components=200)
+    X_eval = X[1500:]
+    expected_sentiments = label_encoder.inverse_transform(model.predict(X_eval))
+    expected_confidences = model.decision_function(X_eval).max(axis=1)
+
+    export_artifact(model, vectorizer, label_encoder, str(tmp_path / 'nystroem.artifact'))
+    for engine in [InferenceEngine.from_sklearn(model, vectorizer, label_encoder),
+                   load_artifact(str(tmp_path / 'nystroem.artifact')).to_engine()]:
+        assert isinstance(engine.scorer, NystroemScorer)
+        sentiments, confidences = engine.predict_matrix(X_eval)
+        assert list(sentiments) == list(expected_sentiments)
+        assert np.allclose(confidences, expected_confidences)
+
+
+def test_reduced_precision_artifacts_pass_parity_gate(tmp_path):
+    """float16 and int8 exports score from compact arrays and stay within the default gate"""
+    model, vectorizer, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    reference = InferenceEngine.from_sklearn(model, vectorizer, label_encoder)
+
+    for precision, dtype in [('float16', np.float16), ('int8', np.int8)]:
+        path = str(tmp_path / f'{precision}.artifact')
+        manifest = export_artifact(model, vectorizer, label_encoder, path, precision,
+                                   os.path.join(BASE_DIR, 'test.csv'))
+        assert manifest['parity']['passed']
+        artifact = load_artifact(path)
+        engine = artifact.to_engine()
+        assert artifact.arrays['weights'].dtype == dtype
+        assert engine.scorer.weights.dtype == dtype
+
+        result = check_parity(reference, engine, clean_texts, labels)
+        assert result['passed'], result
+
+
+def test_export_refuses_artifact_failing_parity(tmp_path):
+    """A reduced-precision export that fails the gate raises and leaves the old artifact alone"""
+    model, vectorizer, label_encoder = load_artifacts()
+    path = str(tmp_path / 'model.artifact')
+    model_id = export_artifact(model, vectorizer, label_encoder, path)['model_id']
+
+    try:
+        # Full agreement can't be beaten, so a stricter minimum always fails
+        export_artifact(model, vectorizer, label_encoder, path, 'int8',
+                        os.path.join(BASE_DIR, 'test.csv'), min_agreement=1.01)
+    except ParityError as e:
+        assert not e.result['passed'] and e.result['agreement'] <= 1.0
+    else:
+        raise AssertionError("int8 export passed an impossible parity gate")
+
+    assert load_artifact(path).model_id == model_id and load_artifact(path).precision == 'float64'
+    assert sorted(os.listdir(tmp_path)) == ['model.artifact']
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_engine_matches_svc_on_test_csv()
+    test_fallback_matches_rbf_svc()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_artifact_round_trip_matches_svc(pathlib.Path(tmp_dir))
+        test_kernel_artifact_matches_rbf_svc(pathlib.Path(tmp_dir))
+        test_hashing_sgd_artifact_matches_model(pathlib.Path(tmp_dir))
+        test_hashing_tfidf_artifact_matches_svc(pathlib.Path(tmp_dir))
+        test_nystroem_artifact_matches_pipeline(pathlib.Path(tmp_dir))
+        test_reduced_precision_artifacts_pass_parity_gate(pathlib.Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_export_refuses_artifact_failing_parity(pathlib.Path(tmp_dir))
+    print("✅ Inference engine matches SVC output")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the Aho-Corasick lexicon matcher behind analyze_sentiment_simple
+"""
+
+import csv
+import os
+import random
+
+from sentiment_lexicon import (analyze_sentiment_simple, POSITIVE_WORDS, NEGATIVE_WORDS,
+                               NEUTRAL_INDICATORS)
+from lexicon_matcher import LexiconMatcher
+from text_preprocessing import preprocess_text
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def reference_analyze_sentiment_simple(text):
+    """The original list-scanning implementation"""
+    words = text.lower().split()
+
+    positive_score = sum(1 for word in words if any(pos in word for pos in POSITIVE_WORDS))
+    negative_score = sum(1 for word in words if any(neg in word for neg in NEGATIVE_WORDS))
+    neutral_score = sum(1 for word in words if any(neu in word for neu in NEUTRAL_INDICATORS))
+
+    total_words = len(words)
+    total_sentiment_words = positive_score + negative_score + neutral_score
+
+    if total_words > 0:
+        sentiment_density = total_sentiment_words / total_words
+        base_confidence = min(0.6 + (sentiment_density * 0.3), 0.95)
+    else:
+        base_confidence = 0.5
+
+    if positive_score > negative_score and positive_score > neutral_score:
+        sentiment = 'Positive'
+        confidence = base_confidence + (positive_score - max(negative_score, neutral_score)) * 0.05
+        emotions = ['joy', 'satisfaction', 'optimism', 'happiness']
+    elif negative_score > positive_score and negative_score > neutral_score:
+        sentiment = 'Negative'
+        confidence = base_confidence + (negative_score - max(positive_score, neutral_score)) * 0.05
+        emotions = ['disappointment', 'frustration', 'concern', 'dissatisfaction']
+    else:
+        sentiment = 'Neutral'
+        confidence = base_confidence
+        emotions = ['calm', 'balanced', 'informative', 'objective']
+
+    confidence = min(max(confidence, 0.5), 0.98)
+
+    return {
+        'sentiment': sentiment,
+        'confidence': round(confidence, 3),
+        'emotions': emotions[:3],
+        'word_analysis': {
+            'positive_words': positive_score,
+            'negative_words': negative_score,
+            'neutral_words': neutral_score,
+            'total_words': total_words
+        }
+    }
+
+
+def load_texts():
+    """Raw and cleaned tweets from test.csv"""
+    with open(os.path.join(BASE_DIR, 'test.csv'), encoding='latin-1', newline='') as f:
+        texts = [row['text'] for row in csv.DictReader(f)]
+    return texts + [preprocess_text(text) for text in texts]
+
+
+def test_matches_reference_on_test_csv():
+    """Same sentiment, confidence and word_analysis counts on every tweet"""
+    for text in load_texts():
+        assert analyze_sentiment_simple(text) == reference_analyze_sentiment_simple(text), text
+
+
+def test_substring_semantics():
+    """Terms match inside longer words, overlapping terms and mixed case"""
+    for text in ['', 'LOVELY unloved meanwhile', 'notbadatall okayish', 'worsening betterment',
+                 'fairly unhappy but fine', 'disappointedly grateful joyful']:
+        assert analyze_sentiment_simple(text) == reference_analyze_sentiment_simple(text), text
+
+
+def test_large_lexicon_matches_naive_scan():
+    """Thousands of terms give the same counts as any(term in word)"""
+    rng = random.Random(7)
+    letters = 'abcdefghij'
+    lexicons = {
+        name: [''.join(rng.choice(letters) for _ in range(rng.randint(2, 6))) for _ in range(3000)]
+        for name in ['a', 'b', 'c']
+    }
+    matcher = LexiconMatcher(lexicons)
+
+    for _ in range(300):
+        words = [''.join(rng.choice(letters) for _ in range(rng.randint(1, 10)))
+                 for _ in range(rng.randint(0, 15))]
+        text = ' '.join(words)
+        counts, total_words = matcher.count_words(text)
+        assert total_words == len(words)
+        for name, terms in lexicons.items():
+            assert counts[name] == sum(1 for word in words if any(term in word for term in terms))
+
+
+if __name__ == "__main__":
+    test_matches_reference_on_test_csv()
+    test_substring_semantics()
+    test_large_lexicon_matches_naive_scan()
+    print("✅ Lexicon matcher matches the original analyser")
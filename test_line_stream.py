@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for line splitting, batching and the /predict/stream endpoint
+"""
+
+import http.client
+import io
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from line_stream import OVERLONG, ChunkedInput, LineReader, StreamingRequestHandler, read_lines
+
+
+class TrickleStream(io.BytesIO):
+    """Byte stream whose readline returns at most a few bytes per call, as a slow socket does"""
+
+    def readline(self, size=-1):
+        return super().readline(min(size, 3) if size >= 0 else 3)
+
+
+def test_read_lines_bounds_line_length():
+    """Lines may arrive in pieces; oversized lines are reported without being buffered"""
+    body = b'first line\nsecond\n' + b'x' * 30 + b'\n' + b'y' * 12 + b'\nlast'
+    expected = [b'first line', b'second', OVERLONG, b'y' * 12, b'last']
+    assert list(read_lines(io.BytesIO(body), max_line_bytes=12)) == expected
+    assert list(read_lines(TrickleStream(body), max_line_bytes=12)) == expected
+    assert list(read_lines(io.BytesIO(b'a\nb\n\n' + b'z' * 13), max_line_bytes=4)) == [b'a', b'b', b'', OVERLONG]
+
+
+def test_reader_batches_every_line_once():
+    """Lines come out in order in batches of at most max_batch_size"""
+    body = b''.join(b'line %d\n' % i for i in range(1000))
+    reader = LineReader(io.BytesIO(body), max_buffered_lines=16).start()
+    batches = list(reader.batches(max_batch_size=64, max_wait=0.05))
+    assert max(len(batch) for batch in batches) <= 64
+    assert [line for batch in batches for line in batch] == [b'line %d' % i for i in range(1000)]
+
+
+def test_stream_endpoint_scores_each_line():
+    """Raw and NDJSON bodies give one result per non-blank line, errors included"""
+    import app
+
+    assert app.load_models()
+    client = app.app.test_client()
+    expected = [app.score_clean_texts([app.preprocess_text(text)])[0][:2]
+                for text in ('I love this', 'worst day ever')]
+
+    body = 'I love this\n\nworst day ever\n' + 'x' * (app.MAX_LINE_BYTES + 1) + '\n'
+    response = client.post('/predict/stream', data=body, content_type='text/plain')
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result['id'] for result in results] == [0, 2, 3]
+    assert [(r['sentiment'], r['confidence']) for r in results[:2]] == expected
+    assert not results[2]['success']
+
+    body = '{"id": "a", "text": "I love this"}\n"worst day ever"\nnot json\n'
+    response = client.post('/predict/stream', data=body, content_type='application/x-ndjson',
+                           headers={'Accept': 'text/event-stream'})
+    assert response.mimetype == 'text/event-stream'
+    events = [json.loads(event[len('data: '):]) for event in response.get_data(as_text=True).split('\n\n')
+              if event]
+    assert [event['id'] for event in events] == ['a', 1, 2]
+    assert [(e['sentiment'], e['confidence']) for e in events[:2]] == expected
+    assert events[2]['error'] == 'Invalid JSON line'
+
+
+def test_chunked_input_reads_stop_at_chunk_ends():
+    """Reads never wait on a later chunk; lines split across chunks still come out whole"""
+    body = b'6\r\nab\ncde\r\n5;ext=1\r\nf\ng\nh\r\n0\r\nTrailer: x\r\n\r\nNEXT REQUEST'
+    stream = io.BytesIO(body)
+    chunked = ChunkedInput(stream)
+    assert [chunked.readline(100) for _ in range(5)] == [b'ab\n', b'cde', b'f\n', b'g\n', b'h']
+    assert chunked.readline(100) == b'' and stream.read() == b'NEXT REQUEST'
+    assert list(read_lines(ChunkedInput(io.BytesIO(body)), max_line_bytes=8)) == [b'ab', b'cdef', b'g', b'h']
+    assert ChunkedInput(io.BytesIO(body)).read() == b'ab\ncdef\ng\nh'
+
+
+def serve_in_thread(request_handler):
+    from werkzeug.serving import make_server
+
+    import app
+
+    assert app.load_models()
+    server = make_server('127.0.0.1', 0, app.app, threaded=True, request_handler=request_handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_live_stream_answers_each_line_as_it_arrives():
+    """Over a real server a chunked line is answered before the next one is sent"""
+    from werkzeug.serving import WSGIRequestHandler
+
+    for request_handler in (WSGIRequestHandler, StreamingRequestHandler):
+        server = serve_in_thread(request_handler)
+        try:
+            with socket.create_connection(('127.0.0.1', server.port), timeout=3) as connection:
+                connection.sendall(b'POST /predict/stream HTTP/1.1\r\nHost: localhost\r\n'
+                                   b'Content-Type: text/plain\r\nTransfer-Encoding: chunked\r\n\r\n')
+                received = b''
+                for sent, text in enumerate((b'I love this so much\n', b'worst day ever\n'), 1):
+                    connection.sendall(b'%x\r\n%s\r\n' % (len(text), text))
+                    started = time.monotonic()
+                    # The body is still open, so a result can only come from the line just sent
+                    while received.count(b'"sentiment"') < sent:
+                        chunk = connection.recv(4096)
+                        assert chunk
+                        received += chunk
+                    assert time.monotonic() - started < 1.0
+                connection.sendall(b'0\r\n\r\n')
+        finally:
+            server.shutdown()
+        assert b'"id": 0' in received and b'"id": 1' in received
+
+
+def test_streaming_handler_serves_other_routes():
+    """Content-Length bodies read through BodyInput give the usual /predict responses"""
+    server = serve_in_thread(StreamingRequestHandler)
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=3)
+        for _ in range(2):
+            # Keep-alive: the first body must be read exactly to its end
+            connection.request('POST', '/predict', body=json.dumps({'text': 'I love this'}),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            assert response.status == 200 and json.loads(response.read())['success']
+        connection.close()
+    finally:
+        server.shutdown()
+
+
+def test_serve_py_answers_health_while_a_stream_is_open():
+    """A pre-fork worker holding an open stream still answers other requests"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    master = subprocess.Popen([sys.executable, 'serve.py', '--workers', '1', '--host', '127.0.0.1',
+                               '--port', str(port)], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            assert master.poll() is None and time.monotonic() < deadline, "serve.py did not start"
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        with socket.create_connection(('127.0.0.1', port), timeout=3) as stream:
+            stream.sendall(b'POST /predict/stream HTTP/1.1\r\nHost: localhost\r\n'
+                           b'Content-Type: text/plain\r\nTransfer-Encoding: chunked\r\n\r\n'
+                           b'11\r\nI love this song\n\r\n')
+            received = b''
+            while b'"sentiment"' not in received:
+                chunk = stream.recv(4096)
+                assert chunk
+                received += chunk
+
+            # The stream body is still open on the only worker
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=3)
+            connection.request('GET', '/health')
+            response = connection.getresponse()
+            assert response.status == 200 and json.loads(response.read())['status'] == 'healthy'
+            connection.close()
+            stream.sendall(b'0\r\n\r\n')
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def test_stream_is_refused_without_threads():
+    """Single-threaded workers answer /predict/stream with 503 instead of blocking on it"""
+    import app
+
+    assert app.load_models()
+    app.STREAMS_ENABLED = False
+    try:
+        response = app.app.test_client().post('/predict/stream', data='I love this\n')
+    finally:
+        app.STREAMS_ENABLED = True
+    assert response.status_code == 503 and '--no-threads' in response.get_json()['error']
+
+
+if __name__ == "__main__":
+    test_read_lines_bounds_line_length()
+    test_reader_batches_every_line_once()
+    test_stream_endpoint_scores_each_line()
+    test_chunked_input_reads_stop_at_chunk_ends()
+    test_live_stream_answers_each_line_as_it_arrives()
+    test_streaming_handler_serves_other_routes()
+    test_serve_py_answers_health_while_a_stream_is_open()
+    test_stream_is_refused_without_threads()
+    print("✅ Stream endpoint scores every line with bounded buffering")
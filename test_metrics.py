@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus text rendering of metrics.py and the /metrics endpoint
+"""
+
+from metrics import CONTENT_TYPE, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    """Bucket counts include every smaller bucket; a value on a bound falls in that bucket"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo latency', buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert registry.render() == '\n'.join([
+        '# HELP demo_seconds Demo latency',
+        '# TYPE demo_seconds histogram',
+        'demo_seconds_bucket{le="0.1"} 2',
+        'demo_seconds_bucket{le="1.0"} 3',
+        'demo_seconds_bucket{le="+Inf"} 4',
+        'demo_seconds_count 4',
+        'demo_seconds_sum 3.65',
+    ]) + '\n'
+
+
+def test_labelled_series_counters_and_gauges():
+    """Labelled series render sorted by label value; counters and gauges render one line each"""
+    registry = MetricsRegistry()
+    stages = registry.histogram('demo_stage_seconds', 'Per stage', buckets=[1.0], labelnames=('stage',))
+    stages.labels('parse').observe(0.5)
+    stages.labels('classify').observe(2.0)
+    paths = registry.counter('demo_texts_total', 'Texts by path', labelnames=('path',))
+    paths.labels('svm').inc(3)
+    paths.labels('lexicon').inc()
+    lines = registry.counter('demo_lines_total', 'Lines')
+    lines.inc(2)
+    gauge = registry.gauge('demo_in_flight', 'In flight')
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert registry.render().splitlines() == [
+        '# HELP demo_stage_seconds Per stage',
+        '# TYPE demo_stage_seconds histogram',
+        'demo_stage_seconds_bucket{stage="classify",le="1.0"} 0',
+        'demo_stage_seconds_bucket{stage="classify",le="+Inf"} 1',
+        'demo_stage_seconds_count{stage="classify"} 1',
+        'demo_stage_seconds_sum{stage="classify"} 2.0',
+        'demo_stage_seconds_bucket{stage="parse",le="1.0"} 1',
+        'demo_stage_seconds_bucket{stage="parse",le="+Inf"} 1',
+        'demo_stage_seconds_count{stage="parse"} 1',
+        'demo_stage_seconds_sum{stage="parse"} 0.5',
+        '# HELP demo_texts_total Texts by path',
+        '# TYPE demo_texts_total counter',
+        'demo_texts_total{path="lexicon"} 1',
+        'demo_texts_total{path="svm"} 3',
+        '# HELP demo_lines_total Lines',
+        '# TYPE demo_lines_total counter',
+        'demo_lines_total 2',
+        '# HELP demo_in_flight In flight',
+        '# TYPE demo_in_flight gauge',
+        'demo_in_flight 1.0',
+    ]
+    assert stages.labels('parse') is stages.labels('parse')
+
+
+def test_metrics_endpoint():
+    """/metrics serves the registry with the Prometheus content type"""
+    import app
+
+    assert app.load_models()
+    client = app.app.test_client()
+    client.post('/predict', json={'text': 'I love this'})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+    body = response.get_data(as_text=True)
+    assert body == app.metrics_registry.render()
+    assert '# TYPE sentify_request_seconds histogram' in body
+    assert 'sentify_request_seconds_bucket{route="/predict",le="+Inf"}' in body
+    assert 'sentify_in_flight_requests 0.0' in body.splitlines()
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_labelled_series_counters_and_gauges()
+    test_metrics_endpoint()
+    print("✅ Metrics render in the Prometheus text format")
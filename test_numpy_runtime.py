@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the NumPy-only runtime against the scikit-learn pipeline
+"""
+
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+from sklearn.svm import SVC
+
+from model_artifact import export_artifact
+from numpy_runtime import NumpyModel, murmurhash3_32
+from test_inference_engine import load_artifacts, load_test_texts
+from text_preprocessing import preprocess_text
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_runtime_matches_sklearn_on_test_csv():
+    """TF-IDF features are bit-identical and SVC labels and decisions match on test.csv"""
+    model, vectorizer, label_encoder = load_artifacts()
+    clean_texts, _ = load_test_texts()
+    runtime = NumpyModel.load(os.path.join(BASE_DIR, 'sentiment_model.artifact'))
+
+    X = vectorizer.transform(clean_texts)
+    rows = runtime.vectorizer.transform(clean_texts)
+    assert (rows.indptr == X.indptr).all()
+    assert (rows.indices == X.indices).all()
+    assert (rows.data == X.data).all()
+
+    sentiments, confidences = runtime.predict(clean_texts)
+    assert list(sentiments) == list(label_encoder.inverse_transform(model.predict(X)))
+    assert np.allclose(confidences, model.decision_function(X).max(axis=1))
+
+
+def test_hashing_and_kernel_models_match(tmp_path):
+    """Hashed features (murmurhash3) and an rbf SVC's support vectors score like sklearn"""
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.utils import murmurhash3_32 as sklearn_murmurhash3_32
+
+    for text in ['', 'a', 'ab', 'abc', 'abcd', 'good morning', 'café crème', 'x' * 37]:
+        assert murmurhash3_32(text.encode('utf-8')) == sklearn_murmurhash3_32(text.encode('utf-8'))
+
+    _, _, label_encoder = load_artifacts()
+    clean_texts, labels = load_test_texts()
+    vectorizer = make_pipeline(
+        HashingVectorizer(n_features=2 ** 16, ngram_range=(1, 2), stop_words='english',
+                          alternate_sign=False, norm=None),
+        TfidfTransformer(sublinear_tf=True)
+    )
+    X = vectorizer.fit_transform(clean_texts[:1500])
+    model = SVC(kernel='rbf', C=1, gamma='scale').fit(X, label_encoder.transform(labels[:1500]))
+    export_artifact(model, vectorizer, label_encoder, str(tmp_path / 'rbf.artifact'))
+    runtime = NumpyModel.load(str(tmp_path / 'rbf.artifact'))
+
+    X_eval = vectorizer.transform(clean_texts[1500:])
+    rows = runtime.vectorizer.transform(clean_texts[1500:])
+    assert (rows.indices == X_eval.indices).all()
+    assert np.allclose(rows.data, X_eval.data)
+
+    sentiments, confidences = runtime.predict(clean_texts[1500:])
+    assert list(sentiments) == list(label_encoder.inverse_transform(model.predict(X_eval)))
+    assert np.allclose(confidences, model.decision_function(X_eval).max(axis=1))
+
+
+def test_runtime_imports_neither_scipy_nor_sklearn():
+    """Loading and scoring pulls in NumPy and the standard library only"""
+    snippet = ("import sys; from numpy_runtime import NumpyModel; NumpyModel.load().predict(['great day']); "
+               "print(sorted(m for m in sys.modules if m.split('.')[0] in ('scipy', 'sklearn', 'joblib')))")
+    output = subprocess.run([sys.executable, '-c', snippet], cwd=BASE_DIR, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    assert output == '[]'
+
+
+def test_vercel_bundle_serves_the_svm(tmp_path):
+    """api/ plus vercel.json's includeFiles is enough for the function to load the SVM"""
+    with open(os.path.join(BASE_DIR, 'vercel.json')) as f:
+        include = json.load(f)['functions']['api/predict.py']['includeFiles']
+    with open(os.path.join(BASE_DIR, 'api', 'requirements.txt')) as f:
+        assert any(line.startswith('numpy==') for line in f)
+
+    shutil.copytree(os.path.join(BASE_DIR, 'api'), tmp_path / 'api')
+    for pattern in include.strip('{}').split(','):
+        for path in glob.glob(os.path.join(BASE_DIR, pattern), recursive=True):
+            if os.path.isfile(path):
+                target = tmp_path / os.path.relpath(path, BASE_DIR)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy(path, target)
+
+    snippet = "import predict; print(predict.MODEL_NAME)"
+    env = {key: value for key, value in os.environ.items() if key not in ('PYTHONPATH', 'MODEL_ARTIFACT')}
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=tmp_path / 'api', env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'svm' and 'WARNING' not in result.stderr
+
+    # A missing artifact still answers, from the lexicon, but says so
+    shutil.rmtree(tmp_path / 'sentiment_model.artifact')
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=tmp_path / 'api', env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'lexicon' and 'WARNING: serving the keyword lexicon' in result.stderr
+
+
+def test_vercel_confidence_matches_flask():
+    """/api/predict reports the same confidence as app.py's /predict for the same text"""
+    import app
+    from api import predict as vercel
+
+    assert app.load_models() and vercel.MODEL_NAME == 'svm'
+    client = app.app.test_client()
+    for text in ('I love this so much!', 'worst day ever', 'The bus leaves at noon'):
+        single = client.post('/predict', json={'text': text}).get_json()
+        result = vercel.analyze_sentiment_model(preprocess_text(text))
+        assert result['sentiment'].lower() == single['sentiment'].lower()
+        assert result['confidence'] == single['confidence']
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_runtime_matches_sklearn_on_test_csv()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_hashing_and_kernel_models_match(pathlib.Path(tmp_dir))
+    test_runtime_imports_neither_scipy_nor_sklearn()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_vercel_bundle_serves_the_svm(pathlib.Path(tmp_dir))
+    test_vercel_confidence_matches_flask()
+    print("✅ NumPy runtime matches the scikit-learn pipeline")
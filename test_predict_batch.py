@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the /predict/batch endpoint
+"""
+
+import app
+
+
+def client():
+    assert app.load_models()
+    return app.app.test_client()
+
+
+def test_mixed_batch_reports_errors_per_item():
+    """Valid items are scored, empty and non-string ones fail alone, ids pass through"""
+    items = [
+        {'id': 'first', 'text': 'I love this so much!'},
+        'worst day ever',
+        {'id': 7, 'text': '   '},
+        '',
+        42,
+        {'id': 'no-text'},
+        {'text': 'The bus leaves at noon'}
+    ]
+    response = client().post('/predict/batch', json={'items': items})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] and body['count'] == len(items)
+
+    results = body['results']
+    assert [result['id'] for result in results] == ['first', 1, 7, 3, 4, 'no-text', 6]
+    assert [result['success'] for result in results] == [True, True, False, False, False, False, True]
+    for result in results:
+        if result['success']:
+            assert set(result) == {'id', 'text', 'sentiment', 'confidence', 'success'}
+        else:
+            assert result['error'] == 'Empty text provided' and 'sentiment' not in result
+    assert results[0]['text'] == 'I love this so much!' and results[4]['text'] == 42
+
+
+def test_batch_matches_single_predictions():
+    """Each batch result equals what /predict returns for the same text"""
+    test_client = client()
+    texts = ['I love this so much!', 'worst day ever', 'The bus leaves at noon', 'worst day ever']
+    app.prediction_cache.clear()
+    results = test_client.post('/predict/batch', json={'items': texts}).get_json()['results']
+    app.prediction_cache.clear()
+    for text, result in zip(texts, results):
+        single = test_client.post('/predict', json={'text': text}).get_json()
+        assert (result['sentiment'], result['confidence']) == (single['sentiment'], single['confidence'])
+
+
+def test_invalid_batches_are_rejected():
+    """Missing, empty, non-list and oversized item lists get a 400"""
+    test_client = client()
+    for payload in ({}, {'items': []}, {'items': 'I love this'},
+                    {'items': ['ok'] * (app.MAX_BATCH_SIZE + 1)}):
+        response = test_client.post('/predict/batch', json=payload)
+        assert response.status_code == 400 and 'error' in response.get_json()
+    response = test_client.post('/predict/batch', json={'items': ['ok'] * (app.MAX_BATCH_SIZE + 1)})
+    assert response.get_json()['error'] == f'Batch too large (max {app.MAX_BATCH_SIZE} items)'
+    assert test_client.post('/predict/batch', json={'items': ['ok'] * app.MAX_BATCH_SIZE}).status_code == 200
+
+
+if __name__ == "__main__":
+    test_mixed_batch_reports_errors_per_item()
+    test_batch_matches_single_predictions()
+    test_invalid_batches_are_rejected()
+    print("✅ /predict/batch scores valid items and reports errors per item")
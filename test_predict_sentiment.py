@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-process model cache and the warm daemon of predict_sentiment.py
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import predict_sentiment
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEXTS = ['I absolutely love this product!', 'This is the worst experience ever', 'The meeting is at noon']
+
+
+def test_model_is_loaded_once_per_process():
+    """Repeated predictions reuse one engine, whose id the client can compute without loading it"""
+    original_load = predict_sentiment.load_model
+    loads = []
+
+    def counting_load():
+        loads.append(1)
+        return original_load()
+
+    predict_sentiment._engine = None
+    predict_sentiment.load_model = counting_load
+    try:
+        results = [predict_sentiment.predict_sentiment(text) for text in TEXTS * 2]
+    finally:
+        predict_sentiment.load_model = original_load
+    assert len(loads) == 1
+    assert results[:3] == results[3:] and results[0] == 'positive'
+    assert predict_sentiment.local_model_id() == predict_sentiment.get_model().model_id
+
+
+def start_daemon(socket_path):
+    daemon = subprocess.Popen([sys.executable, 'predict_sentiment.py', '--serve', '--socket', socket_path],
+                              cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while not predict_sentiment.daemon_is_running(socket_path):
+        assert daemon.poll() is None and time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.1)
+    return daemon
+
+
+def test_daemon_round_trip():
+    """The daemon answers like in-process scoring, and answers from another model are ignored"""
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        socket_path = os.path.join(runtime_dir, 'sentify.sock')
+        daemon = start_daemon(socket_path)
+        try:
+            assert os.stat(socket_path).st_mode & 0o777 == 0o600
+            for text in TEXTS:
+                assert predict_sentiment.predict_via_daemon(text, socket_path) \
+                    == predict_sentiment.predict_sentiment(text)
+            # A daemon still serving an older model is not trusted
+            assert predict_sentiment.predict_via_daemon(TEXTS[0], socket_path, model_id='retrained') is None
+
+            # Undecodable bytes get an error line and the connection stays usable
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(socket_path)
+                responses = client.makefile('rb')
+                client.sendall(b'"\xff\xfe"\n')
+                assert json.loads(responses.readline())['error'] == 'Invalid JSON data'
+                client.sendall(json.dumps(TEXTS[1]).encode('utf-8') + b'\n')
+                assert json.loads(responses.readline())['sentiment'] == 'negative'
+        finally:
+            # responses still holds a connection open: shutdown must not wait for it
+            daemon.send_signal(signal.SIGTERM)
+            daemon.wait(timeout=30)
+        assert not os.path.exists(socket_path)
+
+
+def test_shared_socket_directory_is_not_trusted():
+    """A socket in a directory other users can write to is neither served nor used"""
+    with tempfile.TemporaryDirectory() as shared_dir:
+        os.chmod(shared_dir, 0o777)
+        socket_path = os.path.join(shared_dir, 'sentify.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as impostor:
+            impostor.bind(socket_path)
+            impostor.listen()
+            assert not predict_sentiment.is_private(socket_path)
+            assert predict_sentiment.predict_via_daemon(TEXTS[0], socket_path) is None
+
+    assert predict_sentiment.default_socket_path() != '/tmp/sentify.sock'
+
+
+if __name__ == "__main__":
+    test_model_is_loaded_once_per_process()
+    test_daemon_round_trip()
+    test_shared_socket_directory_is_not_trusted()
+    print("✅ predict_sentiment.py caches its model and only trusts its own daemon")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the prediction cache: LRU eviction, TTL expiry and model versioning
+"""
+
+from prediction_cache import PredictionCache
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    """At capacity the entry read or written longest ago goes first"""
+    cache = PredictionCache(maxsize=2)
+    cache.put('a', ('positive', 1.0))
+    cache.put('b', ('negative', 2.0))
+    assert cache.get('a') == ('positive', 1.0)  # 'b' is now the oldest
+    cache.put('c', ('neutral', 3.0))
+
+    assert cache.get('b') is None
+    assert cache.get('a') == ('positive', 1.0) and cache.get('c') == ('neutral', 3.0)
+    stats = cache.stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+    assert stats['hit_rate'] == 0.75
+
+
+def test_entries_expire_after_ttl():
+    """An entry is served until its TTL has passed, then counted as expired and a miss"""
+    clock = FakeClock()
+    cache = PredictionCache(maxsize=10, ttl=60, clock=clock)
+    cache.put('a', ('positive', 1.0))
+    clock.now += 60
+    assert cache.get('a') == ('positive', 1.0)
+    clock.now += 0.001
+    assert cache.get('a') is None
+
+    stats = cache.stats()
+    assert (stats['size'], stats['expirations'], stats['hits'], stats['misses']) == (0, 1, 1, 1)
+    cache.put('a', ('negative', 2.0))
+    assert cache.get('a') == ('negative', 2.0)
+
+
+def test_new_model_version_clears_the_cache():
+    """Results from one model are never returned for another"""
+    cache = PredictionCache(maxsize=10)
+    cache.set_model_version('model-1')
+    cache.put('a', ('positive', 1.0))
+    cache.set_model_version('model-1')
+    assert cache.get('a') == ('positive', 1.0)
+
+    cache.set_model_version('model-2')
+    assert cache.stats()['size'] == 0 and cache.get('a') is None
+    cache.put('a', ('negative', 2.0))
+    cache.set_model_version('model-1')
+    assert cache.get('a') is None
+
+
+def test_disabled_cache_stores_nothing():
+    """maxsize 0 turns the cache off without counting lookups"""
+    cache = PredictionCache(maxsize=0)
+    cache.put('a', ('positive', 1.0))
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0 and cache.stats()['misses'] == 0
+
+
+def test_cached_and_uncached_predict_responses_match():
+    """/predict gives the same body whether or not the result came from the cache"""
+    import app
+
+    assert app.load_models()
+    client = app.app.test_client()
+    app.prediction_cache.clear()
+    texts = ['I love this so much!', 'worst day ever', 'The bus leaves at noon']
+
+    uncached = [client.post('/predict', json={'text': text}).get_json() for text in texts]
+    hits = app.prediction_cache.hits
+    cached = [client.post('/predict', json={'text': text}).get_json() for text in texts]
+    assert app.prediction_cache.hits == hits + len(texts)
+    assert cached == uncached
+
+    app.prediction_cache.clear()
+    assert [client.post('/predict', json={'text': text}).get_json() for text in texts] == uncached
+
+
+if __name__ == "__main__":
+    test_least_recently_used_entry_is_evicted()
+    test_entries_expire_after_ttl()
+    test_new_model_version_clears_the_cache()
+    test_disabled_cache_stores_nothing()
+    test_cached_and_uncached_predict_responses_match()
+    print("✅ Prediction cache evicts, expires and invalidates correctly")
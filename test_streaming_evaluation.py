@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked evaluation against the in-memory sklearn metrics
+"""
+
+import os
+
+import numpy as np
+from sklearn.metrics import classification_report, confusion_matrix
+
+from streaming_evaluation import evaluate_stream, report_from_confusion_matrix
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'sentiment_model.artifact')
+LABELS = ['negative', 'neutral', 'positive']
+
+
+def test_report_matches_classification_report():
+    """Metrics derived from counts equal sklearn's, including a class never predicted"""
+    rng = np.random.RandomState(0)
+    y_true = rng.randint(0, 3, 500)
+    y_pred = np.where(rng.rand(500) < 0.7, y_true, rng.randint(0, 2, 500))
+
+    report = report_from_confusion_matrix(confusion_matrix(y_true, y_pred), LABELS)
+    expected = classification_report(y_true, y_pred, target_names=LABELS,
+                                     output_dict=True, zero_division=0)
+    assert report == expected
+
+
+def test_chunked_workers_match_single_pass(tmp_path):
+    """Chunk size and worker count do not change the merged confusion matrix"""
+    path = tmp_path / 'labelled.csv'
+    with open(path, 'w') as f:
+        f.write('text,sentiment\n')
+        for i in range(60):
+            text = ['I love this', 'worst day ever', 'it is a table'][i % 3]
+            f.write(f'{text} {i},{LABELS[(i // 3) % 3]}\n')
+        f.write(',positive\nunlabelled row,unknown\n')
+
+    single, labels, skipped = evaluate_stream(str(path), chunk_size=1000, artifact_path=ARTIFACT_PATH)
+    merged, _, _ = evaluate_stream(str(path), chunk_size=7, workers=2, artifact_path=ARTIFACT_PATH)
+
+    assert labels == LABELS
+    assert skipped == 1
+    assert single.sum() == 60
+    assert (single == merged).all()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_report_matches_classification_report()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_chunked_workers_match_single_pass(pathlib.Path(tmp_dir))
+    print("✅ Streaming evaluation matches in-memory metrics")
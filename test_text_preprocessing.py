@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Byte-for-byte parity between the shared preprocess_text and the original implementation
+"""
+
+import csv
+import os
+import random
+import sys
+
+from text_preprocessing import (preprocess_text, normalize_many, normalize_parallel, iter_normalized,
+                                _reference_preprocess_text)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_column(filename, column, has_header=True):
+    """Read one column of a latin-1 CSV file"""
+    with open(os.path.join(BASE_DIR, filename), encoding='latin-1', newline='') as f:
+        reader = csv.reader(f)
+        if has_header:
+            header = next(reader)
+            column = header.index(column)
+        return [row[column] for row in reader if len(row) > column]
+
+
+def test_matches_reference_on_corpora():
+    """Identical output on every tweet in both bundled datasets"""
+    texts = read_column('test.csv', 'text')
+    texts += read_column('testdata.manual.2009.06.14.csv', 5, has_header=False)
+
+    assert normalize_many(texts) == [_reference_preprocess_text(text) for text in texts]
+
+
+def test_matches_reference_on_edge_cases():
+    """Tags, URLs, case-sensitive schemes, non-ASCII and odd whitespace"""
+    cases = [
+        '', '   ', None, 12345, 3.5,
+        '<b>Bold</b> move', 'ht<i>tp://x.com</i> y', '<unclosed tag',
+        'HTTP://UPPER.com stays', 'see https://t.co/abc, then www.site.org!',
+        'Café naïve Über', 'İstanbul İ', 'smile \U0001F600 ok',
+        'a b c　d', 'x\x1cy\x1dz\x1e\x1f', 'tab\tnew\nline\r\x0b\x0c',
+        'line sep para\x85next', '  leading and trailing 　',
+        'mixed <br> http://a.b end', 'ﬁ ligature ß K',
+    ]
+    for text in cases:
+        assert preprocess_text(text) == _reference_preprocess_text(text), repr(text)
+
+
+def test_matches_reference_on_random_text():
+    """Randomised strings drawn from a mix of ASCII, markup and Unicode"""
+    rng = random.Random(1234)
+    alphabet = (
+        list('abcXYZ019 .,!?<>/:@#_-') + ['http://', 'https://', 'www.', '<a>', '</p>']
+        + ['\t', '\n', ' ', ' ', '\x1c', 'é', 'İ', '\U0001F600', 'K']
+    )
+    for _ in range(5000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert preprocess_text(text) == _reference_preprocess_text(text), repr(text)
+
+
+def test_whitespace_sets_agree():
+    """str.split() and the regex \\s class treat the same characters as whitespace"""
+    import re
+    whitespace = re.compile(r'\s')
+    for code in range(sys.maxunicode + 1):
+        char = chr(code)
+        assert bool(whitespace.match(char)) == char.isspace(), hex(code)
+
+
+def test_parallel_cleaning_keeps_order():
+    """Chunks cleaned in worker processes come back in input order"""
+    texts = read_column('test.csv', 'text')
+    expected = normalize_many(texts)
+
+    assert normalize_parallel(texts, workers=2, chunk_size=500) == expected
+    assert list(iter_normalized(iter(texts), workers=3, chunk_size=97)) == expected
+    assert list(iter_normalized(texts, workers=1)) == expected
+
+
+if __name__ == "__main__":
+    test_matches_reference_on_corpora()
+    test_matches_reference_on_edge_cases()
+    test_matches_reference_on_random_text()
+    test_whitespace_sets_agree()
+    test_parallel_cleaning_keeps_order()
+    print("✅ preprocess_text matches the original implementation")
@@ -1,6 +1,10 @@
+import argparse
+import shutil
+import tempfile
+import time
+from functools import partial
 import numpy as np
 import pandas as pd 
-import re
 import string
 import warnings
 warnings.filterwarnings('ignore')
@@ -16,27 +20,46 @@ nltk.download('stopwords', quiet=True)
 nltk.download('wordnet', quiet=True)
 
 # ML libraries
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV
+from sklearn.pipeline import Pipeline, make_pipeline
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import pickle
+from feature_cache import FeatureCache
+from kernel_approximation import (KERNEL_APPROX_MODES, DEFAULT_COMPONENTS, approximate_kernel,
+                                  compare_kernel_models, print_kernel_comparison)
+from model_artifact import export_artifact, DEFAULT_ARTIFACT_PATH
+from text_preprocessing import iter_normalized, preprocess_text
 
-def preprocess_text(text):
-    """Clean and preprocess text data"""
-    # Remove HTML tags
-    text = re.sub(r'<.*?>', '', str(text))
-    # Remove URLs
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    # Remove punctuation and special characters
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Convert to lowercase
-    text = text.lower()
-    return text
+SEARCH_MODES = ['exhaustive', 'fast', 'compare']
+FEATURE_MODES = ['tfidf', 'hashing']
+
+TFIDF_PARAMS = {
+    'max_features': 10000,  # Limit features for faster training
+    'ngram_range': (1, 2),
+    'stop_words': 'english'
+}
+
+# Columns for hashed features; collisions stay rare for tweet unigrams + bigrams
+HASH_FEATURES = 2 ** 18
+
+# The original grid: 12 candidates, gamma is searched for both kernels
+PARAM_GRID_SVC = {
+    'C': [0.1, 1, 10],
+    'kernel': ['linear', 'rbf'],
+    'gamma': ['scale', 'auto']
+}
+
+# Same search space without the gamma axis for the linear kernel, which
+# ignores it: 9 distinct candidates
+FAST_PARAM_GRID_SVC = [
+    {'svc__kernel': ['linear'], 'svc__C': [0.1, 1, 10]},
+    {'svc__kernel': ['rbf'], 'svc__C': [0.1, 1, 10], 'svc__gamma': ['scale', 'auto']}
+]
 
 def load_and_prepare_data():
     """Load and prepare the dataset"""
@@ -66,64 +89,217 @@ def load_and_prepare_data():
     
     return data
 
-def train_svm_model():
-    """Train and save the SVM model"""
-    print("Starting SVM model training...")
-    
-    # Load and prepare data
-    data = load_and_prepare_data()
-    
-    # Encode labels
-    label_encoder = LabelEncoder()
-    data['sentiment'] = label_encoder.fit_transform(data['sentiment'])
-    
-    # Preprocess text
-    print("Preprocessing text...")
-    data['clean_text'] = data['text'].apply(preprocess_text)
-    
-    # Prepare features and labels
-    X = data['clean_text']
-    y = data['sentiment']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+def make_vectorizer(features='tfidf', n_features=HASH_FEATURES):
+    """TF-IDF with a fitted vocabulary, or feature hashing plus fitted IDF weights"""
+    if features == 'hashing':
+        # No vocabulary to store or look up: n-grams are hashed straight to a
+        # column, and only the idf vector is learned from the training data
+        return make_pipeline(
+            HashingVectorizer(
+                n_features=n_features,
+                ngram_range=TFIDF_PARAMS['ngram_range'],
+                stop_words=TFIDF_PARAMS['stop_words'],
+                alternate_sign=False,
+                norm=None
+            ),
+            TfidfTransformer()
+        )
+    return TfidfVectorizer(**TFIDF_PARAMS)
+
+def exhaustive_search(X_train, y_train, vectorizer_factory=make_vectorizer):
+    """Full grid search on TF-IDF features fitted once on the training split"""
+    started = time.perf_counter()
     
     # Vectorize text using TF-IDF
     print("Vectorizing text...")
-    tfidf_vectorizer = TfidfVectorizer(
-        max_features=10000,  # Limit features for faster training
-        ngram_range=(1, 2),
-        stop_words='english'
-    )
-    
+    tfidf_vectorizer = vectorizer_factory()
     X_train_tfidf = tfidf_vectorizer.fit_transform(X_train)
-    X_test_tfidf = tfidf_vectorizer.transform(X_test)
     
     # Grid search for SVM hyperparameters
     print("Performing grid search for SVM...")
-    param_grid_svc = {
-        'C': [0.1, 1, 10],
-        'kernel': ['linear', 'rbf'],
-        'gamma': ['scale', 'auto']
-    }
-    
     svm_grid = GridSearchCV(
         SVC(), 
-        param_grid_svc, 
+        PARAM_GRID_SVC, 
         cv=3,  # Reduced CV folds for speed
         scoring='accuracy',
         n_jobs=-1
     )
     
     svm_grid.fit(X_train_tfidf, y_train)
+    wall_time = time.perf_counter() - started
     
     print(f"Best SVM parameters: {svm_grid.best_params_}")
     print(f"Best cross-validation score: {svm_grid.best_score_:.4f}")
+    print(f"Exhaustive search took {wall_time:.1f}s")
+    
+    return {
+        'mode': 'exhaustive',
+        'model': svm_grid.best_estimator_,
+        'vectorizer': tfidf_vectorizer,
+        'best_params': svm_grid.best_params_,
+        'best_score': svm_grid.best_score_,
+        'candidates': len(svm_grid.cv_results_['params']),
+        'wall_time': wall_time
+    }
+
+def fast_search(X_train, y_train, vectorizer_factory=make_vectorizer):
+    """Successive halving on sample count, with per-fold TF-IDF features cached"""
+    started = time.perf_counter()
+    print("Performing successive halving search for SVM...")
     
-    # Train final model with best parameters
-    best_svm = svm_grid.best_estimator_
+    # The vectorizer is refitted inside each fold, so no fold sees features
+    # learned from its own validation rows. Pipeline memory caches each
+    # fold's fitted vectorizer and matrix, so every candidate after the
+    # first in an iteration reuses them instead of re-vectorizing.
+    cache_dir = tempfile.mkdtemp(prefix='svm_search_cache_')
+    try:
+        pipeline = Pipeline([
+            ('tfidf', vectorizer_factory()),
+            ('svc', SVC())
+        ], memory=cache_dir)
+        
+        svm_search = HalvingGridSearchCV(
+            pipeline,
+            FAST_PARAM_GRID_SVC,
+            resource='n_samples',
+            factor=3,
+            cv=3,
+            scoring='accuracy',
+            n_jobs=-1,
+            random_state=42
+        )
+        svm_search.fit(X_train, y_train)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    wall_time = time.perf_counter() - started
+    
+    best_params = {name.replace('svc__', ''): value for name, value in svm_search.best_params_.items()}
+    print(f"Candidates per iteration: {list(svm_search.n_candidates_)}, "
+          f"samples per iteration: {list(svm_search.n_resources_)}")
+    print(f"Best SVM parameters: {best_params}")
+    print(f"Best cross-validation score: {svm_search.best_score_:.4f}")
+    print(f"Fast search took {wall_time:.1f}s")
+    
+    best_pipeline = svm_search.best_estimator_
+    return {
+        'mode': 'fast',
+        'model': best_pipeline.named_steps['svc'],
+        'vectorizer': best_pipeline.named_steps['tfidf'],
+        'best_params': best_params,
+        'best_score': svm_search.best_score_,
+        'candidates': len(svm_search.cv_results_['params']),
+        'wall_time': wall_time
+    }
+
+def same_model_choice(params_a, params_b):
+    """True when two best_params pick the same SVC (gamma is ignored for linear)"""
+    def key(params):
+        gamma = params.get('gamma') if params['kernel'] != 'linear' else None
+        return params['kernel'], params['C'], gamma
+    return key(params_a) == key(params_b)
+
+def print_search_comparison(results):
+    """Side-by-side wall time, chosen parameters and scores of the search modes"""
+    print("\n" + "="*50)
+    print("Search mode comparison:")
+    print("="*50)
+    for result in results:
+        print(f"{result['mode']:>10}: {result['wall_time']:8.1f}s, "
+              f"{result['candidates']:3d} candidate evaluations, CV {result['best_score']:.4f}, "
+              f"test {result['test_accuracy']:.4f}, params {result['best_params']}")
+    
+    # Exhaustive CV scores come from a vectorizer fitted on every training
+    # row, so they run slightly high; test accuracy is the fair comparison
+    exhaustive, fast = results
+    if same_model_choice(exhaustive['best_params'], fast['best_params']):
+        print("✅ Fast search chose the same model")
+    else:
+        print("⚠️  Fast search chose a different model")
+    print(f"Speed-up: {exhaustive['wall_time'] / fast['wall_time']:.1f}x")
+
+def clean_while_consumed(texts, clean_texts, workers=None):
+    """Yield cleaned texts to a consumer such as TfidfVectorizer.fit, keeping a copy in clean_texts"""
+    for clean_text in iter_normalized(texts, workers):
+        clean_texts.append(clean_text)
+        yield clean_text
+
+def train_svm_model(search='exhaustive', features='tfidf', n_features=HASH_FEATURES,
+                    kernel_approx='none', n_components=DEFAULT_COMPONENTS,
+                    preprocess_workers=1, overlap_fit=False):
+    """Train and save the SVM model"""
+    print(f"Starting SVM model training ({features} features)...")
+    vectorizer_factory = partial(make_vectorizer, features, n_features)
+    
+    # Load and prepare data
+    data = load_and_prepare_data()
+    
+    # Encode labels
+    label_encoder = LabelEncoder()
+    data['sentiment'] = label_encoder.fit_transform(data['sentiment'])
+    
+    feature_cache = FeatureCache()
+    y = data['sentiment']
+    if overlap_fit and (search != 'exhaustive' or features != 'tfidf'):
+        # Halving search and the hashing pipeline read the training texts more than once
+        print("--overlap-fit needs --search exhaustive and --features tfidf; cleaning first instead")
+        overlap_fit = False
+    
+    if overlap_fit:
+        # The split depends only on the labels, so splitting the raw text picks
+        # the same rows. Worker processes clean the training texts while the
+        # vectorizer counts n-grams in this one.
+        raw_train, raw_test, y_train, y_test = train_test_split(
+            data['text'], y, test_size=0.2, random_state=42, stratify=y
+        )
+        print("Preprocessing text while fitting the vectorizer...")
+        clean_train = []
+        result = exhaustive_search(clean_while_consumed(raw_train, clean_train, preprocess_workers),
+                                   y_train, vectorizer_factory)
+        X_train = pd.Series(clean_train, index=raw_train.index)
+        X_test = pd.Series(feature_cache.clean_texts(raw_test, workers=preprocess_workers), index=raw_test.index)
+    else:
+        # Preprocess text (reused from .feature_cache when the data is unchanged)
+        print("Preprocessing text...")
+        data['clean_text'] = feature_cache.clean_texts(data['text'], workers=preprocess_workers)
+        
+        # Prepare features and labels
+        X = data['clean_text']
+        
+        # Split data
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        
+        if search == 'compare':
+            results = [exhaustive_search(X_train, y_train, vectorizer_factory),
+                       fast_search(X_train, y_train, vectorizer_factory)]
+            for result in results:
+                result['test_accuracy'] = accuracy_score(
+                    y_test, result['model'].predict(result['vectorizer'].transform(X_test)))
+            print_search_comparison(results)
+            # Keep the exhaustive choice; the comparison is for confirming fast mode
+            result = results[0]
+        elif search == 'fast':
+            result = fast_search(X_train, y_train, vectorizer_factory)
+        else:
+            result = exhaustive_search(X_train, y_train, vectorizer_factory)
+    
+    best_svm = result['model']
+    tfidf_vectorizer = result['vectorizer']
+    X_test_tfidf = feature_cache.features(X_test, tfidf_vectorizer)
+    
+    if kernel_approx == 'nystroem' and best_svm.kernel != 'linear':
+        # Per-request cost of the exact model grows with its support vectors;
+        # keep a fixed-size Nystroem approximation instead and show the trade-off
+        print(f"Approximating the {best_svm.kernel} kernel with {n_components} Nystroem components...")
+        X_train_tfidf = feature_cache.features(X_train, tfidf_vectorizer)
+        approx_svm = approximate_kernel(best_svm, X_train_tfidf, y_train, n_components)
+        print_kernel_comparison(compare_kernel_models(
+            [(f'exact {best_svm.kernel}', best_svm), (f'nystroem {n_components}', approx_svm)],
+            X_test_tfidf, y_test))
+        best_svm = approx_svm
+    elif kernel_approx == 'nystroem':
+        print("Linear kernel selected; its per-request cost is already constant, no approximation needed")
     
     # Evaluate on test set
     svm_pred = best_svm.predict(X_test_tfidf)
@@ -139,6 +315,11 @@ def train_svm_model():
     joblib.dump(tfidf_vectorizer, 'tfidf_vectorizer.pkl')
     joblib.dump(label_encoder, 'label_encoder.pkl')
     
+    # Export the compiled, memory-mappable artifact used by the serving code
+    print("Exporting compiled model artifact...")
+    manifest = export_artifact(best_svm, tfidf_vectorizer, label_encoder, DEFAULT_ARTIFACT_PATH)
+    print(f"Artifact {manifest['model_id']} written to {DEFAULT_ARTIFACT_PATH}/")
+    
     print("Model saved successfully!")
     
     return best_svm, tfidf_vectorizer, label_encoder, accuracy
@@ -160,9 +341,32 @@ def predict_sentiment(text, model, vectorizer, label_encoder):
     return sentiment
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the SVM sentiment model")
+    parser.add_argument('--search', choices=SEARCH_MODES, default='exhaustive',
+                        help="Hyperparameter search: full grid, successive halving, "
+                             "or both with a comparison (default: %(default)s)")
+    parser.add_argument('--features', choices=FEATURE_MODES, default='tfidf',
+                        help="Vocabulary TF-IDF or hashed features with IDF weights (default: %(default)s)")
+    parser.add_argument('--hash-features', type=int, default=HASH_FEATURES,
+                        help="Columns for --features hashing (default: %(default)s)")
+    parser.add_argument('--kernel-approx', choices=KERNEL_APPROX_MODES, default='none',
+                        help="Replace a selected RBF/poly/sigmoid SVC with a Nystroem map + LinearSVC "
+                             "of fixed cost per request (default: %(default)s)")
+    parser.add_argument('--approx-components', type=int, default=DEFAULT_COMPONENTS,
+                        help="Nystroem components for --kernel-approx (default: %(default)s)")
+    parser.add_argument('--preprocess-workers', type=int, default=1,
+                        help="Processes cleaning the text column; 0 for one per core (default: %(default)s)")
+    parser.add_argument('--overlap-fit', action='store_true',
+                        help="Clean the training texts while the TF-IDF vocabulary is counted "
+                             "(exhaustive search only)")
+    args = parser.parse_args()
+    
     try:
         # Train the model
-        model, vectorizer, label_encoder, accuracy = train_svm_model()
+        model, vectorizer, label_encoder, accuracy = train_svm_model(
+            search=args.search, features=args.features, n_features=args.hash_features,
+            kernel_approx=args.kernel_approx, n_components=args.approx_components,
+            preprocess_workers=args.preprocess_workers or None, overlap_fit=args.overlap_fit)
         
         # Test with sample predictions
         print("\n" + "="*50)